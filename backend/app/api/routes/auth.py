@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.services.appwrite import get_db_service, get_users_service
 from app.core.config import settings
+from app.core.upstream import upstream_budget
+from app.services.versions import forget_etag
+from app.services.user_directory import invalidate_user
+from app.services.snapshot_sync import member_snapshots
 from app.models.user import UserRegister, UserLoginSync, UserUpdate, PasswordChange, UserResponse
 from appwrite.id import ID
 from appwrite.exception import AppwriteException
@@ -11,7 +15,7 @@ router = APIRouter()
 
 
 # --- OPTIMIZED: REGISTER ---
-@router.post("/register", response_model=UserResponse, summary="Register New User")
+@router.post("/register", response_model=UserResponse, summary="Register New User", dependencies=[Depends(upstream_budget(2))])
 async def register_user(user: UserRegister):
     """
     Optimization: Uses async but keeps sequential flow (auth must complete before DB)
@@ -23,8 +27,7 @@ async def register_user(user: UserRegister):
         # A. Create Auth Account (must be first)
         new_account_id = ID.unique()
         try:
-            auth_user = await asyncio.to_thread(
-                users_service.create,
+            auth_user = await users_service.create(
                 user_id=new_account_id,
                 email=user.email,
                 password=user.password,
@@ -51,8 +54,7 @@ async def register_user(user: UserRegister):
             "bio": f"Hi! I'm {user.name}"
         }
 
-        doc = await asyncio.to_thread(
-            db_service.create_document,
+        doc = await db_service.create_document(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_USERS,
             document_id=auth_user['$id'],
@@ -86,7 +88,7 @@ async def register_user(user: UserRegister):
 
 
 # --- OPTIMIZED: LOGIN ---
-@router.post("/login", response_model=UserResponse, summary="Verify User Login & Fetch Profile")
+@router.post("/login", response_model=UserResponse, summary="Verify User Login & Fetch Profile", dependencies=[Depends(upstream_budget(2))])
 async def login_sync(user: UserLoginSync):
     """
     Optimization: Parallel DB + auth queries using asyncio.gather
@@ -98,13 +100,12 @@ async def login_sync(user: UserLoginSync):
         try:
             # Run both queries in parallel
             doc, auth_user = await asyncio.gather(
-                asyncio.to_thread(
-                    db.get_document,
+                db.get_document(
                     database_id=settings.APPWRITE_DATABASE_ID,
                     collection_id=settings.COLLECTION_USERS,
                     document_id=user.id
                 ),
-                asyncio.to_thread(users_service.get, user.id),
+                users_service.get(user.id),
                 return_exceptions=False
             )
         except Exception:
@@ -136,7 +137,7 @@ async def login_sync(user: UserLoginSync):
 
 
 # --- OPTIMIZED: UPDATE PROFILE ---
-@router.put("/profile", summary="Update Profile")
+@router.put("/profile", summary="Update Profile", dependencies=[Depends(upstream_budget(1))])
 async def update_profile(data: UserUpdate):
     """
     Optimization: Async execution for non-blocking I/O
@@ -156,13 +157,16 @@ async def update_profile(data: UserUpdate):
         if not updates:
             return {"success": False, "message": "No changes provided"}
 
-        await asyncio.to_thread(
-            db.update_document,
+        await db.update_document(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_USERS,
             document_id=data.user_id,
             data=updates
         )
+        forget_etag(settings.COLLECTION_USERS, data.user_id)
+        if {'avatar_url', 'skills'} & updates.keys():
+            invalidate_user(data.user_id)
+            member_snapshots.notify(data.user_id)
         
         return {"success": True, "message": "Profile updated"}
 
@@ -171,7 +175,7 @@ async def update_profile(data: UserUpdate):
 
 
 # --- OPTIMIZED: CHANGE PASSWORD ---
-@router.post("/change-password", summary="Change Password")
+@router.post("/change-password", summary="Change Password", dependencies=[Depends(upstream_budget(1))])
 async def change_password(data: PasswordChange):
     """
     Optimization: Async execution for non-blocking I/O
@@ -179,8 +183,7 @@ async def change_password(data: PasswordChange):
     try:
         users_service = get_users_service()
         
-        await asyncio.to_thread(
-            users_service.update_password,
+        await users_service.update_password(
             user_id=data.user_id,
             password=data.new_password
         )
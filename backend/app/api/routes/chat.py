@@ -0,0 +1,233 @@
+from fastapi import APIRouter, Depends, HTTPException, Query as Param
+from fastapi.responses import StreamingResponse
+from app.services.appwrite import get_db_service
+from app.services.chat import chat, chat_events, chat_topic
+from app.services.membership import membership
+from app.services.singleflight import get_document_coalesced
+from app.services.tag_index import hackathon_index
+from app.services.user_directory import get_member_cards
+from app.core.config import settings
+from app.core.upstream import upstream_budget
+from app.models.chat import MessageCreate, ReadReceipt
+from app.utils.batch import parse_ids
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from appwrite.exception import AppwriteException
+from appwrite.query import Query
+from typing import List, Optional
+import asyncio
+
+router = APIRouter()
+
+# Channel ids: "team:<team_id>", "hackathon:<hackathon_id>", "direct:<user_a>:<user_b>" (ids sorted)
+
+# One live stream follows at most this many channels; each access check costs at most
+# CHANNEL_CHECK_CALLS round-trips (team / hackathon document, the user's teams)
+MAX_STREAM_CHANNELS = 25
+CHANNEL_CHECK_CALLS = 2
+
+
+def direct_channel(user_a: str, user_b: str) -> str:
+    return "direct:" + ":".join(sorted((user_a, user_b)))
+
+
+async def _teams_of(user_id: str) -> List[dict]:
+    if membership.ready:
+        return membership.teams_of(user_id)
+    return await get_db_service().list_all_documents(
+        database_id=settings.APPWRITE_DATABASE_ID,
+        collection_id=settings.COLLECTION_TEAMS,
+        queries=[Query.equal('members', user_id)]
+    )
+
+
+async def _channel_info(channel_id: str, user_id: str) -> dict:
+    """Type, name and participants of a channel; 403 unless `user_id` may read and post in it."""
+    kind, _, ref = channel_id.partition(":")
+
+    if kind == "team":
+        # Local membership index first; a miss may just be a write from another worker
+        team = next((t for t in membership.teams_of(user_id) if t['$id'] == ref), None) if membership.ready else None
+        if team is None:
+            try:
+                team = await get_document_coalesced(settings.COLLECTION_TEAMS, ref)
+            except AppwriteException as e:
+                if e.code == 404:
+                    raise HTTPException(status_code=404, detail="Team not found")
+                raise
+        if user_id not in team.get('members', []):
+            raise HTTPException(status_code=403, detail="Only team members can use the team channel")
+        return {"id": channel_id, "type": "team", "name": team.get('name'), "participants": team.get('members', [])}
+
+    if kind == "hackathon" and ref:
+        hackathon = hackathon_index.get(ref)
+        if hackathon is None:
+            try:
+                hackathon = await get_document_coalesced(settings.COLLECTION_HACKATHONS, ref)
+            except AppwriteException as e:
+                if e.code == 404:
+                    raise HTTPException(status_code=404, detail="Hackathon not found")
+                raise
+        # Same rule as the channel list: the hackathon's channel is for people on one of its teams
+        if not any(t.get('hackathon_id') == ref for t in await _teams_of(user_id)):
+            raise HTTPException(status_code=403, detail="Only hackathon participants can use the hackathon channel")
+        return {"id": channel_id, "type": "hackathon", "name": hackathon.get('name'), "participants": []}
+
+    if kind == "direct":
+        participants = ref.split(":")
+        if len(participants) != 2 or channel_id != direct_channel(*participants):
+            raise HTTPException(status_code=400, detail="Direct channels are direct:<user_a>:<user_b> with sorted ids")
+        if user_id not in participants:
+            raise HTTPException(status_code=403, detail="Not part of this conversation")
+        return {"id": channel_id, "type": "direct", "name": None, "participants": participants}
+
+    raise HTTPException(status_code=400, detail="Unknown channel")
+
+
+async def _with_senders(messages: List[dict]) -> List[dict]:
+    """Attach senderName / senderAvatar (shared user cache, one batched lookup for misses)."""
+    cards = await get_member_cards({m['senderId'] for m in messages})
+    for m in messages:
+        card = cards.get(m['senderId']) or {}
+        m['senderName'] = card.get('name', "Unknown User")
+        m['senderAvatar'] = card.get('avatar') or None
+    return messages
+
+
+# --- 1. MY CHANNELS ---
+@router.get("/channels", summary="A user's chat channels with unread counts")
+async def list_channels(user_id: str):
+    try:
+        teams, markers = await asyncio.gather(_teams_of(user_id), chat.markers_of(user_id))
+
+        # Teams and their hackathons, plus anything the user has read or been messaged in
+        channels = {}
+        for team in teams:
+            channels[f"team:{team['$id']}"] = {"type": "team", "name": team.get('name'), "participants": team.get('members', [])}
+        for team in teams:
+            if team.get('hackathon_id'):
+                hackathon = hackathon_index.get(team['hackathon_id']) or {}
+                channels.setdefault(f"hackathon:{team['hackathon_id']}", {"type": "hackathon", "name": hackathon.get('name'), "participants": []})
+        for channel_id in markers:
+            kind, _, ref = channel_id.partition(":")
+            if kind == "direct":
+                channels.setdefault(channel_id, {"type": "direct", "name": None, "participants": ref.split(":")})
+            elif kind == "hackathon":
+                hackathon = hackathon_index.get(ref) or {}
+                channels.setdefault(channel_id, {"type": "hackathon", "name": hackathon.get('name'), "participants": []})
+
+        ids = list(channels)
+        logs = await asyncio.gather(*[chat.channel(c) for c in ids])
+        last = [log.messages[-1] if log.messages else None for log in logs]
+
+        # Direct channels are named after the other person
+        others = {p for c in channels.values() if c['type'] == "direct" for p in c['participants'] if p != user_id}
+        cards = await get_member_cards(others | {m['senderId'] for m in last if m})
+
+        result = []
+        for channel_id, log, message in zip(ids, logs, last):
+            channel = channels[channel_id]
+            if channel['type'] == "direct":
+                other = next((p for p in channel['participants'] if p != user_id), user_id)
+                channel['name'] = (cards.get(other) or {}).get('name', "Unknown User")
+            if message:
+                card = cards.get(message['senderId']) or {}
+                message = {**message, "senderName": card.get('name', "Unknown User"), "senderAvatar": card.get('avatar') or None}
+            unread, capped = chat.unread(log, markers.get(channel_id))
+            result.append({
+                "id": channel_id,
+                **channel,
+                "lastMessage": message,
+                "unreadCount": unread,
+                # True: at least `unreadCount` (show e.g. "200+")
+                "unreadCapped": capped,
+            })
+
+        # Most recent activity first
+        result.sort(key=lambda c: c['lastMessage']['id'] if c['lastMessage'] else "", reverse=True)
+        return {"success": True, "channels": result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 2. MESSAGE HISTORY ---
+@router.get("/channels/{channel_id}/messages", summary="Channel history, newest first", dependencies=[Depends(upstream_budget(6))])
+async def get_messages(
+    channel_id: str,
+    user_id: str,
+    before: Optional[str] = Param(None, description="Id of the oldest message already loaded"),
+    limit: int = Param(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        await _channel_info(channel_id, user_id)
+        messages = await _with_senders(await chat.history(channel_id, before, limit))
+        return {
+            "success": True,
+            "messages": messages,
+            "next_cursor": messages[-1]['id'] if len(messages) == limit else None
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 3. SEND MESSAGE ---
+@router.post("/channels/{channel_id}/messages", summary="Send a message", dependencies=[Depends(upstream_budget(7))])
+async def send_message(channel_id: str, message: MessageCreate):
+    try:
+        channel = await _channel_info(channel_id, message.sender_id)
+        card = (await get_member_cards([message.sender_id])).get(message.sender_id)
+
+        # Stored with everyone else's messages of this window in one bulk write
+        sent = await chat.append(channel_id, message.sender_id, message.content, message.type, message.reply_to, card)
+
+        # Own messages aren't unread (even before the broker echoes this one back);
+        # a new conversation shows up in the other person's list
+        await chat.mark_read(channel_id, message.sender_id, up_to=sent['id'])
+        if channel['type'] == "direct":
+            await asyncio.gather(*[chat.follow(channel_id, p) for p in channel['participants'] if p != message.sender_id])
+
+        return {"success": True, "message": sent}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 4. MARK READ ---
+@router.post("/channels/{channel_id}/read", summary="Mark a channel read", dependencies=[Depends(upstream_budget(4))])
+async def mark_read(channel_id: str, receipt: ReadReceipt):
+    try:
+        await _channel_info(channel_id, receipt.user_id)
+        await chat.mark_read(channel_id, receipt.user_id)
+        return {"success": True, "unreadCount": 0}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 5. LIVE MESSAGES ---
+@router.get("/events", summary="New messages as they arrive (Server-Sent Events)",
+            dependencies=[Depends(upstream_budget(MAX_STREAM_CHANNELS * CHANNEL_CHECK_CALLS))])
+async def chat_events_stream(user_id: str, channel_ids: str = Param(..., description="Comma-separated channel ids")):
+    try:
+        # One stream for every open channel, so badges for the others update too
+        ids = parse_ids(channel_ids, MAX_STREAM_CHANNELS)
+        await asyncio.gather(*[_channel_info(c, user_id) for c in ids])
+        return StreamingResponse(
+            chat_events.stream([chat_topic(c) for c in ids], settings.EVENTS_HEARTBEAT_SECONDS),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,30 +1,48 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Query as Param
+from typing import List, Optional
 from app.services.appwrite import get_db_service
+from app.services.tag_index import hackathon_index
+from app.services.search_index import search_index
+from app.services.singleflight import get_document_coalesced
+from app.services.summaries import summaries
+from app.services.team_formation import team_formation
+from app.services.versions import cached_etag, remember_etag
 from app.core.config import settings
-from app.models.hackathon import HackathonCreate
+from app.core.upstream import upstream_budget
+from app.models.hackathon import HackathonCreate, HackathonListResponse, HACKATHON_FIELDS
+from app.models.team import HackathonTeamsResponse, TEAM_FIELDS
 from appwrite.id import ID
 from appwrite.query import Query
 from fastapi.encoders import jsonable_encoder
-import asyncio
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_queries, next_cursor, ndjson_response
+from app.utils.projection import parse_fields, lean, lean_pages
+from app.utils.member_snapshots import without_snapshots, without_snapshots_pages
+from app.utils.responses import FastJSONResponse
+from app.utils.batch import parse_ids, item_ok, item_error
+from app.utils.etag import document_etag, list_etag, etag_matches, not_modified, conditional_response
 
 router = APIRouter()
 
 
 # --- 1. CREATE HACKATHON ---
-@router.post("/", summary="Create a new Hackathon")
+@router.post("/", summary="Create a new Hackathon", dependencies=[Depends(upstream_budget(1))])
 async def create_hackathon(hackathon: HackathonCreate):
     try:
         db = get_db_service()
         
-        result = await asyncio.to_thread(
-            db.create_document,
+        result = await db.create_document(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_HACKATHONS,
             document_id=ID.unique(),
             data=jsonable_encoder(hackathon)
         )
         
+        # Keep recommendations current without waiting for the next rebuild
+        hackathon_index.add(result)
+        search_index.add(result)
+        # Summarize in the background so reads never wait on the model
+        summaries.enqueue(hackathon.description)
+        
         return {"success": True, "data": result}
         
     except Exception as e:
@@ -32,68 +50,139 @@ async def create_hackathon(hackathon: HackathonCreate):
 
 
 # --- 2. GET ALL HACKATHONS ---
-@router.get("/", summary="Get all Hackathons")
-async def get_hackathons():
+@router.get("/", summary="Get all Hackathons", response_model=HackathonListResponse, dependencies=[Depends(upstream_budget(1))])
+async def get_hackathons(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Param(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fields: Optional[str] = Param(None, description="Comma-separated attributes to return, e.g. name,tagline,tags"),
+    ids: Optional[str] = Param(None, description="Comma-separated hackathon ids: fetch exactly these (per-id results)")
+):
     try:
         db = get_db_service()
-        
-        result = await asyncio.to_thread(
-            db.list_documents,
+        select = parse_fields(fields, HACKATHON_FIELDS)
+
+        # Batch lookup: one `$id` query for the whole set, a result or error per id
+        if ids is not None:
+            hackathon_ids = parse_ids(ids)
+            result = await db.list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS,
+                queries=page_queries(len(hackathon_ids), queries=[Query.equal('$id', hackathon_ids)], select=select)
+            )
+            found = {doc['$id']: doc for doc in lean(result['documents'])}
+            return FastJSONResponse({"success": True, "results": [
+                item_ok(h, data=found[h]) if h in found
+                else item_error(h, HTTPException(status_code=404, detail="Hackathon not found"))
+                for h in hackathon_ids
+            ]})
+
+        # NDJSON: send every page from `cursor` onwards as it arrives
+        if stream:
+            return ndjson_response(lean_pages(db.iter_document_pages(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS,
+                queries=[Query.select(select)] if select else None,
+                page_size=limit,
+                cursor=cursor
+            )))
+        
+        result = await db.list_documents(
             database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_HACKATHONS
+            collection_id=settings.COLLECTION_HACKATHONS,
+            queries=page_queries(limit, cursor, select=select)
         )
+        documents = lean(result['documents'])
         
-        return {"success": True, "documents": result['documents']}
+        etag = list_etag(documents, str(request.query_params))
+        return conditional_response(request, etag, {"success": True, "documents": documents, "next_cursor": next_cursor(documents, limit)})
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 2b. SEARCH HACKATHONS ---
+# (declared before /{hackathon_id} so "search" is not taken for an id)
+@router.get("/search", summary="Full-text search over hackathons")
+async def search_hackathons(
+    q: str = Param(..., min_length=1, max_length=200, description="e.g. beginner fintech python"),
+    limit: int = Param(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        # Served from the in-memory index (built from a snapshot or on first use)
+        await search_index.ensure_ready()
+
+        documents = [
+            {**doc, "search_score": score}
+            for score, doc in search_index.search(q, limit)
+        ]
+
+        return FastJSONResponse({"success": True, "count": len(documents), "documents": lean(documents)})
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # --- 3. GET HACKATHON BY ID ---
-@router.get("/{hackathon_id}", summary="Get Hackathon by ID")
-async def get_hackathon(hackathon_id: str):
+@router.get("/{hackathon_id}", summary="Get Hackathon by ID", dependencies=[Depends(upstream_budget(1))])
+async def get_hackathon(hackathon_id: str, request: Request):
+    # Client already has the version we last served? No upstream call at all
+    if request.headers.get("if-none-match"):
+        etag = cached_etag(settings.COLLECTION_HACKATHONS, hackathon_id)
+        if etag and etag_matches(request, etag):
+            return not_modified(etag)
+
     try:
-        db = get_db_service()
-        
-        result = await asyncio.to_thread(
-            db.get_document,
-            database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_HACKATHONS,
-            document_id=hackathon_id
-        )
-        
-        return {"success": True, "data": result}
-        
+        # Identical concurrent reads share one upstream call
+        result = await get_document_coalesced(settings.COLLECTION_HACKATHONS, hackathon_id)
     except Exception as e:
         raise HTTPException(status_code=404, detail="Hackathon not found")
 
+    ai_summary = summaries.get_cached(result.get('description'))
+    # The summary shows up later without touching $updatedAt, so it is part of the tag
+    etag = document_etag(result, ai_summary)
+    if ai_summary is not None:
+        # Still-pending summaries must not be pinned by a cached tag
+        remember_etag(settings.COLLECTION_HACKATHONS, hackathon_id, etag)
+    return conditional_response(request, etag, {"success": True, "data": result, "ai_summary": ai_summary})
+
+
+# --- 3b. GET HACKATHON AI SUMMARY ---
+@router.get("/{hackathon_id}/summary", summary="Get AI summary of a Hackathon", dependencies=[Depends(upstream_budget(1))])
+async def get_hackathon_summary(hackathon_id: str):
+    try:
+        hackathon = await get_document_coalesced(settings.COLLECTION_HACKATHONS, hackathon_id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Hackathon not found")
+
+    # Never wait on the model: serve the cache or queue it for the workers
+    description = hackathon.get('description')
+    summary = summaries.get_cached(description)
+    if summary is None:
+        summaries.enqueue(description)
+        return {"success": True, "status": "pending", "summary": None}
+
+    return {"success": True, "status": "ready", "summary": summary}
+
 
 # --- 4. RECOMMENDATION ENGINE (OPTIMIZED) ---
 @router.post("/recommendations", summary="Get personalized hackathons")
-async def get_recommendations(user_tags: List[str]):
+async def get_recommendations(user_tags: List[str], limit: int = Param(20, ge=1, le=MAX_PAGE_SIZE)):
     try:
-        db = get_db_service()
-        
-        # Fetch all hackathons
-        all_data = await asyncio.to_thread(
-            db.list_documents,
-            database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_HACKATHONS
-        )
-        
-        documents = all_data['documents']
+        # Served from the in-memory tag index (no upstream call once it is built)
+        await hackathon_index.ensure_ready()
         
         # If no tags provided, return all
         if not user_tags:
-            return {"success": True, "documents": documents}
+            return {"success": True, "documents": hackathon_index.documents()}
         
-        # Convert user_tags to set for O(1) lookup (MAJOR OPTIMIZATION)
-        user_tags_set = set(user_tags)
-        
-        # Filter matches using list comprehension with set intersection
+        # Rank by tag overlap weighted by rarity, keep the top K
         matches = [
-            doc for doc in documents
-            if user_tags_set & set(doc.get('tags', []))
+            {**doc, "match_score": score}
+            for score, doc in hackathon_index.search(user_tags, limit)
         ]
         
         return {"success": True, "count": len(matches), "documents": matches}
@@ -103,19 +192,56 @@ async def get_recommendations(user_tags: List[str]):
 
 
 # --- 5. GET HACKATHON TEAMS ---
-@router.get("/{hackathon_id}/teams", summary="Get all teams registered for a hackathon")
-async def get_hackathon_teams(hackathon_id: str):
+@router.get("/{hackathon_id}/teams", summary="Get all teams registered for a hackathon", response_model=HackathonTeamsResponse, dependencies=[Depends(upstream_budget(1))])
+async def get_hackathon_teams(
+    hackathon_id: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Param(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fields: Optional[str] = Param(None, description="Comma-separated attributes to return, e.g. name,members")
+):
     try:
         db = get_db_service()
-        
-        result = await asyncio.to_thread(
-            db.list_documents,
+        select = parse_fields(fields, TEAM_FIELDS)
+        queries = [Query.equal('hackathon_id', hackathon_id)]
+
+        if stream:
+            return ndjson_response(without_snapshots_pages(lean_pages(db.iter_document_pages(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS,
+                queries=queries + [Query.select(select)] if select else queries,
+                page_size=limit,
+                cursor=cursor
+            ))))
+        
+        result = await db.list_documents(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_TEAMS,
-            queries=[Query.equal('hackathon_id', hackathon_id)]
+            queries=page_queries(limit, cursor, queries, select)
         )
+        teams = without_snapshots(lean(result['documents']))
         
-        return {"success": True, "teams": result['documents']}
+        etag = list_etag(teams, hackathon_id, str(request.query_params))
+        return conditional_response(request, etag, {"success": True, "teams": teams, "next_cursor": next_cursor(teams, limit)})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 6. TEAM FORMATION OPTIMIZER ---
+@router.post("/{hackathon_id}/team-formation", summary="Start a team-formation run for a whole hackathon", status_code=202)
+async def start_team_formation(hackathon_id: str):
+    # Runs in the background; poll the job for progress and the suggested teams
+    job = team_formation.start(hackathon_id)
+    return {"success": True, **job.to_dict()}
+
+
+@router.get("/{hackathon_id}/team-formation/{job_id}", summary="Progress and result of a team-formation run")
+async def get_team_formation(hackathon_id: str, job_id: str):
+    job = team_formation.get(job_id)
+    if job is None or job.hackathon_id != hackathon_id:
+        raise HTTPException(status_code=404, detail="Team formation job not found")
+    return FastJSONResponse({"success": True, **job.to_dict()})
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from app.services.appwrite import get_db_service, get_users_service
+from fastapi import APIRouter, Depends, HTTPException, Request, Query as Param
+from app.services.appwrite import get_db_service
+from app.services.user_directory import get_user_names, get_member_cards
+from app.services.singleflight import get_document_coalesced, forget_document
+from app.services.team_mutations import team_mutations
+from app.services.membership import membership
+from app.services.events import team_events, team_topic, hackathon_topic
+from app.services.versions import cached_etag, remember_etag, forget_etag
+from app.services.matching import batch_match_scores, top_k_matches, user_skills, team_requirements
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_queries, next_cursor, ndjson_response
+from app.utils.projection import parse_fields, project, lean
+from app.utils.responses import FastJSONResponse
+from app.utils.member_snapshots import decode_snapshots, encode_snapshots, without_snapshots
+from app.utils.batch import parse_ids, item_ok, item_error
+from app.utils.etag import document_etag, list_etag, etag_matches, not_modified, conditional_response
 from app.core.config import settings
-from app.models.team import TeamCreate
-from pydantic import BaseModel
+from app.core.upstream import upstream_budget
+from app.models.team import TeamCreate, TeamListResponse, TEAM_FIELDS
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from appwrite.id import ID
 from appwrite.query import Query
-from typing import Optional, List
+from typing import Literal, Optional, List
 import asyncio
 
 router = APIRouter()
@@ -22,6 +37,14 @@ class TeamRequestAction(BaseModel):
     leader_id: str
     target_user_id: str
 
+class RequestDecision(BaseModel):
+    user_id: str
+    action: Literal["approve", "reject"]
+
+class RequestDecisions(BaseModel):
+    leader_id: str
+    decisions: List[RequestDecision] = Field(..., min_length=1, max_length=MAX_PAGE_SIZE)
+
 class TeamUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -35,8 +58,7 @@ class TeamUpdate(BaseModel):
 async def _get_team(team_id: str) -> dict:
     """Fetch team document"""
     db = get_db_service()
-    return await asyncio.to_thread(
-        db.get_document,
+    return await db.get_document(
         database_id=settings.APPWRITE_DATABASE_ID,
         collection_id=settings.COLLECTION_TEAMS,
         document_id=team_id
@@ -46,17 +68,67 @@ async def _get_team(team_id: str) -> dict:
 async def _update_team(team_id: str, data: dict):
     """Update team document"""
     db = get_db_service()
-    return await asyncio.to_thread(
-        db.update_document,
+    result = await db.update_document(
         database_id=settings.APPWRITE_DATABASE_ID,
         collection_id=settings.COLLECTION_TEAMS,
         document_id=team_id,
         data=data
     )
+    # Readers arriving after the write must not join a pre-write read
+    forget_document(settings.COLLECTION_TEAMS, team_id)
+    forget_etag(settings.COLLECTION_TEAMS, team_id)
+    membership.put(result)
+    return result
+
+
+async def _delete_team(team_id: str):
+    """Delete team document"""
+    db = get_db_service()
+    await db.delete_document(
+        database_id=settings.APPWRITE_DATABASE_ID,
+        collection_id=settings.COLLECTION_TEAMS,
+        document_id=team_id
+    )
+    forget_document(settings.COLLECTION_TEAMS, team_id)
+    forget_etag(settings.COLLECTION_TEAMS, team_id)
+    membership.remove(team_id)
+
+
+async def _enrich_teams(teams: List[dict]) -> List[dict]:
+    """Attach members_enriched / join_requests_enriched to team documents (in place)"""
+    # 1. Member snapshots written with the team cover everyone on it; collect who they miss
+    snapshots = [decode_snapshots(doc.pop('member_snapshots', None)) for doc in teams]
+    user_ids = set()
+    for doc, cards in zip(teams, snapshots):
+        user_ids.update(uid for uid in doc.get('members', []) if uid not in cards)
+        user_ids.update(uid for uid in (doc.get('join_requests', []) or []) if uid not in cards)
+
+    # 2. Resolve the rest by name (served from the shared user cache when warm)
+    user_map = await get_user_names(user_ids)
+
+    def card(uid: str, cards: dict) -> dict:
+        if uid in cards:
+            return {"userId": uid, **cards[uid]}
+        return {"userId": uid, "name": user_map.get(uid, "Unknown User"), "avatar": "", "skills": []}
+
+    # 3. Enrich teams
+    for doc, cards in zip(teams, snapshots):
+        doc.setdefault('leader_id', "")
+        doc['members_enriched'] = [card(m_id, cards) for m_id in doc.get('members', [])]
+        doc['join_requests_enriched'] = [card(r_id, cards) for r_id in (doc.get('join_requests') or [])]
+
+    return teams
+
+
+def _names_digest(teams: List[dict]) -> str:
+    """Resolved names are part of the response but not of the team's $updatedAt."""
+    return "|".join(
+        m['name'] for doc in teams for m in doc['members_enriched'] + doc['join_requests_enriched']
+    )
 
 
 # --- 1. CREATE TEAM ---
-@router.post("/", summary="Create a Team")
+@router.post("/", summary="Create a Team", dependencies=[Depends(upstream_budget(3))])
 async def create_team(team: TeamCreate):
     try:
         db = get_db_service()
@@ -66,6 +138,9 @@ async def create_team(team: TeamCreate):
         if team.leader_id not in members:
             members.append(team.leader_id)
 
+        # Display cards stored with the team, so reads need no per-user lookups
+        cards = await get_member_cards(members)
+
         data_to_save = {
             k: v for k, v in {
                 "name": team.name,
@@ -76,17 +151,23 @@ async def create_team(team: TeamCreate):
                 "looking_for": team.looking_for,
                 "tech_stack": team.tech_stack,
                 "status": team.status,
-                "project_repo": team.project_repo
+                "project_repo": team.project_repo,
+                "member_snapshots": encode_snapshots(cards, members)
             }.items() if v is not None
         }
 
-        result = await asyncio.to_thread(
-            db.create_document,
+        result = await db.create_document(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_TEAMS,
             document_id=ID.unique(),
             data=data_to_save
         )
+        membership.put(result)
+        result = without_snapshots([dict(result)])[0]
+        team_events.publish({
+            "type": "team_created", "team_id": result['$id'], "hackathon_id": result.get('hackathon_id'),
+            "team": lean([dict(result)])[0]
+        })
         
         return {"success": True, "data": result}
         
@@ -95,23 +176,17 @@ async def create_team(team: TeamCreate):
 
 
 # --- 2. DELETE TEAM ---
-@router.delete("/delete", summary="Delete Team")
+@router.delete("/delete", summary="Delete Team", dependencies=[Depends(upstream_budget(2))])
 async def delete_team(action: TeamAction):
     try:
-        db = get_db_service()
-
         # Fetch and verify leader in parallel
         team = await _get_team(action.team_id)
 
         if team['leader_id'] != action.user_id:
             raise HTTPException(status_code=403, detail="Only leader can delete.")
 
-        await asyncio.to_thread(
-            db.delete_document,
-            database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_TEAMS,
-            document_id=action.team_id
-        )
+        await _delete_team(action.team_id)
+        team_events.publish({"type": "team_deleted", "team_id": action.team_id, "hackathon_id": team.get('hackathon_id')})
         
         return {"success": True, "message": "Team deleted"}
 
@@ -122,32 +197,12 @@ async def delete_team(action: TeamAction):
 
 
 # --- 3. LEAVE TEAM ---
-@router.post("/leave", summary="Leave Team")
+@router.post("/leave", summary="Leave Team", dependencies=[Depends(upstream_budget(4))])
 async def leave_team(action: TeamAction):
     try:
-        db = get_db_service()
-        team = await _get_team(action.team_id)
-
-        current_members = team.get('members', [])
-
-        if action.user_id not in current_members:
-            raise HTTPException(status_code=400, detail="Not in team")
-
-        # Leader leaving? Delete team
-        if action.user_id == team['leader_id']:
-            await asyncio.to_thread(
-                db.delete_document,
-                database_id=settings.APPWRITE_DATABASE_ID,
-                collection_id=settings.COLLECTION_TEAMS,
-                document_id=action.team_id
-            )
-            return {"success": True, "message": "Leader left. Team disbanded."}
-
-        # Remove member and update
-        current_members.remove(action.user_id)
-        await _update_team(action.team_id, {"members": current_members})
-        
-        return {"success": True, "message": "Left team"}
+        # Serialized per team and flushed with the rest of its batch
+        message = await team_mutations.submit(action.team_id, "leave", user_id=action.user_id)
+        return {"success": True, "message": message}
 
     except HTTPException:
         raise
@@ -156,99 +211,110 @@ async def leave_team(action: TeamAction):
 
 
 # --- 4. LIST TEAMS (OPTIMIZED) ---
-@router.get("/", summary="List All Teams")
-async def list_teams(user_id: Optional[str] = None):
+@router.get("/", summary="List All Teams", response_model=TeamListResponse, dependencies=[Depends(upstream_budget(4))])
+async def list_teams(
+    request: Request,
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Param(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fields: Optional[str] = Param(None, description="Comma-separated attributes to return, e.g. name,looking_for")
+):
     try:
         db = get_db_service()
-        users_service = get_users_service()
+        # Enrichment reads members / join_requests / member_snapshots, so those are always selected
+        select = parse_fields(fields, TEAM_FIELDS, always=("leader_id", "members", "join_requests", "member_snapshots"))
         
+        # "My teams": straight from the local membership index once it has loaded
+        if user_id and membership.ready:
+            mine = [project(t, select) for t in membership.teams_of(user_id)]
+            ids = [t['$id'] for t in mine]
+            start = ids.index(cursor) + 1 if cursor in ids else (len(mine) if cursor else 0)
+
+            if stream:
+                async def local_pages():
+                    for i in range(start, len(mine), limit):
+                        yield await _enrich_teams(mine[i:i + limit])
+
+                return ndjson_response(local_pages())
+
+            teams = await _enrich_teams(mine[start:start + limit])
+            teams_result = {"total": len(mine), "documents": teams, "next_cursor": next_cursor(teams, limit)}
+            etag = list_etag(teams, str(request.query_params), _names_digest(teams))
+            return conditional_response(request, etag, teams_result)
+
         queries = []
         if user_id:
             # Filter teams where user is a member
             # Query.equal works for array containment in Appwrite (matches if array contains value)
             queries.append(Query.equal("members", user_id))
 
-        # 1. Fetch teams
-        teams_result = await asyncio.to_thread(
-            db.list_documents,
+        # NDJSON: enrich and send each page as soon as it arrives
+        if stream:
+            async def enriched_pages():
+                async for page in db.iter_document_pages(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_TEAMS,
+                    queries=queries + [Query.select(select)] if select else queries,
+                    page_size=limit,
+                    cursor=cursor
+                ):
+                    yield await _enrich_teams(lean(page))
+
+            return ndjson_response(enriched_pages())
+
+        # 1. Fetch one page of teams
+        teams_result = await db.list_documents(
             database_id=settings.APPWRITE_DATABASE_ID,
             collection_id=settings.COLLECTION_TEAMS,
-            queries=queries
+            queries=page_queries(limit, cursor, queries, select)
         )
         
-        # 2. Collect all unique user IDs
-        user_ids = set()
-        for doc in teams_result['documents']:
-            user_ids.update(doc.get('members', []))
-            user_ids.update(doc.get('join_requests', []) or [])
-            
-        # 3. Fetch users in parallel (if any)
-        user_map = {}
-        if user_ids:
-            # Limit concurrency to avoid rate limits
-            # Appwrite doesn't support bulk fetch by ID list, so we fetch individually
-            # For production, this should be cached or handled differently
-            async def fetch_user_safe(uid):
-                try:
-                    u = await asyncio.to_thread(users_service.get, uid)
-                    return u
-                except:
-                    return None
-
-            users_data = await asyncio.gather(*[fetch_user_safe(uid) for uid in user_ids])
-            
-            for u in users_data:
-                if u:
-                    user_map[u['$id']] = u['name']
-        
-        # 4. Enrich teams
-        for doc in teams_result['documents']:
-            doc.setdefault('leader_id', "")
-            
-            # Enrich members
-            doc['members_enriched'] = [
-                {
-                    "userId": m_id,
-                    "name": user_map.get(m_id, "Unknown User"),
-                    "avatar": ""
-                }
-                for m_id in doc.get('members', [])
-            ]
-            
-            # Enrich join requests
-            doc['join_requests_enriched'] = [
-                {
-                    "userId": r_id,
-                    "name": user_map.get(r_id, "Unknown User")
-                }
-                for r_id in (doc.get('join_requests') or [])
-            ]
+        # 2. Enrich with member / requester names
+        teams = await _enrich_teams(lean(teams_result['documents']))
+        teams_result['next_cursor'] = next_cursor(teams, limit)
 
-        return teams_result
+        etag = list_etag(teams, str(request.query_params), _names_digest(teams))
+        return conditional_response(request, etag, teams_result)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# --- 5. JOIN TEAM ---
-@router.post("/join", summary="Request to Join Team")
-async def join_team(action: TeamAction):
+# --- 4b. LIVE TEAM CHANGES ---
+@router.get("/events", summary="Live team changes (Server-Sent Events)", dependencies=[Depends(upstream_budget(0))])
+async def team_changes(
+    team_ids: Optional[str] = Param(None, description="Comma-separated team ids to follow"),
+    hackathon_ids: Optional[str] = Param(None, description="Comma-separated hackathon ids: follow every team in them")
+):
     try:
-        team = await _get_team(action.team_id)
+        # Replaces re-fetching after every action: clients get small diffs and apply them locally
+        topics = [team_topic(t) for t in (parse_ids(team_ids) if team_ids else [])]
+        topics += [hackathon_topic(h) for h in (parse_ids(hackathon_ids) if hackathon_ids else [])]
+        if not topics:
+            raise HTTPException(status_code=400, detail="Follow at least one of team_ids / hackathon_ids")
+
+        return StreamingResponse(
+            team_events.stream(topics, settings.EVENTS_HEARTBEAT_SECONDS),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
 
-        current_members = team.get('members', [])
-        current_requests = team.get('join_requests', [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if action.user_id in current_members:
-            raise HTTPException(status_code=400, detail="Already in team")
-        
-        if action.user_id in current_requests:
-            raise HTTPException(status_code=400, detail="Request already pending")
 
-        current_requests.append(action.user_id)
-        await _update_team(action.team_id, {"join_requests": current_requests})
-        
-        return {"success": True, "message": "Join request sent"}
+# --- 5. JOIN TEAM ---
+@router.post("/join", summary="Request to Join Team", dependencies=[Depends(upstream_budget(4))])
+async def join_team(action: TeamAction):
+    try:
+        # Serialized per team and flushed with the rest of its batch
+        message = await team_mutations.submit(action.team_id, "join", user_id=action.user_id)
+        return {"success": True, "message": message}
 
     except HTTPException:
         raise
@@ -257,31 +323,15 @@ async def join_team(action: TeamAction):
 
 
 # --- 6. APPROVE REQUEST ---
-@router.post("/approve", summary="Approve Join Request")
+@router.post("/approve", summary="Approve Join Request", dependencies=[Depends(upstream_budget(4))])
 async def approve_request(action: TeamRequestAction):
     try:
-        team = await _get_team(action.team_id)
-
-        if team['leader_id'] != action.leader_id:
-            raise HTTPException(status_code=403, detail="Only leader can approve requests")
-
-        current_requests = team.get('join_requests', [])
-        current_members = team.get('members', [])
-
-        if action.target_user_id not in current_requests:
-            raise HTTPException(status_code=404, detail="Request not found")
-
-        # Update both lists
-        current_requests.remove(action.target_user_id)
-        current_members.append(action.target_user_id)
+        # Serialized per team and flushed with the rest of its batch
+        message = await team_mutations.submit(
+            action.team_id, "approve", leader_id=action.leader_id, target_user_id=action.target_user_id
+        )
+        return {"success": True, "message": message}
 
-        await _update_team(action.team_id, {
-            "join_requests": current_requests,
-            "members": current_members
-        })
-        
-        return {"success": True, "message": "Member approved"}
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -289,24 +339,37 @@ async def approve_request(action: TeamRequestAction):
 
 
 # --- 7. REJECT REQUEST ---
-@router.post("/reject", summary="Reject Join Request")
+@router.post("/reject", summary="Reject Join Request", dependencies=[Depends(upstream_budget(4))])
 async def reject_request(action: TeamRequestAction):
     try:
-        team = await _get_team(action.team_id)
+        # Serialized per team and flushed with the rest of its batch
+        message = await team_mutations.submit(
+            action.team_id, "reject", leader_id=action.leader_id, target_user_id=action.target_user_id
+        )
+        return {"success": True, "message": message}
 
-        if team['leader_id'] != action.leader_id:
-            raise HTTPException(status_code=403, detail="Only leader can reject requests")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        current_requests = team.get('join_requests', [])
 
-        if action.target_user_id not in current_requests:
-            raise HTTPException(status_code=404, detail="Request not found")
+# --- 7b. BATCH APPROVE / REJECT ---
+@router.post("/{team_id}/requests:batch", summary="Approve / reject many join requests at once", dependencies=[Depends(upstream_budget(4))])
+async def decide_requests(team_id: str, batch: RequestDecisions):
+    try:
+        # Queued together, so the whole set is applied to one read and flushed with one write
+        outcomes = await team_mutations.submit_many(team_id, [
+            (d.action, {"leader_id": batch.leader_id, "target_user_id": d.user_id}) for d in batch.decisions
+        ])
+        return {
+            "success": True,
+            "results": [
+                item_error(d.user_id, outcome) if isinstance(outcome, Exception) else item_ok(d.user_id, message=outcome)
+                for d, outcome in zip(batch.decisions, outcomes)
+            ]
+        }
 
-        current_requests.remove(action.target_user_id)
-        await _update_team(action.team_id, {"join_requests": current_requests})
-        
-        return {"success": True, "message": "Request rejected"}
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -314,7 +377,7 @@ async def reject_request(action: TeamRequestAction):
 
 
 # --- 8. UPDATE TEAM ---
-@router.put("/{team_id}", summary="Update Team Details")
+@router.put("/{team_id}", summary="Update Team Details", dependencies=[Depends(upstream_budget(2))])
 async def update_team_details(team_id: str, update: TeamUpdate, user_id: str):
     try:
         team = await _get_team(team_id)
@@ -327,6 +390,10 @@ async def update_team_details(team_id: str, update: TeamUpdate, user_id: str):
              return {"success": True, "message": "No changes"}
 
         await _update_team(team_id, data_to_update)
+        team_events.publish({
+            "type": "team_updated", "team_id": team_id, "hackathon_id": team.get('hackathon_id'),
+            "changes": data_to_update
+        })
         return {"success": True, "message": "Team updated"}
     except HTTPException:
         raise
@@ -335,55 +402,73 @@ async def update_team_details(team_id: str, update: TeamUpdate, user_id: str):
 
 
 # --- 10. GET TEAM ---
-@router.get("/{team_id}", summary="Get Team Details")
-async def get_team(team_id: str):
+@router.get("/{team_id}", summary="Get Team Details", dependencies=[Depends(upstream_budget(4))])
+async def get_team(team_id: str, request: Request):
     try:
-        db = get_db_service()
-        users_service = get_users_service()
+        # 0. Client already has the version we last served? No upstream call at all
+        if request.headers.get("if-none-match"):
+            etag = cached_etag(settings.COLLECTION_TEAMS, team_id)
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+
+        # 1. Fetch team (identical concurrent reads share one upstream call)
+        team = await get_document_coalesced(settings.COLLECTION_TEAMS, team_id)
         
-        # 1. Fetch team
+        # 2. Enrich with member / requester names
+        await _enrich_teams([team])
+
+        etag = document_etag(team, _names_digest([team]))
+        remember_etag(settings.COLLECTION_TEAMS, team_id, etag)
+        return conditional_response(request, etag, team)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- 11. TEAM CANDIDATES ---
+@router.get("/{team_id}/candidates", summary="Suggested teammates for a team")
+async def get_team_candidates(team_id: str, limit: int = Param(10, ge=1, le=MAX_PAGE_SIZE)):
+    try:
+        db = get_db_service()
         team = await _get_team(team_id)
-        
-        # 2. Collect user IDs
-        user_ids = set()
-        user_ids.update(team.get('members', []))
-        user_ids.update(team.get('join_requests', []) or [])
-        
-        # 3. Fetch users in parallel
-        user_map = {}
-        if user_ids:
-            async def fetch_user_safe(uid):
-                try:
-                    u = await asyncio.to_thread(users_service.get, uid)
-                    return u
-                except:
-                    return None
-
-            users_data = await asyncio.gather(*[fetch_user_safe(uid) for uid in user_ids])
-            
-            for u in users_data:
-                if u:
-                    user_map[u['$id']] = u['name']
-            
-        # Enrich
-        team.setdefault('leader_id', "")
-        team['members_enriched'] = [
-            {
-                "userId": m_id,
-                "name": user_map.get(m_id, "Unknown User"),
-                "avatar": ""
-            }
-            for m_id in team.get('members', [])
-        ]
-        team['join_requests_enriched'] = [
-            {
-                "userId": r_id,
-                "name": user_map.get(r_id, "Unknown User")
-            }
-            for r_id in (team.get('join_requests') or [])
-        ]
-        
-        return team
+
+        # 1. Everyone in this hackathon's teams is already taken
+        hackathon_teams, profiles = await asyncio.gather(
+            db.list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS,
+                queries=[Query.equal('hackathon_id', team['hackathon_id'])]
+            ),
+            db.list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_USERS,
+                queries=[Query.equal('role', 'participant')]
+            )
+        )
+        taken = set()
+        for t in hackathon_teams:
+            taken.update(t.get('members', []))
+        pool = [p for p in profiles if p['$id'] not in taken]
+
+        # 2. Score the whole pool against this team in one pass
+        scores = batch_match_scores([user_skills(p) for p in pool], [team_requirements(team)])
+        ranked = top_k_matches(scores, limit, axis=0)[0]
+
+        return {
+            "success": True,
+            "candidates": [
+                {
+                    "userId": pool[i]['$id'],
+                    "username": pool[i].get('username'),
+                    "avatar_url": pool[i].get('avatar_url'),
+                    "skills": pool[i].get('skills', []),
+                    "tech_stack": pool[i].get('tech_stack', []),
+                    "match_score": score
+                }
+                for i, score in ranked
+            ]
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -1,61 +1,140 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Query as Param
 from app.services.appwrite import get_db_service, get_users_service
+from app.services.user_directory import get_user_loader, invalidate_user
+from app.services.versions import cached_etag, remember_etag, forget_etag
+from app.services.membership import membership
+from app.services.snapshot_sync import member_snapshots
+from app.services.tag_index import hackathon_index
+from app.services.matching import batch_match_scores, top_k_matches, user_skills, team_requirements
 from app.core.config import settings
+from app.core.upstream import upstream_budget
 from app.models.user import UserResponse, UserUpdate
+from app.utils.member_snapshots import without_snapshots
+from app.utils.etag import document_etag, etag_matches, not_modified, conditional_response
+from app.utils.projection import lean, project
+from app.utils.responses import FastJSONResponse
+from app.utils.batch import parse_ids, item_ok, item_error
 from appwrite.query import Query
+from typing import Optional
 import asyncio
 
 
 router = APIRouter()
 
+# What the "my hackathons" cards show
+HACKATHON_CARD_FIELDS = [
+    '$id',
+    'name',
+    'tagline',
+    'image_url',
+    'start_date',
+    'location',
+    'mode',
+    'prize_pool',
+    'status'
+]
 
-# --- OPTIMIZED: GET USER PROFILE ---
-@router.get("/{user_id}", response_model=UserResponse, summary="Get User Profile")
-async def get_user_profile(user_id: str):
+
+async def _fetch_profile(user_id: str) -> dict:
     """
-    Optimization: Uses asyncio.to_thread instead of ThreadPoolExecutor for better performance
+    Optimization: Native async Appwrite calls run concurrently on the shared connection pool
     """
+    db = get_db_service()
+    users = get_users_service()
+    
     try:
-        db = get_db_service()
-        users = get_users_service()
+        # Run both database queries concurrently using asyncio
+        doc, auth_user = await asyncio.gather(
+            db.get_document(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_USERS,
+                document_id=user_id
+            ),
+            users.get(user_id),
+            return_exceptions=False
+        )
+
+        return _merge_profile(doc, auth_user)
         
-        try:
-            # Run both database queries concurrently using asyncio
-            doc, auth_user = await asyncio.gather(
-                asyncio.to_thread(
-                    db.get_document,
-                    database_id=settings.APPWRITE_DATABASE_ID,
-                    collection_id=settings.COLLECTION_USERS,
-                    document_id=user_id
-                ),
-                asyncio.to_thread(users.get, user_id),
-                return_exceptions=False
-            )
+    except Exception as e:
+        if "404" in str(e):
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _merge_profile(doc: dict, auth_user: dict) -> dict:
+    """Profile document + auth account -> UserResponse fields."""
+    return {
+        "id": doc['$id'],
+        "username": doc.get('username'),
+        "email": auth_user['email'],      
+        "name": auth_user['name'],        
+        "role": doc.get('role', 'participant'), 
+        "bio": doc.get('bio'),
+        "avatar_url": doc.get('avatar_url'),
+        "github_url": doc.get('github_url'),
+        "portfolio_url": doc.get('portfolio_url'),
+        "skills": doc.get('skills', []),
+        "tech_stack": doc.get('tech_stack', []),
+        "xp": doc.get('xp', 0),
+        "reputation_score": doc.get('reputation_score', 0.0),
+        "account_id": doc.get('account_id'),
+        "created_at": doc['$createdAt'],
+        "updated_at": doc['$updatedAt'],
+        # Account version (name / email live there), only used for the ETag
+        "_account_updated_at": auth_user.get('$updatedAt')
+    }
+
+
+# --- BATCH: GET USER PROFILES ---
+@router.get("/", summary="Get many User Profiles", dependencies=[Depends(upstream_budget(2))])
+async def get_user_profiles(ids: str = Param(..., description="Comma-separated user ids (at most 100)")):
+    """
+    One profile-document query + one batched account lookup for the whole set,
+    instead of a GET per avatar. Every id gets its own result or error.
+    """
+    user_ids = parse_ids(ids)
+    try:
+        db = get_db_service()
+        docs, accounts = await asyncio.gather(
+            db.list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_USERS,
+                queries=[Query.equal('$id', user_ids), Query.limit(len(user_ids))]
+            ),
+            get_user_loader().load_many(user_ids)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    by_id = {doc['$id']: doc for doc in docs['documents']}
+    results = []
+    for user_id, account in zip(user_ids, accounts):
+        if user_id not in by_id or not account:
+            results.append(item_error(user_id, HTTPException(status_code=404, detail="User not found")))
+            continue
+        profile = _merge_profile(by_id[user_id], account)
+        profile.pop('_account_updated_at')
+        results.append(item_ok(user_id, data=profile))
+
+    return FastJSONResponse({"success": True, "results": results})
 
-            # Return merged data
-            return {
-                "id": doc['$id'],
-                "username": doc.get('username'),
-                "email": auth_user['email'],      
-                "name": auth_user['name'],        
-                "role": doc.get('role', 'participant'), 
-                "bio": doc.get('bio'),
-                "avatar_url": doc.get('avatar_url'),
-                "github_url": doc.get('github_url'),
-                "portfolio_url": doc.get('portfolio_url'),
-                "skills": doc.get('skills', []),
-                "tech_stack": doc.get('tech_stack', []),
-                "xp": doc.get('xp', 0),
-                "reputation_score": doc.get('reputation_score', 0.0),
-                "account_id": doc.get('account_id'),
-                "created_at": doc['$createdAt'],
-                "updated_at": doc['$updatedAt']
-            }
-            
-        except Exception as e:
-            if "404" in str(e):
-                raise HTTPException(status_code=404, detail="User not found")
-            raise HTTPException(status_code=500, detail=str(e))
+
+# --- OPTIMIZED: GET USER PROFILE ---
+@router.get("/{user_id}", response_model=UserResponse, summary="Get User Profile", dependencies=[Depends(upstream_budget(2))])
+async def get_user_profile(user_id: str, request: Request):
+    try:
+        # Client already has the version we last served? No upstream call at all
+        if request.headers.get("if-none-match"):
+            etag = cached_etag(settings.COLLECTION_USERS, user_id)
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+
+        profile = await _fetch_profile(user_id)
+        # Profile document + account versions
+        etag = document_etag({"$id": profile['id'], "$updatedAt": profile['updated_at']}, profile.pop('_account_updated_at'))
+        remember_etag(settings.COLLECTION_USERS, user_id, etag)
+        return conditional_response(request, etag, profile)
 
     except HTTPException:
         raise
@@ -64,7 +143,7 @@ async def get_user_profile(user_id: str):
 
 
 # --- OPTIMIZED: UPDATE USER PROFILE ---
-@router.put("/{user_id}", response_model=UserResponse, summary="Update User Profile")
+@router.put("/{user_id}", response_model=UserResponse, summary="Update User Profile", dependencies=[Depends(upstream_budget(4))])
 async def update_user_profile(user_id: str, user_update: UserUpdate):
     """
     Optimization: Parallel updates and cleaner error handling
@@ -84,13 +163,12 @@ async def update_user_profile(user_id: str, user_update: UserUpdate):
         
         if name_update:
             tasks.append(
-                asyncio.to_thread(users.update_name, user_id, name_update)
+                users.update_name(user_id, name_update)
             )
         
         if update_data:
             tasks.append(
-                asyncio.to_thread(
-                    db.update_document,
+                db.update_document(
                     database_id=settings.APPWRITE_DATABASE_ID,
                     collection_id=settings.COLLECTION_USERS,
                     document_id=user_id,
@@ -101,9 +179,17 @@ async def update_user_profile(user_id: str, user_update: UserUpdate):
         # Execute all updates concurrently
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Drop the stale display data from the shared cache; teams pick it up in the background
+        if name_update or {'avatar_url', 'skills'} & update_data.keys():
+            invalidate_user(user_id)
+            member_snapshots.notify(user_id)
+        forget_etag(settings.COLLECTION_USERS, user_id)
         
         # Return updated profile
-        return await get_user_profile(user_id)
+        profile = await _fetch_profile(user_id)
+        profile.pop('_account_updated_at')
+        return profile
 
     except HTTPException:
         raise
@@ -112,60 +198,101 @@ async def update_user_profile(user_id: str, user_update: UserUpdate):
 
 
 # --- OPTIMIZED: GET USER'S HACKATHONS ---
-@router.get("/{user_id}/hackathons", summary="Get User's Hackathons")
+@router.get("/{user_id}/hackathons", summary="Get User's Hackathons", dependencies=[Depends(upstream_budget(2))])
 async def get_user_hackathons(user_id: str):
     """
-    Optimization: Eliminated sequential queries - fetches teams and hackathons in parallel
+    Optimization: teams come from the local membership index; hackathon cards from
+    the in-memory hackathon index, with one batched fetch for any it doesn't hold
     """
     try:
         db = get_db_service()
         
-        # Step 1: Fetch user's teams
-        teams_result = await asyncio.to_thread(
-            db.list_documents,
-            database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_TEAMS,
-            queries=[Query.equal('members', user_id)]
-        )
+        # Step 1: User's teams (one member query only while the index is still loading)
+        if membership.ready:
+            teams = membership.teams_of(user_id)
+        else:
+            teams_result = await db.list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS,
+                queries=[Query.equal('members', user_id)]
+            )
+            teams = teams_result['documents']
 
-        if not teams_result['documents']:
+        if not teams:
             return {"success": True, "hackathons": []}
 
         # Step 2: Extract hackathon IDs and create map
-        hackathon_team_map = {team['hackathon_id']: team for team in teams_result['documents']}
-        hackathon_ids = list(hackathon_team_map.keys())
+        hackathon_team_map = {team['hackathon_id']: team for team in teams}
         
-        # Step 3: Fetch hackathon details (already optimized - single query with multiple IDs)
-        hackathons_result = await asyncio.to_thread(
-            db.list_documents,
-            database_id=settings.APPWRITE_DATABASE_ID,
-            collection_id=settings.COLLECTION_HACKATHONS,
-            queries=[
-                Query.equal('$id', hackathon_ids),
-                Query.select([
-                    '$id', 
-                    'name', 
-                    'tagline', 
-                    'image_url', 
-                    'start_date', 
-                    'location', 
-                    'mode', 
-                    'prize_pool', 
-                    'status'
-                ])
-            ]
-        )
+        # Step 3: Hackathon cards, cached first; the rest in a single query with multiple IDs
+        cards = {}
+        for hackathon_id in hackathon_team_map:
+            cached = hackathon_index.get(hackathon_id)
+            if cached is not None:
+                cards[hackathon_id] = project(cached, HACKATHON_CARD_FIELDS)
+
+        missing = [h for h in hackathon_team_map if h not in cards]
+        if missing:
+            hackathons_result = await db.list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS,
+                queries=[
+                    Query.equal('$id', missing),
+                    Query.select(HACKATHON_CARD_FIELDS),
+                    Query.limit(len(missing))
+                ]
+            )
+            cards.update((h['$id'], h) for h in hackathons_result['documents'])
         
         # Step 4: Combine results
         combined_results = [
             {
-                **hackathon,
-                "my_team": hackathon_team_map.get(hackathon['$id'])
+                **cards[hackathon_id],
+                "my_team": without_snapshots([team])[0]
             }
-            for hackathon in hackathons_result['documents']
+            for hackathon_id, team in hackathon_team_map.items()
+            if hackathon_id in cards
         ]
         
         return {"success": True, "hackathons": combined_results}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+
+# --- TEAM SUGGESTIONS ---
+@router.get("/{user_id}/team-suggestions", summary="Best-matching open teams for a user")
+async def get_team_suggestions(user_id: str, hackathon_id: Optional[str] = None, limit: int = Param(10, ge=1, le=100)):
+    try:
+        db = get_db_service()
+
+        team_queries = [Query.equal('status', 'open')]
+        if hackathon_id:
+            team_queries.append(Query.equal('hackathon_id', hackathon_id))
+
+        profile, teams = await asyncio.gather(
+            db.get_document(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_USERS,
+                document_id=user_id
+            ),
+            db.list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS,
+                queries=team_queries
+            )
+        )
+        teams = without_snapshots(lean([t for t in teams if user_id not in t.get('members', [])]))
+
+        # Score this user against every open team in one pass
+        scores = batch_match_scores([user_skills(profile)], [team_requirements(t) for t in teams])
+        ranked = top_k_matches(scores, limit)[0]
+
+        return {
+            "success": True,
+            "teams": [{**teams[i], "match_score": score} for i, score in ranked]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -12,10 +12,98 @@ class Settings:
     APPWRITE_PROJECT_ID: str = os.getenv("APPWRITE_PROJECT_ID")
     APPWRITE_API_KEY: str = os.getenv("APPWRITE_API_KEY")
     APPWRITE_DATABASE_ID: str = os.getenv("APPWRITE_DATABASE_ID")
+
+    # Appwrite HTTP pool
+    APPWRITE_POOL_SIZE: int = int(os.getenv("APPWRITE_POOL_SIZE", "100"))
+    APPWRITE_POOL_KEEPALIVE: float = float(os.getenv("APPWRITE_POOL_KEEPALIVE", "30"))
+    APPWRITE_TIMEOUT: float = float(os.getenv("APPWRITE_TIMEOUT", "10"))
+    APPWRITE_HTTP2: bool = os.getenv("APPWRITE_HTTP2", "false").lower() == "true"
+    # Connections opened at startup and re-touched before keep-alive expiry closes them
+    APPWRITE_WARM_CONNECTIONS: int = int(os.getenv("APPWRITE_WARM_CONNECTIONS", "4"))
+
+    # Appwrite host DNS: cached for APPWRITE_DNS_TTL seconds and refreshed in the background;
+    # IPv4 addresses tried first for that host only (works around broken IPv6 routes on some hosts)
+    APPWRITE_DNS_TTL: float = float(os.getenv("APPWRITE_DNS_TTL", "60"))
+    APPWRITE_PREFER_IPV4: bool = os.getenv("APPWRITE_PREFER_IPV4", "true").lower() == "true"
+
+    # Appwrite call resilience: retries on 429/5xx/network errors with full-jitter backoff
+    # (base * 2^attempt, capped; Retry-After honoured), at most APPWRITE_RETRY_BUDGET extra
+    # attempts per call on average; reads still running at the APPWRITE_HEDGE_PERCENTILE
+    # latency get one duplicate (0 disables); a per-operation circuit opens after
+    # APPWRITE_CIRCUIT_FAILURES failed calls in a row and fails fast for APPWRITE_CIRCUIT_RESET_SECONDS
+    APPWRITE_RETRIES: int = int(os.getenv("APPWRITE_RETRIES", "2"))
+    APPWRITE_BACKOFF_BASE_MS: float = float(os.getenv("APPWRITE_BACKOFF_BASE_MS", "50"))
+    APPWRITE_BACKOFF_MAX_MS: float = float(os.getenv("APPWRITE_BACKOFF_MAX_MS", "2000"))
+    APPWRITE_RETRY_BUDGET: float = float(os.getenv("APPWRITE_RETRY_BUDGET", "0.1"))
+    APPWRITE_HEDGE_PERCENTILE: float = float(os.getenv("APPWRITE_HEDGE_PERCENTILE", "95"))
+    APPWRITE_HEDGE_MIN_MS: float = float(os.getenv("APPWRITE_HEDGE_MIN_MS", "20"))
+    APPWRITE_CIRCUIT_FAILURES: int = int(os.getenv("APPWRITE_CIRCUIT_FAILURES", "5"))
+    APPWRITE_CIRCUIT_RESET_SECONDS: float = float(os.getenv("APPWRITE_CIRCUIT_RESET_SECONDS", "10"))
+
+    # Per-request round-trip budgets: log when exceeded, or fail fast when strict (tests)
+    UPSTREAM_BUDGET_STRICT: bool = os.getenv("UPSTREAM_BUDGET_STRICT", "false").lower() == "true"
     
+    # Cold start: FAST_STARTUP serves before the search snapshot is loaded; STARTUP_PREWARM
+    # opens the Appwrite connection (and loads the AI SDK) before the first request
+    FAST_STARTUP: bool = os.getenv("FAST_STARTUP", "false").lower() == "true"
+    STARTUP_PREWARM: bool = os.getenv("STARTUP_PREWARM", "false").lower() == "true"
+
+    # Readiness probe: background Appwrite check cadence, and when a result counts as stale
+    HEALTH_CHECK_INTERVAL: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+    HEALTH_STALE_AFTER: float = float(os.getenv("HEALTH_STALE_AFTER", "30"))
+
     # Collections
     COLLECTION_HACKATHONS: str = os.getenv("COLLECTION_HACKATHONS")
     COLLECTION_USERS: str = os.getenv("COLLECTION_USERS")
     COLLECTION_TEAMS: str = os.getenv("COLLECTION_TEAMS")
+    COLLECTION_MESSAGES: str = os.getenv("COLLECTION_MESSAGES")
+    COLLECTION_CHAT_READS: str = os.getenv("COLLECTION_CHAT_READS")
+
+    # User display cache
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "300"))
+    USER_LOADER_BATCH_SIZE: int = int(os.getenv("USER_LOADER_BATCH_SIZE", "100"))
+    USER_LOADER_CONCURRENCY: int = int(os.getenv("USER_LOADER_CONCURRENCY", "8"))
+
+    # Conditional GETs: last ETag per document, for 304s without an upstream fetch
+    ETAG_CACHE_SIZE: int = int(os.getenv("ETAG_CACHE_SIZE", "10000"))
+    ETAG_CACHE_TTL: float = float(os.getenv("ETAG_CACHE_TTL", "10"))
+
+    # Hackathon tag index
+    TAG_INDEX_REFRESH_SECONDS: float = float(os.getenv("TAG_INDEX_REFRESH_SECONDS", "300"))
+
+    # Hackathon full-text search (rebuild interval; snapshot loaded at startup, written after each rebuild)
+    SEARCH_INDEX_REFRESH_SECONDS: float = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+    SEARCH_INDEX_SNAPSHOT_PATH: str = os.getenv("SEARCH_INDEX_SNAPSHOT_PATH", "search_index.npz")
+
+    # Live team changes (SSE): per-stream buffer before a slow client is told to resync, keep-alive
+    # comment interval, and a Redis URL so every worker sees every event (empty: this process only)
+    EVENTS_BUFFER: int = int(os.getenv("EVENTS_BUFFER", "64"))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    EVENTS_BROKER_URL: str = os.getenv("EVENTS_BROKER_URL", "")
+
+    # Chat: inserts / read markers are flushed every window as bulk writes (up to CHAT_WRITE_BATCH
+    # per call, CHAT_WRITE_CONCURRENCY calls at once); the newest CHAT_CHANNEL_BUFFER messages of
+    # up to CHAT_MAX_CHANNELS recently used channels are kept in memory
+    CHAT_WRITE_WINDOW_MS: float = float(os.getenv("CHAT_WRITE_WINDOW_MS", "20"))
+    CHAT_WRITE_BATCH: int = int(os.getenv("CHAT_WRITE_BATCH", "100"))
+    CHAT_WRITE_CONCURRENCY: int = int(os.getenv("CHAT_WRITE_CONCURRENCY", "4"))
+    CHAT_CHANNEL_BUFFER: int = int(os.getenv("CHAT_CHANNEL_BUFFER", "200"))
+    CHAT_MAX_CHANNELS: int = int(os.getenv("CHAT_MAX_CHANNELS", "2000"))
+
+    # Team membership write queue (each batch re-reads the team, so several workers can share it)
+    TEAM_WRITE_WINDOW_MS: float = float(os.getenv("TEAM_WRITE_WINDOW_MS", "20"))
+
+    # User -> teams membership index (reconciliation interval against Appwrite)
+    MEMBERSHIP_RECONCILE_SECONDS: float = float(os.getenv("MEMBERSHIP_RECONCILE_SECONDS", "120"))
+
+    # Team-formation optimizer (how long finished job results stay readable)
+    TEAM_FORMATION_JOB_TTL: float = float(os.getenv("TEAM_FORMATION_JOB_TTL", "3600"))
+
+    # AI summaries
+    SUMMARY_MODEL: str = os.getenv("SUMMARY_MODEL", "gemini")  # "gemini" or "stub"
+    SUMMARY_CACHE_PATH: str = os.getenv("SUMMARY_CACHE_PATH", "summaries.sqlite3")
+    SUMMARY_WORKERS: int = int(os.getenv("SUMMARY_WORKERS", "4"))
+    SUMMARY_QUEUE_SIZE: int = int(os.getenv("SUMMARY_QUEUE_SIZE", "1000"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Tiny in-process Prometheus-style metrics (counters, gauges, histograms).
+Recording is a dict lookup plus a bisect, cheap enough to leave on in production;
+rendering to the text exposition format only happens when /metrics is scraped.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import time
+
+Labels = Tuple[str, ...]
+
+INF_LABEL = 'le="+Inf"'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Labels = ()):
+        self._values[labels] = value
+
+
+class GaugeFunc:
+    """Gauge/counter whose value is read from a callback at scrape time (e.g. cache stats)."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], type: str = "gauge"):
+        self.name, self.help, self.fn, self.type = name, help, fn, type
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {self.fn()}"]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_func(self, name: str, help: str, fn: Callable[[], float], type: str = "gauge") -> GaugeFunc:
+        return self.register(GaugeFunc(name, help, fn, type))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- HTTP ---
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP responses by templated route and status code", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by templated route", ("method", "route"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served")
+
+# --- Appwrite ---
+appwrite_request_duration = registry.histogram(
+    "appwrite_request_duration_seconds", "Appwrite call latency by operation", ("operation", "outcome"))
+
+
+def _route_template(scope) -> str:
+    """
+    Templated path of the matched route, e.g. /api/teams/{team_id}.
+    Routers included with a prefix may only report their own path, so the
+    static prefix is taken back from the raw URL.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "<unmatched>"
+    path = scope["path"]
+    keep = path.count("/") - template.count("/") + 1
+    return "/".join(path.split("/")[:keep]) + template
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/stream overhead).
+    Labels by the matched route template, e.g. /api/teams/{team_id}, never the raw URL.
+    """
+
+    def __init__(self, app, on_first_response: Optional[Callable[[], None]] = None):
+        self.app = app
+        # One-shot hook (cold-start timing); dropped after the first request
+        self.on_first_response = on_first_response
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Still exposed so the frontend can see server time
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(time.perf_counter() - start).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            labels = (scope["method"], _route_template(scope))
+            http_request_duration.observe(time.perf_counter() - start, labels)
+            http_requests_total.inc(labels + (str(status),))
+            if self.on_first_response is not None:
+                hook, self.on_first_response = self.on_first_response, None
+                hook()
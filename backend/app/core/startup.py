@@ -0,0 +1,112 @@
+"""
+Cold-start accounting: time to import the app (per router), to finish the
+lifespan start-up and to answer the first request, measured from process start.
+Logged once after the first request, served at /startupz and exported as metrics.
+"""
+from app.core.metrics import registry
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+PrewarmHook = Callable[[], Awaitable[object]]
+
+
+def _process_age() -> float:
+    """Seconds since the OS started this process (Linux), so interpreter start-up counts too."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime is field 22 of the whole line
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTimer:
+    def __init__(self):
+        self._origin = time.perf_counter() - _process_age()
+        self.imports: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+        self.imported_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.first_request_at: Optional[float] = None
+        self._prewarm: List[PrewarmHook] = []
+
+    def now(self) -> float:
+        """Seconds since process start."""
+        return time.perf_counter() - self._origin
+
+    # --- Measurements ---
+    def import_module(self, name: str) -> ModuleType:
+        """Import and time a module; time shared with modules imported earlier is not counted again."""
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.imports[name] = time.perf_counter() - start
+        return module
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def mark_imported(self):
+        self.imported_at = self.now()
+
+    def mark_ready(self):
+        self.ready_at = self.now()
+
+    def mark_request(self):
+        """Called by the metrics middleware once the first response has gone out."""
+        if self.first_request_at is not None:
+            return
+        self.first_request_at = self.now()
+        logger.info("Cold start: %s", self.summary())
+
+    # --- Pre-warm ---
+    def on_prewarm(self, hook: PrewarmHook) -> PrewarmHook:
+        """Register work worth doing before the first request (STARTUP_PREWARM=true)."""
+        self._prewarm.append(hook)
+        return hook
+
+    async def prewarm(self):
+        with self.phase("prewarm"):
+            results = await asyncio.gather(*[hook() for hook in self._prewarm], return_exceptions=True)
+        for hook, result in zip(self._prewarm, results):
+            if isinstance(result, Exception):
+                logger.warning("Pre-warm %s failed: %s", getattr(hook, "__qualname__", hook), result)
+
+    # --- Reporting ---
+    def report(self) -> dict:
+        ms = lambda seconds: None if seconds is None else round(seconds * 1000, 1)
+        return {
+            "imported_ms": ms(self.imported_at),
+            "ready_ms": ms(self.ready_at),
+            "first_request_ms": ms(self.first_request_at),
+            "imports_ms": {name: ms(s) for name, s in sorted(self.imports.items(), key=lambda i: -i[1])},
+            "phases_ms": {name: ms(s) for name, s in self.phases.items()},
+        }
+
+    def summary(self) -> str:
+        r = self.report()
+        slowest = ", ".join(f"{name} {t}ms" for name, t in list(r["imports_ms"].items())[:3])
+        return (f"imported {r['imported_ms']}ms, ready {r['ready_ms']}ms, "
+                f"first request {r['first_request_ms']}ms (slowest imports: {slowest})")
+
+
+startup = StartupTimer()
+
+registry.gauge_func("startup_imported_seconds", "Process start to app imported", lambda: startup.imported_at or 0.0)
+registry.gauge_func("startup_ready_seconds", "Process start to lifespan start-up finished", lambda: startup.ready_at or 0.0)
+registry.gauge_func("startup_first_request_seconds", "Process start to first response", lambda: startup.first_request_at or 0.0)
@@ -0,0 +1,136 @@
+"""
+Per-request accounting of Appwrite round-trips.
+Every call made through AsyncAppwriteClient is recorded into the current
+request's context; totals go out as X-Upstream-* response headers and routes
+can declare a round-trip budget to catch N+1 regressions.
+"""
+from app.core.config import settings
+from contextvars import Context, ContextVar
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamCall(NamedTuple):
+    operation: str
+    collection: Optional[str]
+    latency: float
+    bytes: int
+
+
+class UpstreamBudgetExceeded(RuntimeError):
+    pass
+
+
+class RequestUpstream:
+    __slots__ = ("calls", "budget", "route", "_warned")
+
+    def __init__(self):
+        self.calls: List[UpstreamCall] = []
+        self.budget: Optional[int] = None
+        self.route: Optional[str] = None
+        self._warned = False
+
+    @property
+    def total_time(self) -> float:
+        return sum(c.latency for c in self.calls)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(c.bytes for c in self.calls)
+
+    def summary(self) -> str:
+        return ", ".join(f"{c.operation}({c.collection or '-'}) {c.latency * 1000:.1f}ms" for c in self.calls)
+
+
+_current: ContextVar[Optional[RequestUpstream]] = ContextVar("upstream", default=None)
+
+
+def current() -> Optional[RequestUpstream]:
+    return _current.get()
+
+
+def check_budget(operation: str):
+    """Called before each upstream call; fails fast in strict mode once the budget is spent."""
+    stats = _current.get()
+    if stats is None or stats.budget is None or len(stats.calls) < stats.budget:
+        return
+
+    message = f"Upstream budget of {stats.budget} exceeded on {stats.route} by {operation} (so far: {stats.summary()})"
+    if settings.UPSTREAM_BUDGET_STRICT:
+        raise UpstreamBudgetExceeded(message)
+    if not stats._warned:
+        stats._warned = True
+        logger.warning(message)
+
+
+def record(operation: str, collection: Optional[str], latency: float, nbytes: int):
+    stats = _current.get()
+    if stats is not None:
+        stats.calls.append(UpstreamCall(operation, collection, latency, nbytes))
+
+
+def shared_context() -> Tuple[Context, RequestUpstream]:
+    """
+    Context for work shared by several requests (loader batches, coalesced reads,
+    queued writes). Its calls are collected apart from whichever request started it;
+    each request that waits on the result is then charged with them via `charge`.
+    """
+    stats = RequestUpstream()
+    context = Context()
+    context.run(_current.set, stats)
+    return context, stats
+
+
+def charge(calls: Iterable[UpstreamCall]):
+    """
+    Add calls made by shared work to the current request, once each even when several
+    of its lookups waited on the same batch. No budget check: they already happened.
+    """
+    stats = _current.get()
+    if stats is not None:
+        seen = {id(c) for c in stats.calls}
+        stats.calls.extend(c for c in calls if id(c) not in seen)
+
+
+def upstream_budget(max_calls: int):
+    """
+    Route dependency declaring how many Appwrite round-trips a request may make:
+        @router.get("/", dependencies=[Depends(upstream_budget(2))])
+    """
+    async def _declare():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = max_calls
+    return _declare
+
+
+class UpstreamAccountingMiddleware:
+    """Opens a per-request accounting context and reports totals as X-Upstream-* headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestUpstream()
+        stats.route = scope["path"]
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-upstream-calls", str(len(stats.calls)).encode()))
+                headers.append((b"x-upstream-time", f"{stats.total_time:.6f}".encode()))
+                headers.append((b"x-upstream-bytes", str(stats.total_bytes).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
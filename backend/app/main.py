@@ -1,42 +1,96 @@
-from fastapi import FastAPI, Request
-import socket
+from app.core.startup import startup  # first: the cold-start report times everything below
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
-from app.api.routes import hackathons
-from app.services.appwrite import get_db_service # <--- NEW IMPORT
-from app.api.routes import hackathons, auth, users, teams
-import time
-
-# --- 🚀 FIX: FORCE IPV4 (Paste this at the top) ---
-# This forces Python to ignore IPv6, fixing the 30s timeout on Cloud.
-def force_ipv4():
-    old_getaddrinfo = socket.getaddrinfo
-    def new_getaddrinfo(*args, **kwargs):
-        responses = old_getaddrinfo(*args, **kwargs)
-        return [r for r in responses if r[0] == socket.AF_INET]
-    socket.getaddrinfo = new_getaddrinfo
-
-force_ipv4() # <--- Run it immediately
-
-app = FastAPI(title=settings.PROJECT_NAME)
-# --- 1. PERFORMANCE TIMER (Add This Block) ---
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    
-    # Run the request
-    response = await call_next(request)
-    
-    # Calculate time
-    process_time = time.time() - start_time
-    
-    # Add it to the response headers (so Frontend can see it)
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    # Print to your console
-    print(f"⏱️ API LOG: {request.method} {request.url.path} completed in {process_time:.4f} seconds")
-    
-    return response
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.upstream import UpstreamAccountingMiddleware
+from app.services.appwrite import close_appwrite_client, get_appwrite_client
+from contextlib import asynccontextmanager
+import asyncio
+
+# Routers, timed one by one for the cold-start report
+hackathons = startup.import_module("app.api.routes.hackathons")
+auth = startup.import_module("app.api.routes.auth")
+users = startup.import_module("app.api.routes.users")
+teams = startup.import_module("app.api.routes.teams")
+chat_routes = startup.import_module("app.api.routes.chat")
+
+from app.services.tag_index import hackathon_index
+from app.services.search_index import search_index
+from app.services.summaries import summaries
+from app.services.health import upstream_health
+from app.services.membership import membership
+from app.services.snapshot_sync import member_snapshots
+from app.services.events import team_events
+from app.services.chat import chat
+
+async def _search_restore_then_refresh():
+    # A search may already have built the index on demand; don't swap an older snapshot over it
+    if not search_index.ready:
+        await search_index.restore(settings.SEARCH_INDEX_SNAPSHOT_PATH)
+    await search_index.run_refresh_loop(settings.SEARCH_INDEX_REFRESH_SECONDS, settings.SEARCH_INDEX_SNAPSHOT_PATH)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # IPv4-first, cached DNS for the Appwrite host only (see app/services/dns.py)
+    appwrite = get_appwrite_client()
+    dns = [asyncio.create_task(appwrite.resolver.run_refresh_loop())] if appwrite.resolver is not None else []
+
+    if settings.FAST_STARTUP:
+        # Serve straight away; search falls back to building on first use until the snapshot is in
+        search = asyncio.create_task(_search_restore_then_refresh())
+    else:
+        # Searchable straight away from the last snapshot; the refresh loop catches up
+        with startup.phase("search_snapshot"):
+            await search_index.restore(settings.SEARCH_INDEX_SNAPSHOT_PATH)
+        search = asyncio.create_task(search_index.run_refresh_loop(
+            settings.SEARCH_INDEX_REFRESH_SECONDS, settings.SEARCH_INDEX_SNAPSHOT_PATH))
+
+    # Background jobs live for the lifetime of the app
+    background = dns + [
+        search,
+        asyncio.create_task(hackathon_index.run_refresh_loop(settings.TAG_INDEX_REFRESH_SECONDS)),
+        asyncio.create_task(upstream_health.run_check_loop(settings.HEALTH_CHECK_INTERVAL)),
+        asyncio.create_task(membership.run_refresh_loop(settings.MEMBERSHIP_RECONCILE_SECONDS)),
+    ]
+    if settings.APPWRITE_WARM_CONNECTIONS > 0:
+        warm = appwrite.warm(settings.APPWRITE_WARM_CONNECTIONS)
+        if settings.FAST_STARTUP:
+            background.append(asyncio.create_task(warm))
+        else:
+            # The first requests after a deploy reuse these instead of each paying DNS + TLS
+            with startup.phase("warm_connections"):
+                await warm
+        background.append(asyncio.create_task(appwrite.run_keep_warm_loop(
+            settings.APPWRITE_WARM_CONNECTIONS, settings.APPWRITE_POOL_KEEPALIVE / 2)))
+    await team_events.start()
+    await chat.start()
+    await summaries.start()
+    await member_snapshots.start()
+    if settings.STARTUP_PREWARM:
+        await startup.prewarm()
+    startup.mark_ready()
+    yield
+    await member_snapshots.stop()
+    await summaries.stop()
+    await team_events.stop()
+    # Flushes messages / read markers still waiting for their bulk write
+    await chat.stop()
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    # Keep hackathons created since the last rebuild for the next start
+    await search_index.persist(settings.SEARCH_INDEX_SNAPSHOT_PATH)
+    # Drain the shared Appwrite connection pool
+    await close_appwrite_client()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+# --- 1. PERFORMANCE METRICS ---
+# Per-route latency histograms / status counters (monotonic clock, no console I/O)
+app.add_middleware(MetricsMiddleware, on_first_response=startup.mark_request)
+# Appwrite round-trips per request -> X-Upstream-Calls / X-Upstream-Time headers
+app.add_middleware(UpstreamAccountingMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -45,29 +99,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 @app.get("/")
-def read_root():
-    status = "Checking..."
-    try:
-        # CORRECT METHOD: list_documents (Plural)
-        get_db_service().list_documents(
-            database_id=settings.APPWRITE_DATABASE_ID, 
-            collection_id=settings.COLLECTION_HACKATHONS
-        )
+async def read_root():
+    # Served from the background readiness check, never a live upstream call
+    if upstream_health.checked_at is None:
+        status = "Checking..."
+    elif upstream_health.ok:
         status = "✅ Connected to Appwrite"
-    except Exception as e:
-        status = f"❌ Connection Failed: {str(e)}"
+    else:
+        status = f"❌ Connection Failed: {upstream_health.error}"
 
     return {
         "status": status,
         "docs": "http://localhost:8000/docs"
     }
 
+@app.get("/healthz", include_in_schema=False)
+async def liveness():
+    # Process is up and serving; says nothing about Appwrite
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readiness():
+    snapshot = upstream_health.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+@app.get("/startupz", include_in_schema=False)
+async def startup_report():
+    # Cold-start timings: import per router, lifespan phases, time to first request
+    return startup.report()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Register Routes
 app.include_router(hackathons.router, prefix="/api/hackathons", tags=["Hackathons"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(teams.router, prefix="/api/teams", tags=["Teams"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(chat_routes.router, prefix="/api/chat", tags=["Chat"])
 
+startup.mark_imported()
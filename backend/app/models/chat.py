@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+# --- SEND INPUT ---
+class MessageCreate(BaseModel):
+    sender_id: str
+    content: str = Field(..., min_length=1, max_length=1000)  # Matches messages.content size
+    type: Literal["text", "image", "file"] = "text"
+    reply_to: Optional[str] = None
+
+# --- READ RECEIPT INPUT ---
+class ReadReceipt(BaseModel):
+    user_id: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -33,4 +33,35 @@ class HackathonResponse(HackathonBase):
 
     class Config:
         # This tells Pydantic to ignore extra data if Appwrite sends more than we need
-        extra = "ignore"
\ No newline at end of file
+        extra = "ignore"
+
+# 4. LIST ITEM: What list endpoints send back
+# (Raw Appwrite attributes minus its internal bookkeeping. Everything except $id
+#  is optional because `?fields=` can project any subset.)
+class HackathonListItem(BaseModel):
+    id: str = Field(alias="$id")
+    created_at: Optional[str] = Field(None, alias="$createdAt")
+    updated_at: Optional[str] = Field(None, alias="$updatedAt")
+    name: Optional[str] = None
+    tagline: Optional[str] = None
+    description: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    location: Optional[str] = None
+    mode: Optional[str] = None
+    tags: Optional[List[str]] = None
+    status: Optional[str] = None
+    image_url: Optional[str] = None
+    prize_pool: Optional[str] = None
+    organizer_id: Optional[str] = None
+    registration_link: Optional[str] = None
+    min_team_size: Optional[int] = None
+    max_team_size: Optional[int] = None
+
+class HackathonListResponse(BaseModel):
+    success: bool
+    documents: List[HackathonListItem]
+    next_cursor: Optional[str] = None
+
+# Attributes `?fields=` may select
+HACKATHON_FIELDS = tuple(HackathonBase.model_fields)
@@ -19,4 +19,43 @@ class TeamCreate(TeamBase):
 
 class TeamResponse(TeamBase):
     id: str
-    created_at: str
\ No newline at end of file
+    created_at: str
+
+# --- LIST OUTPUT (lean: raw Appwrite attributes, projectable via `?fields=`) ---
+class TeamListItem(BaseModel):
+    id: str = Field(alias="$id")
+    created_at: Optional[str] = Field(None, alias="$createdAt")
+    updated_at: Optional[str] = Field(None, alias="$updatedAt")
+    hackathon_id: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    leader_id: Optional[str] = None
+    members: Optional[List[str]] = None
+    join_requests: Optional[List[str]] = None
+    looking_for: Optional[List[str]] = None
+    tech_stack: Optional[List[str]] = None
+    status: Optional[str] = None
+    project_repo: Optional[str] = None
+
+class MemberRef(BaseModel):
+    userId: str
+    name: str
+    avatar: Optional[str] = None
+    skills: List[str] = []
+
+class EnrichedTeamListItem(TeamListItem):
+    members_enriched: List[MemberRef] = []
+    join_requests_enriched: List[MemberRef] = []
+
+class TeamListResponse(BaseModel):
+    total: int
+    documents: List[EnrichedTeamListItem]
+    next_cursor: Optional[str] = None
+
+class HackathonTeamsResponse(BaseModel):
+    success: bool
+    teams: List[TeamListItem]
+    next_cursor: Optional[str] = None
+
+# Attributes `?fields=` may select
+TEAM_FIELDS = tuple(TeamBase.model_fields)
@@ -1,28 +1,333 @@
-from appwrite.client import Client
-from appwrite.services.databases import Databases
-from appwrite.services.users import Users
+import httpcore
+import httpx
+from appwrite.exception import AppwriteException
+from appwrite.query import Query
 from app.core.config import settings
+from app.core.metrics import appwrite_request_duration, registry
+from app.core import upstream
+from app.services.dns import CachedResolver, ScopedResolverBackend, appwrite_dns
+from app.services.resilience import CIRCUIT_OPEN, Resilience, resilience as default_resilience
 from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _flatten(data, prefix: str = "") -> List[tuple]:
+    """Flatten nested params into Appwrite's `key[0]=...` query-string form."""
+    output = []
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        final_key = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, (list, dict)):
+            output.extend(_flatten(value, final_key))
+        elif isinstance(value, bool):
+            output.append((final_key, "true" if value else "false"))
+        else:
+            output.append((final_key, value))
+    return output
+
+
+def _collection_of(path: str) -> Optional[str]:
+    if "/collections/" not in path:
+        return None
+    return path.split("/collections/", 1)[1].split("/", 1)[0]
+
+
+class _ResolvingTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connections to the Appwrite host use the cached resolver."""
+
+    def __init__(self, resolver: CachedResolver, limits: httpx.Limits, http2: bool):
+        # httpx has no network-backend option, so skip its __init__ (which would build a pool
+        # of its own) and build the one pool with httpx's default settings plus our backend
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=ScopedResolverBackend(resolver),
+        )
+
+    @property
+    def connections(self) -> int:
+        return len(self._pool.connections)
+
+
+class AsyncAppwriteClient:
+    """
+    Native asyncio Appwrite client.
+    One shared httpx pool (keep-alive, optional HTTP/2) is reused by every request,
+    so upstream calls never hop onto a thread or pay a fresh TLS handshake.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        project: str,
+        key: str,
+        pool_size: int = 100,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        resolver: Optional[CachedResolver] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        self._endpoint = (endpoint or "").rstrip("/")
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Without an explicit transport, the endpoint host is resolved through `resolver`
+        self.resolver = resolver if transport is None else None
+        if self.resolver is not None:
+            transport = _ResolvingTransport(self.resolver, limits, http2)
+        self._transport = transport
+        self.warm_connections = 0
+        # Retries, hedged reads and circuit breakers (None: every call is a single attempt)
+        self.resilience = resilience
+        self._http = httpx.AsyncClient(
+            base_url=self._endpoint,
+            headers={
+                "x-appwrite-project": project or "",
+                "x-appwrite-key": key or "",
+                "accept": "application/json",
+            },
+            limits=limits,
+            timeout=timeout,
+            http2=http2,
+            transport=transport,
+        )
+
+    async def call(self, method: str, path: str, params: Optional[Dict[str, Any]] = None, operation: str = "call") -> Any:
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+
+        upstream.check_budget(operation)
+        start = time.perf_counter()
+        outcome = "error"
+        nbytes = 0
+        if method == "get":
+            send = lambda: self._http.request(method, path, params=_flatten(params))
+        else:
+            send = lambda: self._http.request(method, path, json=params)
+        try:
+            # Budget and accounting are per logical call; retries / hedges are counted separately
+            response = await (self.resilience.run(operation, method, send) if self.resilience else send())
+            outcome = "ok" if not response.is_error else str(response.status_code)
+            nbytes = len(response.content)
+        except httpx.HTTPError as e:
+            raise AppwriteException(str(e))
+        finally:
+            latency = time.perf_counter() - start
+            appwrite_request_duration.observe(latency, (operation, outcome))
+            upstream.record(operation, _collection_of(path), latency, nbytes)
+
+        content_type = response.headers.get("content-type", "")
+        if response.is_error:
+            if content_type.startswith("application/json"):
+                body = response.json()
+                raise AppwriteException(body.get("message"), response.status_code, body.get("type"), response.text)
+            raise AppwriteException(response.text, response.status_code, None, response.text)
+
+        if content_type.startswith("application/json"):
+            return response.json()
+        return response.content
+
+    @property
+    def connections(self) -> int:
+        """Open connections in the pool (0 when a custom transport is in use)."""
+        return self._transport.connections if isinstance(self._transport, _ResolvingTransport) else 0
+
+    async def warm(self, connections: int) -> int:
+        """
+        Open up to `connections` keep-alive connections at once (one cheap public call
+        each, concurrently), so the first requests after a deploy find DNS, TCP and TLS
+        already done. With HTTP/2 they share one connection. Returns how many answered.
+        """
+        results = await asyncio.gather(*[
+            self.call("get", "/health/version", operation="health.version") for _ in range(connections)
+        ], return_exceptions=True)
+        # An error status still came back over a live connection; network failures, circuit-open
+        # rejections (nothing sent) and any other exception don't count
+        answered = sum(1 for r in results if not isinstance(r, BaseException) or (
+            isinstance(r, AppwriteException) and r.code is not None and r.type != CIRCUIT_OPEN))
+        self.warm_connections = answered
+        if answered < connections:
+            logger.warning("Warmed %d of %d Appwrite connections", answered, connections)
+        return answered
+
+    async def run_keep_warm_loop(self, connections: int, interval: float):
+        """Re-touch the warm connections before keep-alive expiry closes them (started from the app lifespan)."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.warm(connections)
+            except Exception:
+                logger.exception("Keeping Appwrite connections warm failed")
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+class AsyncDatabases:
+    """Async drop-in for the SDK `Databases` calls the backend uses."""
+
+    def __init__(self, client: AsyncAppwriteClient):
+        self.client = client
+
+    @staticmethod
+    def _path(database_id: str, collection_id: str, document_id: Optional[str] = None) -> str:
+        path = f"/databases/{database_id}/collections/{collection_id}/documents"
+        return f"{path}/{document_id}" if document_id else path
+
+    async def list_documents(self, database_id: str, collection_id: str, queries: Optional[List[str]] = None) -> dict:
+        return await self.client.call("get", self._path(database_id, collection_id), {"queries": queries}, "databases.list_documents")
+
+    async def iter_document_pages(
+        self,
+        database_id: str,
+        collection_id: str,
+        queries: Optional[List[str]] = None,
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[List[dict]]:
+        """Yield pages of documents, following `cursorAfter` until the collection is exhausted."""
+        while True:
+            page_queries = list(queries or []) + [Query.limit(page_size)]
+            if cursor:
+                page_queries.append(Query.cursor_after(cursor))
+
+            result = await self.list_documents(database_id, collection_id, queries=page_queries)
+            documents = result['documents']
+            if documents:
+                yield documents
+            if len(documents) < page_size:
+                return
+            cursor = documents[-1]['$id']
+
+    async def iter_documents(self, database_id: str, collection_id: str, queries: Optional[List[str]] = None, page_size: int = 100) -> AsyncIterator[dict]:
+        async for page in self.iter_document_pages(database_id, collection_id, queries, page_size):
+            for doc in page:
+                yield doc
+
+    async def list_all_documents(self, database_id: str, collection_id: str, queries: Optional[List[str]] = None, page_size: int = 100) -> List[dict]:
+        return [doc async for doc in self.iter_documents(database_id, collection_id, queries, page_size)]
+
+    async def get_document(self, database_id: str, collection_id: str, document_id: str, queries: Optional[List[str]] = None) -> dict:
+        return await self.client.call("get", self._path(database_id, collection_id, document_id), {"queries": queries}, "databases.get_document")
+
+    async def create_document(self, database_id: str, collection_id: str, document_id: str, data: dict, permissions: Optional[List[str]] = None) -> dict:
+        return await self.client.call("post", self._path(database_id, collection_id), {
+            "documentId": document_id,
+            "data": data,
+            "permissions": permissions,
+        }, "databases.create_document")
+
+    async def create_documents(self, database_id: str, collection_id: str, documents: List[dict]) -> dict:
+        """Bulk insert (Appwrite 1.7+): each document carries its own `$id`."""
+        return await self.client.call("post", self._path(database_id, collection_id), {
+            "documents": documents,
+        }, "databases.create_documents")
+
+    async def upsert_documents(self, database_id: str, collection_id: str, documents: List[dict]) -> dict:
+        """Bulk create-or-replace by `$id` (Appwrite 1.7+)."""
+        return await self.client.call("put", self._path(database_id, collection_id), {
+            "documents": documents,
+        }, "databases.upsert_documents")
+
+    async def update_document(self, database_id: str, collection_id: str, document_id: str, data: Optional[dict] = None, permissions: Optional[List[str]] = None) -> dict:
+        return await self.client.call("patch", self._path(database_id, collection_id, document_id), {
+            "data": data,
+            "permissions": permissions,
+        }, "databases.update_document")
+
+    async def delete_document(self, database_id: str, collection_id: str, document_id: str):
+        return await self.client.call("delete", self._path(database_id, collection_id, document_id), operation="databases.delete_document")
+
+
+class AsyncUsers:
+    """Async drop-in for the SDK `Users` calls the backend uses."""
+
+    def __init__(self, client: AsyncAppwriteClient):
+        self.client = client
+
+    async def get(self, user_id: str) -> dict:
+        return await self.client.call("get", f"/users/{user_id}", operation="users.get")
+
+    async def list(self, queries: Optional[List[str]] = None, search: Optional[str] = None) -> dict:
+        return await self.client.call("get", "/users", {"queries": queries, "search": search}, "users.list")
+
+    async def create(self, user_id: str, email: Optional[str] = None, phone: Optional[str] = None, password: Optional[str] = None, name: Optional[str] = None) -> dict:
+        return await self.client.call("post", "/users", {
+            "userId": user_id,
+            "email": email,
+            "phone": phone,
+            "password": password,
+            "name": name,
+        }, "users.create")
+
+    async def update_name(self, user_id: str, name: str) -> dict:
+        return await self.client.call("patch", f"/users/{user_id}/name", {"name": name}, "users.update_name")
+
+    async def update_password(self, user_id: str, password: str) -> dict:
+        return await self.client.call("patch", f"/users/{user_id}/password", {"password": password}, "users.update_password")
+
+
+# Replaces the network for every client built afterwards (tests / benchmarks use an in-process fake)
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def use_transport(transport: Optional[httpx.AsyncBaseTransport]):
+    global _transport
+    _transport = transport
+    get_appwrite_client.cache_clear()
+    get_db_service.cache_clear()
+    get_users_service.cache_clear()
+
 
 @lru_cache()
-def get_appwrite_client():
-    client = Client()
-    client.set_endpoint(settings.APPWRITE_ENDPOINT)
-    client.set_project(settings.APPWRITE_PROJECT_ID)
-    client.set_key(settings.APPWRITE_API_KEY)
-    
-    # ⚡ OPTIMIZATION TIP: 
-    # If using Cloud, try setting this to True temporarily to see if it speeds up the handshake.
-    # client.set_self_signed(True) 
-    
-    return client
+def get_appwrite_client() -> AsyncAppwriteClient:
+    # ⚡ One pool for the whole process, sized via APPWRITE_POOL_SIZE
+    return AsyncAppwriteClient(
+        endpoint=settings.APPWRITE_ENDPOINT,
+        project=settings.APPWRITE_PROJECT_ID,
+        key=settings.APPWRITE_API_KEY,
+        pool_size=settings.APPWRITE_POOL_SIZE,
+        keepalive_expiry=settings.APPWRITE_POOL_KEEPALIVE,
+        timeout=settings.APPWRITE_TIMEOUT,
+        http2=settings.APPWRITE_HTTP2,
+        transport=_transport,
+        resolver=appwrite_dns,
+        resilience=default_resilience,
+    )
 
 @lru_cache()
-def get_db_service():
+def get_db_service() -> AsyncDatabases:
     client = get_appwrite_client()
-    return Databases(client)
+    return AsyncDatabases(client)
 
 @lru_cache()
-def get_users_service():
+def get_users_service() -> AsyncUsers:
     client = get_appwrite_client()
-    return Users(client)
\ No newline at end of file
+    return AsyncUsers(client)
+
+
+async def close_appwrite_client():
+    """Drain the shared pool (called on app shutdown)."""
+    if get_appwrite_client.cache_info().currsize:
+        await get_appwrite_client().aclose()
+    get_appwrite_client.cache_clear()
+    get_db_service.cache_clear()
+    get_users_service.cache_clear()
+
+
+registry.gauge_func("appwrite_pool_connections", "Open connections in the Appwrite pool",
+                    lambda: get_appwrite_client().connections if get_appwrite_client.cache_info().currsize else 0)
+registry.gauge_func("appwrite_warm_connections", "Appwrite connections answered by the last warm-up",
+                    lambda: get_appwrite_client().warm_connections if get_appwrite_client.cache_info().currsize else 0)
@@ -0,0 +1,421 @@
+from app.core import upstream
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from app.services.cache import TTLCache
+from app.services.events import EventBus, make_broker
+from appwrite.query import Query
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from fastapi import HTTPException
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import orjson
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+_NODE = secrets.token_hex(3)
+_last_us = 0
+
+
+def message_id() -> str:
+    """
+    Time-ordered id (microseconds, then a per-process suffix): sorting by `$id` is
+    sorting by send time, so history pages are keyset reads on the primary key.
+    """
+    global _last_us
+    _last_us = max(time.time_ns() // 1000, _last_us + 1)
+    return f"{_last_us:014x}{_NODE}"
+
+
+def chat_topic(channel_id: str) -> str:
+    return f"chat:{channel_id}"
+
+
+def marker_id(channel_id: str, user_id: str) -> str:
+    return hashlib.sha1(f"{channel_id}|{user_id}".encode()).hexdigest()[:32]
+
+
+def to_message(doc: dict) -> dict:
+    """Appwrite document -> the frontend `Message` shape (sender name / avatar are added on read)."""
+    return {
+        "id": doc['$id'],
+        "channelId": doc['channel_id'],
+        "senderId": doc['sender_id'],
+        "content": doc['content'],
+        "type": doc.get('type') or "text",
+        "replyTo": doc.get('reply_to'),
+        "isEdited": False,
+        "createdAt": doc.get('$createdAt'),
+    }
+
+
+class ChannelLog:
+    """
+    Newest `capacity` messages of one channel (oldest first) and its message count.
+    `complete` means nothing older exists, so any page can be served from memory.
+    """
+
+    __slots__ = ("capacity", "messages", "_ids", "total", "complete")
+
+    def __init__(self, capacity: int, messages: List[dict], total: int):
+        self.capacity = capacity
+        self.messages = messages
+        self._ids = [m['id'] for m in messages]
+        self.total = total
+        self.complete = total <= len(messages)
+
+    @property
+    def newest_id(self) -> Optional[str]:
+        return self._ids[-1] if self._ids else None
+
+    def add(self, message: dict) -> bool:
+        """Insert in id order; False if it is already here."""
+        i = bisect_left(self._ids, message['id'])
+        if i < len(self._ids) and self._ids[i] == message['id']:
+            return False
+        self.total += 1
+        if i == 0 and not self.complete and len(self._ids) >= self.capacity:
+            return True  # Older than everything kept: counted, not stored
+        self._ids.insert(i, message['id'])
+        self.messages.insert(i, message)
+        if len(self._ids) > self.capacity:
+            del self._ids[0], self.messages[0]
+            self.complete = False
+        return True
+
+    def newer_than(self, last_read_id: Optional[str]) -> Tuple[int, bool]:
+        """
+        How many messages are newer than `last_read_id`, and whether that is exact. Memory
+        holds the newest messages, so it is exact unless the reader is behind all of them
+        (then it is "at least this many").
+        """
+        start = bisect_right(self._ids, last_read_id) if last_read_id is not None else 0
+        return len(self._ids) - start, start > 0 or self.complete
+
+    def page(self, before: Optional[str], limit: int) -> Optional[List[dict]]:
+        """Up to `limit` messages older than `before` (newest first), or None if memory can't answer."""
+        if before is None:
+            end = len(self._ids)
+        else:
+            end = bisect_left(self._ids, before)
+            if end == len(self._ids) or self._ids[end] != before:
+                return None
+        start = max(0, end - limit)
+        if end - start < limit and not self.complete:
+            return None
+        return self.messages[start:end][::-1]
+
+
+class ChatWriter:
+    """
+    Buffers message inserts and read-marker upserts, then flushes each window as
+    bulk calls (up to `batch_size` documents each, `concurrency` at once). A sender
+    waits for the flush its message is in, so an acknowledged message is stored.
+    Markers that fail to save are kept and retried after a backoff that doubles from
+    `retry_base` up to `retry_max` seconds while Appwrite keeps failing.
+    """
+
+    def __init__(self, window: float, batch_size: int, concurrency: int,
+                 retry_base: float = 1.0, retry_max: float = 30.0):
+        self.window = window
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._marker_failures = 0
+        self._retry: Optional[asyncio.TimerHandle] = None
+        self._messages: List[Tuple[dict, asyncio.Future]] = []
+        self._markers: Dict[str, dict] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Future] = None
+        self.batches = 0
+        self.written = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._messages) + len(self._markers)
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            # A flush already under way finishes (its senders get their answer), then
+            # whatever was still queued gets written
+            if self._flushing is not None:
+                await asyncio.gather(self._flushing, return_exceptions=True)
+            await self._flush()
+
+    async def insert(self, doc: dict) -> dict:
+        if self._task is None:
+            raise HTTPException(status_code=503, detail="Chat is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._messages.append((doc, future))
+        self._wake.set()
+        return await future
+
+    def save_marker(self, doc: dict):
+        """Queue a read-marker upsert; a newer marker for the same channel / user replaces it."""
+        self._markers[doc['$id']] = doc
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # Let the burst pile up, then write everything queued so far
+            await asyncio.sleep(self.window)
+            # Shielded: stopping must not drop the batch mid-write
+            self._flushing = asyncio.ensure_future(self._flush())
+            await asyncio.shield(self._flushing)
+
+    async def _flush(self):
+        messages, self._messages = self._messages, []
+        markers, self._markers = list(self._markers.values()), {}
+        n = self.batch_size
+        await asyncio.gather(
+            *[self._write_messages(messages[i:i + n]) for i in range(0, len(messages), n)],
+            *[self._write_markers(markers[i:i + n]) for i in range(0, len(markers), n)],
+        )
+
+    async def _write_messages(self, batch: List[Tuple[dict, asyncio.Future]]):
+        async with self._slots:
+            self.batches += 1
+            try:
+                result = await get_db_service().create_documents(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_MESSAGES,
+                    documents=[doc for doc, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(HTTPException(status_code=500, detail=str(e)))
+                return
+        created = {d['$id']: d for d in result['documents']}
+        self.written += len(batch)
+        for doc, future in batch:
+            if not future.done():
+                future.set_result(created.get(doc['$id'], doc))
+
+    async def _write_markers(self, batch: List[dict]):
+        async with self._slots:
+            self.batches += 1
+            try:
+                await get_db_service().upsert_documents(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_CHAT_READS,
+                    documents=batch
+                )
+            except Exception:
+                self._marker_failed(batch)
+                return
+        if self._marker_failures:
+            logger.info("Saving chat read markers recovered after %d failed attempts", self._marker_failures)
+            self._marker_failures = 0
+
+    def _marker_failed(self, batch: List[dict]):
+        # Logged once per outage; the markers wait for a backoff (or the next write's flush)
+        if not self._marker_failures:
+            logger.exception("Saving %d chat read markers failed; retrying with backoff", len(batch))
+        self._marker_failures += 1
+        for doc in batch:
+            self._markers.setdefault(doc['$id'], doc)
+        if self._retry is None and self._task is not None:
+            delay = min(self.retry_max, self.retry_base * 2 ** (self._marker_failures - 1))
+            self._retry = asyncio.get_running_loop().call_later(delay, self._retry_markers)
+
+    def _retry_markers(self):
+        self._retry = None
+        self._wake.set()
+
+
+class ChatService:
+    """
+    Append-only channels. Recent messages live in memory (bounded per channel and in
+    channel count); every delivered message, from this worker or another, updates them.
+    Message ids are time-ordered, so an unread count is the number of kept messages
+    newer than the reader's marker; past the per-channel buffer the badge is capped.
+    """
+
+    def __init__(self, capacity: int, max_channels: int, writer: ChatWriter, events: EventBus):
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.writer = writer
+        self.events = events
+        self._channels: "OrderedDict[str, ChannelLog]" = OrderedDict()
+        self._loads: Dict[str, Tuple[asyncio.Task, upstream.RequestUpstream]] = {}
+        self._arrived_during_load: Dict[str, List[dict]] = {}
+        self._markers = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+        self.served_from_memory = 0
+        events.listen(self._on_deliver)
+
+    @property
+    def channels(self) -> int:
+        return len(self._channels)
+
+    async def start(self):
+        await self.events.start()
+        await self.writer.start()
+
+    async def stop(self):
+        await self.writer.stop()
+        await self.events.stop()
+
+    # --- Channel state ---
+    async def channel(self, channel_id: str) -> ChannelLog:
+        log = self._channels.get(channel_id)
+        if log is not None:
+            self._channels.move_to_end(channel_id)
+            return log
+        entry = self._loads.get(channel_id)
+        if entry is None:
+            # Shared by everyone opening the channel: charged to each of them, not just the first
+            context, stats = upstream.shared_context()
+            load = asyncio.get_running_loop().create_task(self._load(channel_id), context=context)
+            entry = self._loads[channel_id] = (load, stats)
+        load, stats = entry
+        try:
+            return await asyncio.shield(load)
+        finally:
+            upstream.charge(stats.calls)
+
+    async def _load(self, channel_id: str) -> ChannelLog:
+        self._arrived_during_load[channel_id] = []
+        try:
+            result = await get_db_service().list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_MESSAGES,
+                queries=[Query.equal('channel_id', channel_id), Query.order_desc('$id'), Query.limit(self.capacity)]
+            )
+            log = ChannelLog(self.capacity, [to_message(d) for d in reversed(result['documents'])], result['total'])
+            # Keep anything delivered while the read was in flight
+            for message in self._arrived_during_load[channel_id]:
+                log.add(message)
+
+            self._channels[channel_id] = log
+            while len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+            return log
+        finally:
+            self._arrived_during_load.pop(channel_id, None)
+            self._loads.pop(channel_id, None)
+
+    def _on_deliver(self, topics: List[str], payload: bytes):
+        if not topics[0].startswith("chat:"):
+            return
+        event = orjson.loads(payload)
+        message = {k: v for k, v in event['message'].items() if k not in ("senderName", "senderAvatar")}
+        channel_id = message['channelId']
+        if channel_id in self._channels:
+            self._channels[channel_id].add(message)
+        elif channel_id in self._arrived_during_load:
+            self._arrived_during_load[channel_id].append(message)
+
+    # --- Messages ---
+    async def append(self, channel_id: str, sender_id: str, content: str, kind: str = "text",
+                     reply_to: Optional[str] = None, card: Optional[dict] = None) -> dict:
+        """Store one message (batched with everyone else's), then push it to the channel's followers."""
+        doc = {"$id": message_id(), "channel_id": channel_id, "sender_id": sender_id, "content": content, "type": kind}
+        if reply_to:
+            doc["reply_to"] = reply_to
+        message = to_message(await self.writer.insert(doc))
+        card = card or {}
+        message.update(senderName=card.get('name', "Unknown User"), senderAvatar=card.get('avatar') or None)
+        self.events.publish_to([chat_topic(channel_id)], {"type": "message", "channel_id": channel_id, "message": message})
+        return message
+
+    async def history(self, channel_id: str, before: Optional[str], limit: int) -> List[dict]:
+        """Messages older than `before` (newest first): from memory when it holds the page, else one keyset read."""
+        log = await self.channel(channel_id)
+        page = log.page(before, limit)
+        if page is not None:
+            self.served_from_memory += 1
+            return [dict(m) for m in page]
+
+        queries = [Query.equal('channel_id', channel_id), Query.order_desc('$id'), Query.limit(limit)]
+        if before:
+            queries.append(Query.cursor_after(before))
+        result = await get_db_service().list_documents(
+            database_id=settings.APPWRITE_DATABASE_ID,
+            collection_id=settings.COLLECTION_MESSAGES,
+            queries=queries
+        )
+        return [to_message(d) for d in result['documents']]
+
+    # --- Read markers / unread counts ---
+    async def markers_of(self, user_id: str) -> Dict[str, dict]:
+        """channel id -> {"last_read_id"} for every channel the user has read."""
+        markers = self._markers.get(user_id)
+        if markers is None:
+            docs = await get_db_service().list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_CHAT_READS,
+                queries=[Query.equal('user_id', user_id)]
+            )
+            markers = {d['channel_id']: {"last_read_id": d.get('last_read_id')} for d in docs}
+            self._markers.set(user_id, markers)
+        return markers
+
+    def _save_marker(self, markers: Dict[str, dict], channel_id: str, user_id: str, last_read_id: Optional[str]):
+        markers[channel_id] = {"last_read_id": last_read_id}
+        self.writer.save_marker({
+            "$id": marker_id(channel_id, user_id), "channel_id": channel_id, "user_id": user_id,
+            "last_read_id": last_read_id
+        })
+
+    async def mark_read(self, channel_id: str, user_id: str, up_to: Optional[str] = None):
+        """
+        Everything up to the newest message seen here, or `up_to` (e.g. the sender's own
+        message, which may not have come back through the broker yet) if that is newer.
+        """
+        log, markers = await asyncio.gather(self.channel(channel_id), self.markers_of(user_id))
+        last_read_id = max(filter(None, (log.newest_id, up_to, (markers.get(channel_id) or {}).get('last_read_id'))), default=None)
+        self._save_marker(markers, channel_id, user_id, last_read_id)
+
+    async def follow(self, channel_id: str, user_id: str):
+        """Give a user a marker (everything unread) so the channel shows in their list, e.g. a new DM."""
+        markers = await self.markers_of(user_id)
+        if channel_id not in markers:
+            self._save_marker(markers, channel_id, user_id, None)
+
+    @staticmethod
+    def unread(log: ChannelLog, marker: Optional[dict]) -> Tuple[int, bool]:
+        """(unread count, capped): capped means "at least this many", shown as e.g. 200+."""
+        count, exact = log.newer_than((marker or {}).get('last_read_id'))
+        return count, not exact
+
+
+chat_events = EventBus(buffer=settings.EVENTS_BUFFER, broker=make_broker("hackconnect:chat-events"))
+chat = ChatService(
+    capacity=settings.CHAT_CHANNEL_BUFFER,
+    max_channels=settings.CHAT_MAX_CHANNELS,
+    writer=ChatWriter(
+        window=settings.CHAT_WRITE_WINDOW_MS / 1000,
+        batch_size=settings.CHAT_WRITE_BATCH,
+        concurrency=settings.CHAT_WRITE_CONCURRENCY,
+    ),
+    events=chat_events,
+)
+
+registry.gauge_func("chat_channels_cached", "Chat channels with recent messages in memory", lambda: chat.channels)
+registry.gauge_func("chat_write_pending", "Chat messages / read markers waiting for the next bulk write", lambda: chat.writer.pending)
+registry.gauge_func("chat_write_batches_total", "Chat bulk writes", lambda: chat.writer.batches, "counter")
+registry.gauge_func("chat_messages_written_total", "Chat messages stored", lambda: chat.writer.written, "counter")
+registry.gauge_func("chat_history_memory_pages_total", "History pages served without an upstream read", lambda: chat.served_from_memory, "counter")
+registry.gauge_func("chat_subscribers", "Open chat streams on this worker", lambda: chat_events.subscribers)
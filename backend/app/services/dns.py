@@ -0,0 +1,138 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from typing import Iterable, List, Optional
+from urllib.parse import urlparse
+import asyncio
+import httpcore
+import logging
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# After a failed lookup, keep serving the old addresses and try again this soon
+STALE_RETRY_SECONDS = 5.0
+
+
+class CachedResolver:
+    """
+    DNS for one host (the Appwrite endpoint). Addresses are cached for `ttl`
+    seconds and refreshed in the background before they expire, so new
+    connections never wait on a lookup. With `prefer_ipv4`, IPv4 addresses are
+    tried first and IPv6 stays as a fallback. Other hosts are not affected.
+    """
+
+    def __init__(self, host: Optional[str], ttl: float, prefer_ipv4: bool = True):
+        self.host = host
+        self.ttl = ttl
+        self.prefer_ipv4 = prefer_ipv4
+        self._addresses: List[str] = []
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+        self.lookups = 0
+        self.failures = 0
+
+    @property
+    def addresses(self) -> List[str]:
+        return list(self._addresses)
+
+    def _fresh(self) -> bool:
+        return bool(self._addresses) and time.monotonic() < self._expires
+
+    async def _lookup(self) -> List[tuple]:
+        return await asyncio.get_running_loop().getaddrinfo(self.host, None, type=socket.SOCK_STREAM)
+
+    def _order(self, infos: Iterable[tuple]) -> List[str]:
+        infos = list(infos)
+        if self.prefer_ipv4:
+            # Stable: keeps the system's order within each family
+            infos.sort(key=lambda info: info[0] != socket.AF_INET)
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    async def resolve(self) -> List[str]:
+        """Addresses to try, in order; looks the host up only when the cache has expired."""
+        if self._fresh():
+            return self._addresses
+        async with self._lock:
+            if self._fresh():
+                return self._addresses
+            return await self.refresh()
+
+    async def refresh(self) -> List[str]:
+        self.lookups += 1
+        try:
+            addresses = self._order(await self._lookup())
+            if not addresses:
+                raise OSError(f"No addresses for {self.host}")
+        except OSError:
+            self.failures += 1
+            if not self._addresses:
+                raise
+            # A resolver hiccup shouldn't fail connects to an endpoint that hasn't moved
+            logger.warning("DNS lookup for %s failed; keeping %s", self.host, self._addresses)
+            self._expires = time.monotonic() + STALE_RETRY_SECONDS
+            return self._addresses
+
+        self._addresses = addresses
+        self._expires = time.monotonic() + self.ttl
+        return addresses
+
+    def invalidate(self):
+        """Look the host up again on the next connect (every cached address failed)."""
+        self._expires = 0.0
+
+    async def run_refresh_loop(self):
+        """Refresh before the cache expires (started from the app lifespan)."""
+        while True:
+            try:
+                async with self._lock:
+                    await self.refresh()
+            except Exception:
+                logger.exception("DNS refresh for %s failed", self.host)
+            await asyncio.sleep(max(1.0, self.ttl * 0.8))
+
+
+class ScopedResolverBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that connects to the resolver's host through its
+    cached addresses (trying each in order) and to any other host as usual.
+    TLS still verifies and sends SNI for the hostname, not the address.
+    """
+
+    def __init__(self, resolver: CachedResolver, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.resolver = resolver
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        if host != self.resolver.host:
+            return await self._backend.connect_tcp(
+                host, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+
+        error: Optional[Exception] = None
+        for address in await self.resolver.resolve():
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Nothing answered: the endpoint may have moved
+        self.resolver.invalidate()
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+appwrite_dns = CachedResolver(
+    host=urlparse(settings.APPWRITE_ENDPOINT or "").hostname,
+    ttl=settings.APPWRITE_DNS_TTL,
+    prefer_ipv4=settings.APPWRITE_PREFER_IPV4,
+)
+
+registry.gauge_func("appwrite_dns_lookups_total", "DNS lookups of the Appwrite host", lambda: appwrite_dns.lookups, "counter")
+registry.gauge_func("appwrite_dns_failures_total", "Failed DNS lookups of the Appwrite host", lambda: appwrite_dns.failures, "counter")
+registry.gauge_func("appwrite_dns_addresses", "Cached addresses for the Appwrite host", lambda: len(appwrite_dns.addresses))
@@ -0,0 +1,253 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.utils.responses import dumps
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[List[str], bytes], None]
+
+# Sent instead of the events a slow client missed: refetch, then keep applying diffs
+RESYNC_FRAME = b'data: {"type":"resync"}\n\n'
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def team_topic(team_id: str) -> str:
+    return f"team:{team_id}"
+
+
+def hackathon_topic(hackathon_id: str) -> str:
+    return f"hackathon:{hackathon_id}"
+
+
+class Subscription:
+    """
+    One open stream. Holds pre-encoded frames (shared with every other subscriber)
+    in a bounded buffer; a client that falls `limit` frames behind gets one resync
+    frame instead of an ever-growing backlog.
+    """
+
+    __slots__ = ("topics", "_frames", "_limit", "_ready", "dropped")
+
+    def __init__(self, topics: Tuple[str, ...], limit: int):
+        self.topics = topics
+        self._frames: deque = deque()
+        self._limit = limit
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, frame: bytes):
+        if len(self._frames) >= self._limit:
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            self._frames.append(RESYNC_FRAME)
+        self._frames.append(frame)
+        self._ready.set()
+
+    def drain(self) -> List[bytes]:
+        frames = list(self._frames)
+        self._frames.clear()
+        return frames
+
+    async def next(self, timeout: float) -> List[bytes]:
+        """Frames received since the last call; waits up to `timeout` seconds, [] if none came."""
+        if not self._frames:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.drain()
+
+
+class LocalBroker:
+    """Single process: events go straight to this worker's subscribers."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    def publish(self, topics: List[str], payload: bytes):
+        if self._deliver is not None:
+            self._deliver(topics, payload)
+
+
+class RedisBroker:
+    """
+    Several workers / hosts: every event goes through one Redis pub/sub channel and
+    each worker delivers it to its own subscribers (`pip install redis`).
+    """
+
+    def __init__(self, url: str, channel: str):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, deliver: Deliver):
+        import redis.asyncio as redis  # only needed for multi-worker deploys
+
+        self._redis = redis.from_url(self.url)
+        self._outbox = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._listen(deliver)),
+            asyncio.create_task(self._send()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def publish(self, topics: List[str], payload: bytes):
+        # Mutation routes never wait on Redis; one sender keeps this worker's events in order
+        if self._outbox is not None:
+            self._outbox.put_nowait(orjson.dumps([topics, payload.decode()]))
+
+    async def _send(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self._redis.publish(self.channel, message)
+            except Exception:
+                logger.exception("Publishing a team event to Redis failed")
+
+    async def _listen(self, deliver: Deliver):
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        topics, payload = orjson.loads(message["data"])
+                        deliver(topics, payload.encode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Team event subscription to Redis dropped; reconnecting")
+                await asyncio.sleep(1)
+
+
+class EventBus:
+    """
+    Pub/sub for live feeds (team changes, chat). Publishers hand over a small diff
+    (who joined, what changed, a new message); it is encoded once as an SSE frame and
+    appended to the buffer of every subscriber of its topics, so fan-out is one append
+    per client. The broker decides whether other workers see the event too.
+    """
+
+    def __init__(self, buffer: int, broker=None):
+        self.buffer = buffer
+        self.broker = broker or LocalBroker()
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._listeners: List[Deliver] = []
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        # A subscription sits under each of its topics: count it once
+        return self._dropped + sum(sub.dropped for sub in set().union(*self._topics.values()))
+
+    async def start(self):
+        await self.broker.start(self._deliver)
+
+    async def stop(self):
+        await self.broker.stop()
+
+    def listen(self, callback: Deliver):
+        """Also hand every delivered event (from any worker) to `callback(topics, payload)`."""
+        self._listeners.append(callback)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        sub = Subscription(tuple(dict.fromkeys(topics)), self.buffer)
+        for topic in sub.topics:
+            self._topics.setdefault(topic, set()).add(sub)
+        self.subscribers += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        for topic in sub.topics:
+            subs = self._topics.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[topic]
+        self.subscribers -= 1
+        self._dropped += sub.dropped
+
+    def publish(self, event: dict):
+        """Send a team change (must carry `team_id`, and `hackathon_id` when known) to its team and hackathon."""
+        topics = [team_topic(event['team_id'])]
+        if event.get('hackathon_id'):
+            topics.append(hackathon_topic(event['hackathon_id']))
+        self.publish_to(topics, event)
+
+    def publish_to(self, topics: List[str], event: dict):
+        self.published += 1
+        try:
+            self.broker.publish(topics, dumps(event))
+        except Exception:
+            # A live feed is best-effort; the write it describes has already happened
+            logger.exception("Publishing team event %s failed", event.get('type'))
+
+    def _deliver(self, topics: List[str], payload: bytes):
+        for listener in self._listeners:
+            try:
+                listener(topics, payload)
+            except Exception:
+                logger.exception("Event listener failed")
+        groups = [self._topics[t] for t in topics if t in self._topics]
+        if not groups:
+            return
+        # Someone following both the team and its hackathon still gets the event once
+        targets = groups[0] if len(groups) == 1 else set().union(*groups)
+        frame = b"data: " + payload + b"\n\n"
+        for sub in targets:
+            sub.push(frame)
+        self.delivered += len(targets)
+
+    async def stream(self, topics: Iterable[str], heartbeat: float) -> AsyncIterator[bytes]:
+        """
+        SSE body following `topics`. Subscribes on the first read, so a response that is
+        never sent holds nothing; a comment every `heartbeat` seconds keeps proxies from closing it.
+        """
+        sub = self.subscribe(topics)
+        try:
+            yield b": connected\n\n"
+            while True:
+                frames = await sub.next(heartbeat)
+                yield b"".join(frames) if frames else HEARTBEAT_FRAME
+        finally:
+            self.unsubscribe(sub)
+
+
+def make_broker(channel: str):
+    if settings.EVENTS_BROKER_URL:
+        return RedisBroker(settings.EVENTS_BROKER_URL, channel)
+    return LocalBroker()
+
+
+team_events = EventBus(buffer=settings.EVENTS_BUFFER, broker=make_broker("hackconnect:team-events"))
+
+registry.gauge_func("team_event_subscribers", "Open team change streams on this worker", lambda: team_events.subscribers)
+registry.gauge_func("team_events_published_total", "Team change events published by this worker", lambda: team_events.published, "counter")
+registry.gauge_func("team_events_delivered_total", "Team change events queued to subscribers", lambda: team_events.delivered, "counter")
+registry.gauge_func("team_events_dropped_total", "Events replaced by a resync for slow subscribers", lambda: team_events.dropped, "counter")
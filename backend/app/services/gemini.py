@@ -1,22 +1,62 @@
-import google.generativeai as genai
+import asyncio
 import os
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Simple Prompt Engineering
+PROMPT = "Summarize this hackathon description in 2 exciting sentences for students: {text}"
+
+
+@lru_cache()
+def _get_model():
+    # The SDK is heavy (~0.7s to import): loaded on first use, not at app start-up
+    import google.generativeai as genai
+
+    # Configure once and reuse the model client for every call
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel('gemini-pro')
+
+
 def get_gemini_summary(text: str):
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         return "⚠️ AI Error: GEMINI_API_KEY is missing in .env"
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-pro')
-        
-        # Simple Prompt Engineering
-        prompt = f"Summarize this hackathon description in 2 exciting sentences for students: {text}"
-        
-        response = model.generate_content(prompt)
+        response = _get_model().generate_content(PROMPT.format(text=text))
         return response.text
     except Exception as e:
-        return f"AI Error: {str(e)}"
\ No newline at end of file
+        return f"AI Error: {str(e)}"
+
+
+class GeminiSummarizer:
+    """Async Gemini client used by the summary workers. Raises instead of returning error text."""
+
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv("GEMINI_API_KEY"))
+
+    async def summarize(self, text: str) -> str:
+        if not os.getenv("GEMINI_API_KEY"):
+            raise RuntimeError("GEMINI_API_KEY is missing in .env")
+        # First call imports the SDK; keep that off the event loop
+        model = await asyncio.to_thread(_get_model)
+        response = await model.generate_content_async(PROMPT.format(text=text))
+        return response.text
+
+    async def prewarm(self):
+        if os.getenv("GEMINI_API_KEY"):
+            await asyncio.to_thread(_get_model)
+
+
+class StubSummarizer:
+    """Local stand-in for tests / offline dev: the first two sentences, no network."""
+
+    configured = True
+
+    async def summarize(self, text: str) -> str:
+        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+        return " ".join(sentences[:2])
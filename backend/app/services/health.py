@@ -0,0 +1,81 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.startup import startup
+from app.services.appwrite import get_db_service
+from appwrite.query import Query
+from typing import Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamHealth:
+    """
+    Appwrite connectivity, checked in the background with the cheapest possible
+    query (one `$id`). Probes only read the cached result, never call upstream.
+    """
+
+    def __init__(self, stale_after: float):
+        self.stale_after = stale_after
+        self.ok = False
+        self.latency: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.checks = 0
+        self.failures = 0
+
+    async def check(self) -> bool:
+        start = time.perf_counter()
+        try:
+            await get_db_service().list_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS,
+                queries=[Query.limit(1), Query.select(["$id"])]
+            )
+            self.ok, self.error = True, None
+        except Exception as e:
+            self.ok, self.error = False, str(e)
+            self.failures += 1
+        self.latency = time.perf_counter() - start
+        self.checked_at = time.monotonic()
+        self.checks += 1
+        return self.ok
+
+    async def run_check_loop(self, interval: float):
+        """Check now, then every `interval` seconds (started from the app lifespan)."""
+        while True:
+            if not await self.check():
+                logger.warning("Appwrite readiness check failed: %s", self.error)
+            await asyncio.sleep(interval)
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.checked_at is None else time.monotonic() - self.checked_at
+
+    @property
+    def ready(self) -> bool:
+        # A wedged check loop must not keep reporting an old success
+        return self.ok and self.age <= self.stale_after
+
+    def snapshot(self) -> dict:
+        age = self.age
+        return {
+            "ready": self.ready,
+            "upstream": {
+                "ok": self.ok,
+                "latency_ms": None if self.latency is None else round(self.latency * 1000, 3),
+                "checked_seconds_ago": None if age is None else round(age, 3),
+                "error": self.error,
+            },
+        }
+
+
+upstream_health = UpstreamHealth(stale_after=settings.HEALTH_STALE_AFTER)
+# Builds the Appwrite client and opens its first connection before traffic arrives
+startup.on_prewarm(upstream_health.check)
+
+registry.gauge_func("upstream_ready", "1 if the last Appwrite readiness check succeeded and is fresh", lambda: int(upstream_health.ready))
+registry.gauge_func("upstream_check_latency_seconds", "Latency of the last Appwrite readiness check", lambda: upstream_health.latency or 0.0)
+registry.gauge_func("upstream_check_failures_total", "Failed Appwrite readiness checks", lambda: upstream_health.failures, "counter")
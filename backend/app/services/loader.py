@@ -0,0 +1,98 @@
+from app.core import upstream
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set
+import asyncio
+import weakref
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """
+    DataLoader-style batching for one event loop.
+    Every key requested during the same loop tick is deduplicated and resolved
+    with as few `batch_fn` calls as possible; keys already in flight are shared
+    by later callers instead of being fetched again. Batches run in their own
+    upstream-accounting context; every caller is charged with the calls of the
+    batch it waited on.
+    """
+
+    def __init__(self, batch_fn: BatchFn, max_batch_size: int = 100, max_concurrency: int = 4):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._calls: "weakref.WeakKeyDictionary[asyncio.Future, List[upstream.UpstreamCall]]" = weakref.WeakKeyDictionary()
+        self._scheduled = False
+
+        self.batches = 0
+        self.keys_loaded = 0
+        self.dedup_hits = 0
+
+    async def load(self, key: Hashable) -> Any:
+        fut = self._future(key)
+        try:
+            # shield: the future is shared by every caller of this key; one being cancelled
+            # (e.g. a client disconnect) must not cancel it for the others
+            return await asyncio.shield(fut)
+        finally:
+            upstream.charge(self._calls.get(fut, ()))
+
+    def _future(self, key: Hashable) -> "asyncio.Future":
+        fut = self._pending.get(key) or self._inflight.get(key)
+        if fut is not None:
+            self.dedup_hits += 1
+            return fut
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending[key] = fut
+        if not self._scheduled:
+            # Dispatch after everything already queued for this tick has run
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return fut
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return await asyncio.gather(*[self.load(k) for k in keys])
+
+    def _dispatch(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        self._inflight.update(pending)
+
+        keys = list(pending)
+        for i in range(0, len(keys), self.max_batch_size):
+            chunk = keys[i:i + self.max_batch_size]
+            context, stats = upstream.shared_context()
+            for k in chunk:
+                self._calls[pending[k]] = stats.calls
+            task = asyncio.get_running_loop().create_task(self._run_batch(chunk, pending), context=context)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, keys: List[Hashable], futures: Dict[Hashable, asyncio.Future]):
+        try:
+            async with self._semaphore:
+                self.batches += 1
+                self.keys_loaded += len(keys)
+                results = await self._batch_fn(keys)
+        except Exception as e:
+            for k in keys:
+                if not futures[k].done():
+                    futures[k].set_exception(e)
+        else:
+            for k in keys:
+                if not futures[k].done():
+                    futures[k].set_result(results.get(k))
+        finally:
+            for k in keys:
+                self._inflight.pop(k, None)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "keys_loaded": self.keys_loaded,
+            "dedup_hits": self.dedup_hits,
+        }
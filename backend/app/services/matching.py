@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
 
 def calculate_match_score(user_skills: List[str], team_requirements: List[str]) -> int:
     """
@@ -16,4 +17,72 @@ def calculate_match_score(user_skills: List[str], team_requirements: List[str])
     
     # Calculate percentage
     score = (len(matches) / len(req_set)) * 100
-    return int(score)
\ No newline at end of file
+    return int(score)
+
+
+# --- BATCH MATCHING ---
+
+def user_skills(profile: dict) -> List[str]:
+    """What a participant brings: profile skills + tech stack."""
+    return (profile.get('skills') or []) + (profile.get('tech_stack') or [])
+
+
+def team_requirements(team: dict) -> List[str]:
+    """What a team wants: looking_for roles + tech stack."""
+    return (team.get('looking_for') or []) + (team.get('tech_stack') or [])
+
+
+def build_vocabulary(*skill_groups: Sequence[Sequence[str]]) -> Dict[str, int]:
+    """Shared (lower-cased) skill -> column index across every user and team."""
+    vocab: Dict[str, int] = {}
+    for group in skill_groups:
+        for skills in group:
+            for s in skills:
+                vocab.setdefault(s.lower(), len(vocab))
+    return vocab
+
+
+def encode_skills(skill_lists: Sequence[Sequence[str]], vocab: Dict[str, int]) -> np.ndarray:
+    """One boolean row per entity, one column per vocabulary skill."""
+    matrix = np.zeros((len(skill_lists), len(vocab)), dtype=bool)
+    for row, skills in enumerate(skill_lists):
+        cols = [vocab[s.lower()] for s in skills]
+        matrix[row, cols] = True
+    return matrix
+
+
+def batch_match_scores(user_skills: Sequence[Sequence[str]], team_requirements: Sequence[Sequence[str]]) -> np.ndarray:
+    """
+    Full users x teams score matrix in one vectorized pass.
+    Cell [u, t] == calculate_match_score(user_skills[u], team_requirements[t]).
+    """
+    vocab = build_vocabulary(user_skills, team_requirements)
+    users = encode_skills(user_skills, vocab).astype(np.int32)
+    teams = encode_skills(team_requirements, vocab).astype(np.int32)
+
+    overlap = users @ teams.T                 # |user_set & req_set|
+    req_sizes = teams.sum(axis=1)             # |req_set|
+
+    scores = np.zeros(overlap.shape, dtype=np.int64)
+    has_reqs = req_sizes > 0
+    scores[:, has_reqs] = (overlap[:, has_reqs] / req_sizes[has_reqs] * 100).astype(np.int64)
+    return scores
+
+
+def top_k_matches(scores: np.ndarray, k: int, axis: int = 1) -> List[List[Tuple[int, int]]]:
+    """
+    Best (index, score) pairs per row (axis=1: per user) or per column (axis=0: per team).
+    Zero scores are dropped; ties keep the original order.
+    """
+    matrix = scores if axis == 1 else scores.T
+    if matrix.size == 0:
+        return [[] for _ in range(matrix.shape[0])]
+
+    k = min(k, matrix.shape[1])
+    # argpartition is O(n); only the K survivors get sorted
+    candidates = np.argpartition(-matrix, k - 1, axis=1)[:, :k]
+    results = []
+    for row, cols in enumerate(candidates):
+        cols = sorted(cols, key=lambda c: (-matrix[row, c], c))
+        results.append([(int(c), int(matrix[row, c])) for c in cols if matrix[row, c] > 0])
+    return results
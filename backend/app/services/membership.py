@@ -0,0 +1,124 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from app.utils.projection import INTERNAL_ATTRIBUTES
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MembershipIndex:
+    """
+    Local secondary index: user id -> teams they are a member of (and so their hackathons).
+    The team write paths in this process keep it current; a background reload
+    reconciles it with Appwrite, picking up writes made by other workers.
+    """
+
+    def __init__(self):
+        self._teams: Dict[str, dict] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self._changed_during_rebuild: Optional[Dict[str, Optional[dict]]] = None
+        self._lock = asyncio.Lock()
+        self.ready = False
+        self.drift = 0  # teams the last reloads had to correct
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+    @property
+    def users(self) -> int:
+        return len(self._by_user)
+
+    # --- Updates ---
+    def put(self, team: dict):
+        """Insert or replace one team document (after create / membership change / update)."""
+        team_id = team['$id']
+        doc = {k: v for k, v in team.items() if k not in INTERNAL_ATTRIBUTES}
+        self._unlink(team_id)
+        self._teams[team_id] = doc
+        for user_id in doc.get('members') or []:
+            self._by_user.setdefault(user_id, set()).add(team_id)
+
+        if self._changed_during_rebuild is not None:
+            self._changed_during_rebuild[team_id] = doc
+
+    def remove(self, team_id: str):
+        self._unlink(team_id)
+        if self._changed_during_rebuild is not None:
+            self._changed_during_rebuild[team_id] = None
+
+    def _unlink(self, team_id: str):
+        old = self._teams.pop(team_id, None)
+        if old is None:
+            return
+        for user_id in old.get('members') or []:
+            teams = self._by_user.get(user_id)
+            if teams is not None:
+                teams.discard(team_id)
+                if not teams:
+                    del self._by_user[user_id]
+
+    # --- Queries ---
+    def teams_of(self, user_id: str) -> List[dict]:
+        """A user's teams in creation order, as copies the caller may enrich."""
+        teams = [self._teams[t] for t in self._by_user.get(user_id, ())]
+        teams.sort(key=lambda t: (t.get('$createdAt') or "", t['$id']))
+        return [dict(t) for t in teams]
+
+    def hackathon_ids_of(self, user_id: str) -> Set[str]:
+        return {self._teams[t].get('hackathon_id') for t in self._by_user.get(user_id, ())}
+
+    # --- Reconciliation ---
+    async def rebuild(self):
+        """Reload every team from Appwrite and swap the index in one step."""
+        async with self._lock:
+            await self._reload()
+
+    async def _reload(self):
+        self._changed_during_rebuild = {}
+        try:
+            fresh = MembershipIndex()
+            async for doc in get_db_service().iter_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS
+            ):
+                fresh.put(doc)
+
+            # Local writes that landed while the reload was in flight win
+            for team_id, doc in self._changed_during_rebuild.items():
+                if doc is None:
+                    fresh.remove(team_id)
+                else:
+                    fresh.put(doc)
+
+            if self.ready:
+                self.drift += self._diff(fresh)
+            self._teams, self._by_user = fresh._teams, fresh._by_user
+            self.ready = True
+        finally:
+            self._changed_during_rebuild = None
+
+    def _diff(self, fresh: "MembershipIndex") -> int:
+        """Teams whose membership differs between this index and a fresh load."""
+        return sum(
+            1 for team_id in self._teams.keys() | fresh._teams.keys()
+            if (self._teams.get(team_id) or {}).get('members') != (fresh._teams.get(team_id) or {}).get('members')
+        )
+
+    async def run_refresh_loop(self, interval: float):
+        """Reload now, then every `interval` seconds (started from the app lifespan)."""
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Team membership index reload failed")
+            await asyncio.sleep(interval)
+
+
+membership = MembershipIndex()
+
+registry.gauge_func("membership_index_teams", "Teams in the local membership index", lambda: len(membership))
+registry.gauge_func("membership_index_users", "Users with at least one team in the membership index", lambda: membership.users)
+registry.gauge_func("membership_index_drift_total", "Teams corrected by membership index reconciliation", lambda: membership.drift, "counter")
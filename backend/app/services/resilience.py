@@ -0,0 +1,312 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from appwrite.exception import AppwriteException
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import httpx
+import random
+import time
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# The request never reached Appwrite, so even writes are safe to repeat
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Safe to send again after a failure that may have reached Appwrite (PUT replaces whole documents)
+RETRY_SAFE_METHODS = {"get", "put"}
+# Safe to have two copies in flight at once: reads only
+HEDGE_METHODS = {"get"}
+# AppwriteException type for calls rejected by an open circuit (nothing was sent)
+CIRCUIT_OPEN = "circuit_open"
+
+circuit_state = registry.gauge(
+    "appwrite_circuit_state", "Circuit breaker per Appwrite operation (0 closed, 1 half-open, 2 open)", ("operation",))
+appwrite_retries = registry.counter(
+    "appwrite_retries_total", "Appwrite attempts repeated after a retryable failure", ("operation", "reason"))
+appwrite_hedges = registry.counter(
+    "appwrite_hedges_total", "Duplicate reads sent because the first was slower than the hedge percentile", ("operation", "winner"))
+appwrite_rejections = registry.counter(
+    "appwrite_circuit_rejections_total", "Appwrite calls failed fast by an open circuit", ("operation",))
+
+
+def failure_reason(response: Optional[httpx.Response], error: Optional[Exception]) -> Optional[str]:
+    """Short label for a failure worth retrying, None otherwise."""
+    if error is not None:
+        return type(error).__name__ if isinstance(error, httpx.TransportError) else None
+    if response.status_code in RETRYABLE_STATUS:
+        return str(response.status_code)
+    return None
+
+
+def retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    """Seconds the server asked us to wait (`Retry-After`, or Appwrite's `X-RateLimit-Reset`)."""
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    reset = response.headers.get("x-ratelimit-reset")
+    if reset and response.status_code == 429:
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            return None
+    return None
+
+
+class RetryBudget:
+    """
+    Every call earns `ratio` tokens (up to `reserve`); a retry or hedge spends one.
+    Extra attempts therefore stay under `ratio` of the traffic once upstream degrades.
+    """
+
+    def __init__(self, ratio: float, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self.exhausted = 0
+
+    def earn(self):
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def spend(self) -> bool:
+        if self.tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class LatencyTracker:
+    """Recent successful latencies per operation; the percentile is recomputed every `refresh` samples."""
+
+    def __init__(self, percentile: float, size: int = 512, refresh: int = 32, min_samples: int = 64):
+        self.percentile = percentile
+        self.size = size
+        self.refresh = refresh
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._since: Dict[str, int] = {}
+        self._threshold: Dict[str, float] = {}
+
+    def observe(self, operation: str, seconds: float):
+        samples = self._samples.get(operation)
+        if samples is None:
+            samples = self._samples[operation] = deque(maxlen=self.size)
+        samples.append(seconds)
+        self._since[operation] = self._since.get(operation, 0) + 1
+        if self._since[operation] >= self.refresh and len(samples) >= self.min_samples:
+            self._since[operation] = 0
+            ordered = sorted(samples)
+            self._threshold[operation] = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def threshold(self, operation: str) -> Optional[float]:
+        """None until enough samples have been seen."""
+        return self._threshold.get(operation)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed calls and rejects calls for
+    `reset_after` seconds; then lets one probe through (half-open) and closes
+    again if it succeeds.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, operation: str, failures: int, reset_after: float):
+        self.operation = operation
+        self.failures = failures
+        self.reset_after = reset_after
+        self._state = self.CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> int:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+            self._set(self.HALF_OPEN)
+        return self._state
+
+    def _set(self, state: int):
+        self._state = state
+        circuit_state.set(state, (self.operation,))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        self._probing = False
+
+    def success(self):
+        self._consecutive = 0
+        self._probing = False
+        if self._state != self.CLOSED:
+            self._set(self.CLOSED)
+
+    def failure(self):
+        self._consecutive += 1
+        self._probing = False
+        if self._state == self.HALF_OPEN or self._consecutive >= self.failures:
+            self._opened_at = time.monotonic()
+            self._set(self.OPEN)
+
+
+class Resilience:
+    """
+    Wraps one Appwrite HTTP exchange (`send`): retries with jittered exponential
+    backoff (honouring rate-limit hints), a hedged duplicate for slow idempotent reads,
+    and a circuit breaker per operation. Retries and hedges draw on one shared budget,
+    so a degraded Appwrite sees a bounded amount of extra load rather than a retry storm.
+    """
+
+    def __init__(
+        self,
+        retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        budget_ratio: float,
+        hedge_percentile: float,
+        hedge_min: float,
+        circuit_failures: int,
+        circuit_reset: float,
+    ):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = RetryBudget(budget_ratio)
+        self.latency = LatencyTracker(hedge_percentile) if hedge_percentile > 0 else None
+        self.hedge_min = hedge_min
+        self.circuit_failures = circuit_failures
+        self.circuit_reset = circuit_reset
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, operation: str) -> CircuitBreaker:
+        breaker = self._breakers.get(operation)
+        if breaker is None:
+            breaker = self._breakers[operation] = CircuitBreaker(operation, self.circuit_failures, self.circuit_reset)
+        return breaker
+
+    def open_circuits(self) -> List[str]:
+        return [op for op, b in self._breakers.items() if b.state == CircuitBreaker.OPEN]
+
+    def backoff(self, attempt: int, hint: Optional[float]) -> float:
+        """Full jitter over base * 2^attempt, but never sooner than the server asked."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, hint) if hint is not None else delay
+
+    async def run(self, operation: str, method: str, send: Send) -> httpx.Response:
+        breaker = self.breaker(operation)
+        if not breaker.allow():
+            appwrite_rejections.inc((operation,))
+            raise AppwriteException(f"Appwrite {operation} is failing; circuit open", 503, CIRCUIT_OPEN)
+
+        retry_safe = method in RETRY_SAFE_METHODS
+        send_once = self._hedged if method in HEDGE_METHODS else self._timed
+        self.budget.earn()
+        attempt = 0
+        settled = False
+        try:
+            while True:
+                response, error = None, None
+                try:
+                    response = await send_once(operation, send)
+                except httpx.HTTPError as e:
+                    error = e
+
+                reason = failure_reason(response, error)
+                # Writes are only repeated when Appwrite can't have applied them
+                if reason is not None and not retry_safe and reason != "429" and not isinstance(error, NOT_SENT_ERRORS):
+                    reason = None
+
+                hint = retry_after(response)
+                if (reason is None or attempt >= self.retries
+                        or (hint is not None and hint > self.backoff_max) or not self.budget.spend()):
+                    settled = True
+                    # A 429 means we were throttled, not that Appwrite is broken
+                    if error is not None or response.status_code >= 500:
+                        breaker.failure()
+                    else:
+                        breaker.success()
+                    if error is not None:
+                        raise error
+                    return response
+
+                appwrite_retries.inc((operation, reason))
+                await asyncio.sleep(self.backoff(attempt, hint))
+                attempt += 1
+        finally:
+            if not settled:
+                # Cancelled mid-call: don't leave a half-open breaker waiting on this probe
+                breaker.release()
+
+    async def _timed(self, operation: str, send: Send) -> httpx.Response:
+        start = time.perf_counter()
+        response = await send()
+        if self.latency is not None and not response.is_error:
+            self.latency.observe(operation, time.perf_counter() - start)
+        return response
+
+    async def _hedged(self, operation: str, send: Send) -> httpx.Response:
+        """If the read is still running at the operation's latency percentile, race a second copy."""
+        threshold = self.latency.threshold(operation) if self.latency is not None else None
+        if threshold is None:
+            return await self._timed(operation, send)
+
+        first = asyncio.ensure_future(self._timed(operation, send))
+        copies = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=max(threshold, self.hedge_min))
+            if done or not self.budget.spend():
+                return await first
+
+            second = asyncio.ensure_future(self._timed(operation, send))
+            copies.append(second)
+            pending = {first, second}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Take a good answer if any copy has one; both may finish in the same round
+                for task in done:
+                    if task.exception() is None and failure_reason(task.result(), None) is None:
+                        appwrite_hedges.inc((operation, "hedge" if task is second else "primary"))
+                        return task.result()
+                # A failure only counts once the other copy has failed too
+                if not pending:
+                    appwrite_hedges.inc((operation, "none"))
+                    return (second if second in done else first).result()
+        finally:
+            # Also reached when the caller is cancelled mid-wait: no copy may outlive it
+            for task in copies:
+                if not task.done():
+                    task.cancel()
+
+
+resilience = Resilience(
+    retries=settings.APPWRITE_RETRIES,
+    backoff_base=settings.APPWRITE_BACKOFF_BASE_MS / 1000,
+    backoff_max=settings.APPWRITE_BACKOFF_MAX_MS / 1000,
+    budget_ratio=settings.APPWRITE_RETRY_BUDGET,
+    hedge_percentile=settings.APPWRITE_HEDGE_PERCENTILE,
+    hedge_min=settings.APPWRITE_HEDGE_MIN_MS / 1000,
+    circuit_failures=settings.APPWRITE_CIRCUIT_FAILURES,
+    circuit_reset=settings.APPWRITE_CIRCUIT_RESET_SECONDS,
+)
+
+registry.gauge_func("appwrite_open_circuits", "Appwrite operations currently failing fast", lambda: len(resilience.open_circuits()))
+registry.gauge_func("appwrite_retry_budget_exhausted_total", "Retries / hedges skipped because the retry budget was spent",
+                    lambda: resilience.budget.exhausted, "counter")
@@ -0,0 +1,330 @@
+from app.core.config import settings
+from app.services.appwrite import get_db_service
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import math
+import os
+import re
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Field weights for the combined (BM25F-style) term frequency
+FIELDS = {
+    "name": 3.0,
+    "tags": 2.5,
+    "tagline": 2.0,
+    "location": 1.5,
+    "mode": 1.5,
+    "description": 1.0,
+}
+K1, B = 1.2, 0.75
+
+# How much a non-exact match of a query token counts
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 20
+MIN_FUZZY_LENGTH = 4
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to using with".split()
+)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")  # keeps c++ / c#
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def _stem(token: str) -> str:
+    """Plural folding only: hackathons -> hackathon, but not class / status / analysis."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _edits(token: str) -> Set[str]:
+    """Every string one insert, delete, substitution or adjacent swap away."""
+    splits = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+    return (
+        {a + b[1:] for a, b in splits if b}
+        | {a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1}
+        | {a + c + b[1:] for a, b in splits if b for c in _ALPHABET}
+        | {a + c + b for a, b in splits for c in _ALPHABET}
+    )
+
+
+def _field_text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+class SearchIndex:
+    """
+    In-process full-text index over hackathons, ranked with BM25.
+    Postings are compact (doc number, weighted tf) arrays scored with numpy, so a
+    query touches only the posting lists of its terms. Query tokens also match
+    indexed terms they prefix (search-as-you-type) or are one typo away from.
+    Removed documents are only masked out; the next rebuild compacts them.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._ids: List[str] = []
+        self._docs: Dict[str, dict] = {}
+        self._num: Dict[str, int] = {}
+        self._lengths = array("f")
+        self._alive = bytearray()
+        self._total_length = 0.0
+        self._norm: Optional[np.ndarray] = None  # BM25 length normalisation, cached between updates
+        self._vocab: List[str] = []  # sorted, for prefix lookups
+        self._bulk = False  # vocabulary sorted once in _finish_bulk instead of per insert
+        self._added_during_rebuild: Optional[Dict[str, dict]] = None
+        self._lock = asyncio.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- Updates ---
+    def add(self, doc: dict):
+        """Insert or replace one hackathon document."""
+        doc_id = doc['$id']
+        self.remove(doc_id)
+
+        tf: Dict[str, float] = {}
+        for field, weight in FIELDS.items():
+            for token in tokenize(_field_text(doc.get(field))):
+                tf[token] = tf.get(token, 0.0) + weight
+        length = sum(tf.values())
+
+        num = len(self._ids)
+        self._ids.append(doc_id)
+        self._num[doc_id] = num
+        self._docs[doc_id] = doc
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._total_length += length
+        self._norm = None
+
+        for term, freq in tf.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("I"), array("f"))
+                if not self._bulk:
+                    self._add_term(term)
+            posting[0].append(num)
+            posting[1].append(freq)
+
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild[doc_id] = doc
+
+    def remove(self, doc_id: str):
+        num = self._num.pop(doc_id, None)
+        if num is None:
+            return
+        self._docs.pop(doc_id, None)
+        self._alive[num] = 0
+        self._total_length -= self._lengths[num]
+        self._norm = None
+
+    def _add_term(self, term: str):
+        self._vocab.insert(bisect_left(self._vocab, term), term)
+
+    def _finish_bulk(self):
+        self._vocab = sorted(self._postings)
+
+    # --- Queries ---
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms a query token matches, with how much each counts."""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+
+        if len(token) >= 2:
+            prefixed = []
+            i = bisect_left(self._vocab, token)
+            while i < len(self._vocab) and self._vocab[i].startswith(token):
+                if self._vocab[i] != token:
+                    prefixed.append(self._vocab[i])
+                i += 1
+            # Most common completions first
+            prefixed.sort(key=lambda t: len(self._postings[t][0]), reverse=True)
+            for term in prefixed[:MAX_PREFIX_EXPANSIONS]:
+                matches.setdefault(term, PREFIX_WEIGHT)
+
+        # Typos: only when nothing matched as typed (a few hundred dict lookups)
+        if not matches and len(token) >= MIN_FUZZY_LENGTH:
+            for term in _edits(token):
+                if term in self._postings:
+                    matches[term] = FUZZY_WEIGHT
+
+        return list(matches.items())
+
+    def search(self, query: str, k: int) -> List[Tuple[float, dict]]:
+        """Top-K (score, doc) pairs by BM25 over the weighted fields."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        n_docs = len(self._docs)
+        if not tokens or not n_docs:
+            return []
+
+        if self._norm is None:
+            lengths = np.array(self._lengths, dtype=np.float32)
+            avgdl = self._total_length / n_docs or 1.0
+            self._norm = K1 * (1 - B + B * lengths / avgdl)
+        norm = self._norm
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+
+        for token in tokens:
+            # A token scores through its single best matching term per document
+            best = np.zeros_like(scores)
+            for term, weight in self._expand(token):
+                ids_buf, tf_buf = self._postings[term]
+                ids = np.frombuffer(ids_buf, dtype=np.uint32)
+                tf = np.frombuffer(tf_buf, dtype=np.float32)
+                idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+                contribution = weight * idf * tf * (K1 + 1) / (tf + norm[ids])
+                best[ids] = np.maximum(best[ids], contribution)
+            scores += best
+
+        scores *= np.frombuffer(self._alive, dtype=np.uint8)
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(round(float(scores[i]), 4), self._docs[self._ids[i]]) for i in hits]
+
+    # --- Snapshots ---
+    def snapshot(self) -> dict:
+        """
+        Copy the index into plain bytes. Runs on the event loop so nothing mutates
+        it meanwhile; writing the copy to disk can then happen in a thread.
+        """
+        terms = list(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(self._postings[term][0])
+        return {
+            "ids": orjson.dumps(self._ids),
+            "docs": orjson.dumps(self._docs),
+            "terms": orjson.dumps(terms),
+            "offsets": offsets,
+            "postings": b"".join(self._postings[t][0].tobytes() for t in terms),
+            "tfs": b"".join(self._postings[t][1].tobytes() for t in terms),
+            "lengths": self._lengths.tobytes(),
+            "alive": bytes(self._alive),
+        }
+
+    @staticmethod
+    def write_snapshot(snapshot: dict, path: str):
+        """Save a snapshot() as numpy .npz (no pickle), replacing `path` atomically."""
+        dtypes = {"postings": np.uint32, "tfs": np.float32, "lengths": np.float32}
+        arrays = {
+            key: value if isinstance(value, np.ndarray) else np.frombuffer(value, dtype=dtypes.get(key, np.uint8))
+            for key, value in snapshot.items()
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    def save(self, path: str):
+        self.write_snapshot(self.snapshot(), path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with np.load(path, allow_pickle=False) as data:
+            index = cls()
+            index._ids = orjson.loads(data["ids"].tobytes())
+            index._docs = orjson.loads(data["docs"].tobytes())
+            terms = orjson.loads(data["terms"].tobytes())
+            offsets, postings, tfs = data["offsets"], data["postings"], data["tfs"]
+            for i, term in enumerate(terms):
+                start, end = offsets[i], offsets[i + 1]
+                index._postings[term] = (array("I", postings[start:end].tobytes()), array("f", tfs[start:end].tobytes()))
+            index._lengths = array("f", data["lengths"].tobytes())
+            index._alive = bytearray(data["alive"].tobytes())
+        index._num = {doc_id: num for num, doc_id in enumerate(index._ids) if index._alive[num]}
+        index._total_length = float(sum(index._lengths[n] for n in index._num.values()))
+        index._finish_bulk()
+        index.ready = True
+        return index
+
+    def _swap(self, fresh: "SearchIndex"):
+        for attr in ("_postings", "_ids", "_docs", "_num", "_lengths", "_alive", "_total_length", "_norm", "_vocab"):
+            setattr(self, attr, getattr(fresh, attr))
+        self.ready = True
+
+    async def persist(self, path: str):
+        """Snapshot on the loop, write to disk in a thread."""
+        if not path or not self.ready:
+            return
+        try:
+            await asyncio.to_thread(self.write_snapshot, self.snapshot(), path)
+        except Exception:
+            logger.exception("Could not write search index snapshot %s", path)
+
+    async def restore(self, path: str) -> bool:
+        """Load a snapshot if there is one, so search works before the first rebuild."""
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            self._swap(await asyncio.to_thread(SearchIndex.load, path))
+        except Exception:
+            logger.exception("Ignoring unreadable search index snapshot %s", path)
+            return False
+        return True
+
+    # --- Rebuilds ---
+    async def rebuild(self):
+        """Reload every hackathon from Appwrite and swap the index in one step."""
+        async with self._lock:
+            await self._reload()
+
+    async def ensure_ready(self):
+        """Build on first use if neither a snapshot nor the background refresh has."""
+        if not self.ready:
+            async with self._lock:
+                if not self.ready:
+                    await self._reload()
+
+    async def _reload(self):
+        self._added_during_rebuild = {}
+        try:
+            fresh = SearchIndex()
+            fresh._bulk = True
+            async for doc in get_db_service().iter_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS
+            ):
+                fresh.add(doc)
+
+            # Keep anything created while the reload was in flight
+            for doc in self._added_during_rebuild.values():
+                fresh.add(doc)
+
+            fresh._finish_bulk()
+            self._swap(fresh)
+        finally:
+            self._added_during_rebuild = None
+
+    async def run_refresh_loop(self, interval: float, snapshot_path: Optional[str] = None):
+        """Rebuild now, then every `interval` seconds, snapshotting each build (started from the app lifespan)."""
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Hackathon search index rebuild failed")
+            else:
+                await self.persist(snapshot_path)
+            await asyncio.sleep(interval)
+
+
+search_index = SearchIndex()
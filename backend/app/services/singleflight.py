@@ -0,0 +1,80 @@
+from app.core import upstream
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+import copy
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one in-flight
+    upstream call. Nothing is kept once the call finishes (no TTL, no cache).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, upstream.RequestUpstream]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.calls += 1
+            # Own context: the call belongs to every caller, not just the one that started it
+            context, stats = upstream.shared_context()
+            task = asyncio.get_running_loop().create_task(fn(), context=context)
+            entry = self._inflight[key] = (task, stats)
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.coalesced += 1
+        task, stats = entry
+
+        # shield: one caller disconnecting must not cancel the call for everyone else
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            upstream.charge(stats.calls)
+        # Every caller gets its own copy, since routes mutate documents in place
+        return copy.deepcopy(result)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; callers already got it
+
+    def forget(self, key: Hashable):
+        """Let the next caller start a fresh call (e.g. after a write to that key)."""
+        self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+document_reads = SingleFlight()
+
+registry.gauge_func("singleflight_calls_total", "Document reads that went upstream", lambda: document_reads.calls, "counter")
+registry.gauge_func("singleflight_coalesced_total", "Document reads served by joining an in-flight call", lambda: document_reads.coalesced, "counter")
+
+
+async def get_document_coalesced(collection_id: str, document_id: str) -> dict:
+    """`db.get_document` where identical concurrent reads share one upstream call."""
+    db = get_db_service()
+    return await document_reads.do(
+        (collection_id, document_id),
+        lambda: db.get_document(
+            database_id=settings.APPWRITE_DATABASE_ID,
+            collection_id=collection_id,
+            document_id=document_id
+        )
+    )
+
+
+def forget_document(collection_id: str, document_id: str):
+    document_reads.forget((collection_id, document_id))
@@ -0,0 +1,101 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from app.services.membership import membership
+from app.services.team_mutations import team_mutations
+from app.services.user_directory import get_member_cards
+from appwrite.query import Query
+from typing import List, Optional, Set
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemberSnapshotSync:
+    """
+    Carries profile edits (name, avatar, skills) into the `member_snapshots` of every
+    team the user is on or has asked to join. Runs behind the request and writes
+    through the team mutation queue, so it never races membership changes.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def notify(self, user_id: str):
+        """A user's display data changed; repeated edits before the sync runs collapse into one."""
+        if self._queue is None or user_id in self._pending:
+            return
+        self._pending.add(user_id)
+        self._queue.put_nowait(user_id)
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task, self._queue = None, None
+        self._pending.clear()
+
+    async def _worker(self):
+        while True:
+            user_id = await self._queue.get()
+            # Edits landing while this runs queue another pass
+            self._pending.discard(user_id)
+            try:
+                await self.propagate(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                logger.exception("Member snapshot sync failed for user %s", user_id)
+
+    async def _teams_of(self, user_id: str) -> List[str]:
+        db = get_db_service()
+        requested = db.list_all_documents(
+            database_id=settings.APPWRITE_DATABASE_ID,
+            collection_id=settings.COLLECTION_TEAMS,
+            queries=[Query.equal('join_requests', user_id), Query.select(['$id'])]
+        )
+        if membership.ready:
+            member_of = [t['$id'] for t in membership.teams_of(user_id)]
+            teams = await requested
+        else:
+            member_teams, teams = await asyncio.gather(
+                db.list_all_documents(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_TEAMS,
+                    queries=[Query.equal('members', user_id), Query.select(['$id'])]
+                ),
+                requested
+            )
+            member_of = [t['$id'] for t in member_teams]
+        return list(dict.fromkeys(member_of + [t['$id'] for t in teams]))
+
+    async def propagate(self, user_id: str):
+        card = (await get_member_cards([user_id])).get(user_id)
+        if card is None:
+            return
+        team_ids = await self._teams_of(user_id)
+        results = await asyncio.gather(*[
+            team_mutations.submit(team_id, "refresh", user_id=user_id, card=card) for team_id in team_ids
+        ], return_exceptions=True)
+        self.refreshed += sum(1 for r in results if not isinstance(r, Exception))
+
+
+member_snapshots = MemberSnapshotSync()
+
+registry.gauge_func("member_snapshot_sync_pending", "Users whose profile edits await snapshot propagation", lambda: member_snapshots.pending)
+registry.gauge_func("member_snapshot_refreshes_total", "Team member snapshots refreshed after profile edits", lambda: member_snapshots.refreshed, "counter")
+registry.gauge_func("member_snapshot_sync_failures_total", "Failed member snapshot propagations", lambda: member_snapshots.failed, "counter")
@@ -0,0 +1,196 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.startup import startup
+from app.services.appwrite import get_db_service
+from app.services.gemini import GeminiSummarizer, StubSummarizer
+from typing import Dict, List, Optional, Set
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def description_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """
+    Persistent summary cache keyed by description hash.
+    Everything is held in memory for reads; SQLite only makes it survive restarts.
+    Writes come from several worker threads, so the one connection is used under a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._memory: Dict[str, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (hash TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._memory = dict(self._conn.execute("SELECT hash, summary FROM summaries"))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, key: str) -> Optional[str]:
+        return self._memory.get(key)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory
+
+    async def put(self, key: str, summary: str):
+        self._memory[key] = summary
+        if self._conn is not None:
+            await asyncio.to_thread(self._write, key, summary)
+
+    def _write(self, key: str, summary: str):
+        with self._lock:
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (hash, summary, created_at) VALUES (?, ?, ?)",
+                    (key, summary, time.time())
+                )
+
+
+class SummaryService:
+    """
+    Precomputes AI summaries off the request path.
+    Descriptions are queued (deduplicated by hash) and a fixed pool of workers
+    calls the model, so reads only ever look at the cache.
+    """
+
+    def __init__(self, store: SummaryStore, summarizer, workers: int = 4, queue_size: int = 1000):
+        self.store = store
+        self.summarizer = summarizer
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self.generated = 0
+        self.failed = 0
+
+    def set_summarizer(self, summarizer):
+        """Swap the model client (e.g. StubSummarizer in tests)."""
+        self.summarizer = summarizer
+
+    def get_cached(self, text: Optional[str]) -> Optional[str]:
+        if not text:
+            return None
+        return self.store.get(description_hash(text))
+
+    def enqueue(self, text: Optional[str]) -> bool:
+        """Queue a description for summarizing; no-op if cached, queued or the queue is full."""
+        if not text or self._queue is None:
+            return False
+        key = description_hash(text)
+        if key in self.store or key in self._queued:
+            return False
+        try:
+            self._queue.put_nowait((key, text))
+        except asyncio.QueueFull:
+            return False
+        self._queued.add(key)
+        return True
+
+    async def start(self, backfill: bool = True):
+        self.store.open()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if backfill and not getattr(self.summarizer, "configured", True):
+            # Every item would just fail; new descriptions are still queued once a key is set
+            logger.info("Summary backfill skipped: GEMINI_API_KEY is not set")
+        elif backfill:
+            self._tasks.append(asyncio.create_task(self.backfill()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued.clear()
+        self.store.close()
+
+    async def backfill(self):
+        """Queue every existing hackathon description that has no summary yet."""
+        try:
+            async for doc in get_db_service().iter_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS
+            ):
+                text = doc.get('description')
+                if not text:
+                    continue
+                key = description_hash(text)
+                if key in self.store or key in self._queued:
+                    continue
+                # Blocking put: backfill waits for the workers instead of growing the queue
+                self._queued.add(key)
+                await self._queue.put((key, text))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Summary backfill failed")
+
+    async def _worker(self):
+        while True:
+            key, text = await self._queue.get()
+            try:
+                if key not in self.store:
+                    summary = await self.summarizer.summarize(text)
+                    await self.store.put(key, summary)
+                    self.generated += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                logger.exception("Summary generation failed")
+            finally:
+                self._queued.discard(key)
+                self._queue.task_done()
+
+    async def join(self):
+        """Wait until everything queued so far has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self.store),
+            "queued": len(self._queued),
+            "generated": self.generated,
+            "failed": self.failed,
+        }
+
+
+summaries = SummaryService(
+    store=SummaryStore(settings.SUMMARY_CACHE_PATH),
+    summarizer=StubSummarizer() if settings.SUMMARY_MODEL == "stub" else GeminiSummarizer(),
+    workers=settings.SUMMARY_WORKERS,
+    queue_size=settings.SUMMARY_QUEUE_SIZE,
+)
+
+if hasattr(summaries.summarizer, "prewarm"):
+    startup.on_prewarm(summaries.summarizer.prewarm)
+
+registry.gauge_func("summaries_generated_total", "AI summaries generated", lambda: summaries.generated, "counter")
+registry.gauge_func("summaries_failed_total", "AI summary generations that failed", lambda: summaries.failed, "counter")
+registry.gauge_func("summaries_queued", "Descriptions waiting to be summarized", lambda: len(summaries._queued))
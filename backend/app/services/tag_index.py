@@ -0,0 +1,121 @@
+from app.core.config import settings
+from app.services.appwrite import get_db_service
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def _norm(tag: str) -> str:
+    return tag.strip().lower()
+
+
+class TagIndex:
+    """
+    In-memory inverted index: tag -> hackathon ids.
+    Recommendations walk only the posting lists of the requested tags and rank
+    candidates by overlap weighted with tag rarity (idf), then keep the top K.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, dict] = {}
+        self._doc_tags: Dict[str, Set[str]] = {}
+        self._added_during_rebuild: Optional[Dict[str, dict]] = None
+        self._lock = asyncio.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc: dict):
+        """Insert or replace one hackathon document."""
+        doc_id = doc['$id']
+        self.remove(doc_id)
+
+        tags = {_norm(t) for t in (doc.get('tags') or []) if t}
+        self._docs[doc_id] = doc
+        self._doc_tags[doc_id] = tags
+        for tag in tags:
+            self._postings.setdefault(tag, set()).add(doc_id)
+
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild[doc_id] = doc
+
+    def remove(self, doc_id: str):
+        for tag in self._doc_tags.pop(doc_id, ()):
+            posting = self._postings.get(tag)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[tag]
+        self._docs.pop(doc_id, None)
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self._docs.get(doc_id)
+
+    def documents(self) -> List[dict]:
+        return list(self._docs.values())
+
+    def _idf(self, tag: str) -> float:
+        return math.log(1 + len(self._docs) / len(self._postings[tag]))
+
+    def search(self, tags: Iterable[str], k: int) -> List[Tuple[float, dict]]:
+        """Top-K (score, doc) pairs for docs sharing at least one tag."""
+        scores: Dict[str, float] = {}
+        for tag in {_norm(t) for t in tags if t}:
+            posting = self._postings.get(tag)
+            if not posting:
+                continue
+            weight = self._idf(tag)
+            for doc_id in posting:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(round(score, 4), self._docs[doc_id]) for doc_id, score in top]
+
+    async def rebuild(self):
+        """Reload every hackathon from Appwrite and swap the index in one step."""
+        async with self._lock:
+            await self._reload()
+
+    async def ensure_ready(self):
+        """Build on first use if the background refresh hasn't finished yet."""
+        if not self.ready:
+            async with self._lock:
+                if not self.ready:
+                    await self._reload()
+
+    async def _reload(self):
+        self._added_during_rebuild = {}
+        try:
+            fresh = TagIndex()
+            async for doc in get_db_service().iter_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS
+            ):
+                fresh.add(doc)
+
+            # Keep anything created while the reload was in flight
+            for doc in self._added_during_rebuild.values():
+                fresh.add(doc)
+
+            self._postings, self._docs, self._doc_tags = fresh._postings, fresh._docs, fresh._doc_tags
+            self.ready = True
+        finally:
+            self._added_during_rebuild = None
+
+    async def run_refresh_loop(self, interval: float):
+        """Rebuild now, then every `interval` seconds (started from the app lifespan)."""
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.exception("Hackathon tag index rebuild failed")
+            await asyncio.sleep(interval)
+
+
+hackathon_index = TagIndex()
@@ -0,0 +1,357 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from app.services.cache import TTLCache
+from app.services.matching import build_vocabulary, encode_skills, team_requirements, user_skills
+from appwrite.query import Query
+from typing import Callable, Dict, List, Optional, Sequence, Set
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Progress = Callable[[str, float], None]
+
+# Candidates per team considered by local search, and per pick when forming new teams
+LOCAL_SEARCH_CANDIDATES = 32
+LOCAL_SEARCH_PASSES = 3
+NEW_TEAM_WINDOW = 256
+TEAM_CHUNK = 512
+
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+
+def optimize_teams(
+    participants: Sequence[dict],
+    teams: Sequence[dict],
+    member_skills: Dict[str, List[str]],
+    min_team_size: int,
+    max_team_size: int,
+    progress: Progress = _no_progress,
+) -> dict:
+    """
+    Suggest a whole hackathon's teams at once.
+
+    1. Greedy: repeatedly give the open team with the largest uncovered skill gap
+       the solo participant who closes most of it (max coverage, lazily updated).
+    2. Teams still below `min_team_size` are topped up with the best overall fits.
+    3. Local search: swap an assignee for an unassigned candidate while that
+       covers more of the team's requirements.
+    4. Leftover solos are grouped into new teams of `max_team_size` with as many
+       distinct skills as possible.
+    """
+    started = time.perf_counter()
+    n, m = len(participants), len(teams)
+    p_skills = [user_skills(p) for p in participants]
+    t_reqs = [team_requirements(t) for t in teams]
+    t_members = [list(t.get('members') or []) for t in teams]
+    t_have = [[s for uid in members for s in member_skills.get(uid, [])] for members in t_members]
+
+    vocab = build_vocabulary(p_skills, t_reqs, t_have)
+    P = encode_skills(p_skills, vocab).astype(np.float32)          # participant x skill
+    required = encode_skills(t_reqs, vocab)                         # team x skill
+    covered = encode_skills(t_have, vocab) & required               # already on the team
+    capacity = np.array([max(0, max_team_size - len(ms)) for ms in t_members], dtype=np.int64)
+    available = np.ones(n, dtype=bool)
+    assigned: List[List[int]] = [[] for _ in range(m)]
+    coverage_before = int(covered.sum())
+
+    # --- 1. Greedy skill-gap assignment ---
+    progress("assigning", 0.0)
+    total_slots = int(capacity.sum())
+    needs = required & ~covered
+    # Holders of each skill: a team's gains only touch people with a skill it still needs
+    by_skill = [np.flatnonzero(column) for column in P.T.astype(bool)]
+    # Ties go to the narrowest profile, keeping generalists for later gaps and new teams
+    tie_break = P.sum(axis=1) / (2 * (len(vocab) + 1))
+
+    def best_for(t: int):
+        cols = np.flatnonzero(needs[t])
+        if not len(cols):
+            return 0, 0
+        ids = np.concatenate([by_skill[c] for c in cols])
+        ids = ids[available[ids]]
+        if not len(ids):
+            return 0, 0
+        counts = np.bincount(ids)
+        p = int((counts - tie_break[:len(counts)]).argmax())
+        return int(counts[p]), p
+
+    if n and m:
+        best_gain = np.zeros(m, dtype=np.int64)
+        best_idx = np.full(m, -1, dtype=np.int64)
+        for t in np.flatnonzero(capacity > 0):
+            best_gain[t], best_idx[t] = best_for(t)
+        filled = 0
+        while True:
+            t = int(best_gain.argmax())
+            if best_gain[t] <= 0:
+                break
+            p = int(best_idx[t])
+            assigned[t].append(p)
+            available[p] = False
+            capacity[t] -= 1
+            covered[t] |= P[p].astype(bool) & required[t]
+            needs[t] = required[t] & ~covered[t]
+
+            # Only this team's gap and the teams that wanted the same person change
+            stale = np.flatnonzero(best_idx == p)
+            if t not in stale:
+                stale = np.append(stale, t)
+            for u in stale:
+                best_gain[u], best_idx[u] = best_for(u) if capacity[u] > 0 else (0, -1)
+
+            filled += 1
+            if filled % 256 == 0:
+                progress("assigning", filled / max(total_slots, 1))
+
+    # --- 2. Minimum team sizes ---
+    progress("filling", 0.0)
+    req_f = required.astype(np.float32)
+    for t in range(m):
+        while len(t_members[t]) + len(assigned[t]) < min_team_size and capacity[t] > 0 and available.any():
+            fit = P @ req_f[t]
+            fit[~available] = -1
+            p = int(fit.argmax())
+            assigned[t].append(p)
+            available[p] = False
+            capacity[t] -= 1
+            covered[t] |= P[p].astype(bool) & required[t]
+
+    # --- 3. Local search (replace an assignee with a better unassigned candidate) ---
+    progress("local_search", 0.0)
+    teams_with_assignees = [t for t in range(m) if assigned[t]]
+    if teams_with_assignees and available.any():
+        rows = np.array(teams_with_assignees)
+        candidates: Dict[int, np.ndarray] = {}
+        for start in range(0, len(rows), TEAM_CHUNK):
+            chunk = rows[start:start + TEAM_CHUNK]
+            fit = P @ req_f[chunk].T
+            fit[~available] = -1
+            k = min(LOCAL_SEARCH_CANDIDATES, n)
+            top = np.argpartition(-fit, k - 1, axis=0)[:k]
+            for j, t in enumerate(chunk):
+                candidates[int(t)] = top[:, j][fit[top[:, j], j] > 0]
+
+        base_have = encode_skills(t_have, vocab) & required
+        for sweep in range(LOCAL_SEARCH_PASSES):
+            improved = 0
+            for i, t in enumerate(teams_with_assignees):
+                for slot, a in enumerate(list(assigned[t])):
+                    others = [q for q in assigned[t] if q != a]
+                    rest = base_have[t].copy()
+                    for q in others:
+                        rest |= P[q].astype(bool)
+                    residual = (required[t] & ~rest).astype(np.float32)
+                    current = float(P[a] @ residual)
+                    pool = candidates[t][available[candidates[t]]]
+                    if not len(pool):
+                        continue
+                    gains = P[pool] @ residual
+                    best = int(gains.argmax())
+                    if gains[best] > current:
+                        b = int(pool[best])
+                        assigned[t][slot] = b
+                        available[a], available[b] = True, False
+                        covered[t] = rest | (P[b].astype(bool) & required[t])
+                        improved += 1
+                if i % 256 == 0:
+                    progress("local_search", (sweep + i / len(teams_with_assignees)) / LOCAL_SEARCH_PASSES)
+            if not improved:
+                break
+
+    # --- 4. New teams from leftover solos ---
+    progress("new_teams", 0.0)
+    leftovers = np.flatnonzero(available)
+    # Most versatile people seed teams first
+    leftovers = leftovers[np.argsort(-P[leftovers].sum(axis=1), kind="stable")]
+    new_teams: List[List[int]] = []
+    remaining = leftovers
+    size = max(max_team_size, 1)
+    while len(remaining) >= max(min_team_size, 1):
+        team = [int(remaining[0])]
+        union = P[remaining[0]].astype(bool)
+        used = {0}
+        while len(team) < size and len(used) < len(remaining):
+            window = [j for j in range(min(len(remaining), NEW_TEAM_WINDOW + len(used))) if j not in used][:NEW_TEAM_WINDOW]
+            gains = P[remaining[window]] @ (~union).astype(np.float32)
+            pick = window[int(gains.argmax())]
+            used.add(pick)
+            team.append(int(remaining[pick]))
+            union |= P[remaining[pick]].astype(bool)
+        new_teams.append(team)
+        keep = np.ones(len(remaining), dtype=bool)
+        keep[list(used)] = False
+        remaining = remaining[keep]
+        if len(new_teams) % 64 == 0:
+            progress("new_teams", 1 - len(remaining) / max(len(leftovers), 1))
+
+    inverse = {i: s for s, i in vocab.items()}
+
+    def skill_names(row: np.ndarray) -> List[str]:
+        return [inverse[i] for i in np.flatnonzero(row)]
+
+    def person(i: int) -> dict:
+        return {"userId": participants[i]['$id'], "username": participants[i].get('username')}
+
+    assignments = []
+    for t in range(m):
+        if not assigned[t]:
+            continue
+        assignments.append({
+            "team_id": teams[t]['$id'],
+            "name": teams[t].get('name'),
+            "add_members": [
+                {**person(p), "covers": skill_names(P[p].astype(bool) & required[t])} for p in assigned[t]
+            ],
+            "size": len(t_members[t]) + len(assigned[t]),
+            "still_missing": skill_names(required[t] & ~covered[t]),
+        })
+
+    suggested_new = [
+        {"members": [person(p) for p in team], "skills": skill_names(P[team].astype(bool).any(axis=0))}
+        for team in new_teams
+    ]
+    placed = {p for t in range(m) for p in assigned[t]} | {p for team in new_teams for p in team}
+
+    progress("done", 1.0)
+    return {
+        "assignments": assignments,
+        "new_teams": suggested_new,
+        "unassigned": [person(i) for i in range(n) if i not in placed],
+        "stats": {
+            "participants": n,
+            "open_teams": m,
+            "assigned_to_existing": sum(len(a) for a in assigned),
+            "new_teams": len(new_teams),
+            "requirements_covered_before": coverage_before,
+            "requirements_covered_after": int(covered.sum()),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+
+
+class FormationJob:
+    __slots__ = ("id", "hackathon_id", "status", "stage", "progress", "result", "error", "created_at", "finished_at")
+
+    def __init__(self, hackathon_id: str):
+        self.id = uuid.uuid4().hex
+        self.hackathon_id = hackathon_id
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def report(self, stage: str, fraction: float):
+        # Called from the worker thread; plain attribute writes only
+        self.stage = stage
+        self.progress = round(min(max(fraction, 0.0), 1.0), 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "hackathon_id": self.hackathon_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class TeamFormationJobs:
+    """
+    Background team-formation runs, one at a time per hackathon. Data is loaded
+    on the event loop; the optimizer itself runs in a thread so requests keep flowing.
+    """
+
+    def __init__(self, ttl: float):
+        self._jobs = TTLCache(maxsize=1000, ttl=ttl)
+        self._running: Dict[str, FormationJob] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.completed = 0
+        self.failed = 0
+
+    def start(self, hackathon_id: str) -> FormationJob:
+        """Start a run, or return the one already in progress for this hackathon."""
+        job = self._running.get(hackathon_id)
+        if job is not None:
+            return job
+        job = FormationJob(hackathon_id)
+        self._jobs.set(job.id, job)
+        self._running[hackathon_id] = job
+        # Fresh context: the job outlives the request and must not count against its upstream budget
+        task = asyncio.get_running_loop().create_task(self._run(job), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[FormationJob]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: FormationJob):
+        job.status = "running"
+        try:
+            job.report("loading", 0.0)
+            participants, teams, member_skills, min_size, max_size = await self._load(job.hackathon_id)
+            job.result = await asyncio.to_thread(
+                optimize_teams, participants, teams, member_skills, min_size, max_size, job.report
+            )
+            job.status = "done"
+            self.completed += 1
+        except Exception as e:
+            logger.exception("Team formation failed for hackathon %s", job.hackathon_id)
+            job.status, job.error = "failed", str(e)
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+            self._running.pop(job.hackathon_id, None)
+
+    async def _load(self, hackathon_id: str):
+        db = get_db_service()
+        hackathon, teams, profiles = await asyncio.gather(
+            db.get_document(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_HACKATHONS,
+                document_id=hackathon_id
+            ),
+            db.list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_TEAMS,
+                queries=[Query.equal('hackathon_id', hackathon_id)]
+            ),
+            db.list_all_documents(
+                database_id=settings.APPWRITE_DATABASE_ID,
+                collection_id=settings.COLLECTION_USERS,
+                queries=[Query.equal('role', 'participant')]
+            )
+        )
+        min_size = int(hackathon.get('min_team_size') or 1)
+        max_size = int(hackathon.get('max_team_size') or 4)
+
+        # Everyone already on a team in this hackathon is not solo
+        taken = {uid for t in teams for uid in (t.get('members') or [])}
+        solos = [p for p in profiles if p['$id'] not in taken]
+        open_teams = [
+            t for t in teams
+            if t.get('status', 'open') == 'open' and len(t.get('members') or []) < max_size
+        ]
+        member_skills = {p['$id']: user_skills(p) for p in profiles if p['$id'] in taken}
+        return solos, open_teams, member_skills, min_size, max_size
+
+
+team_formation = TeamFormationJobs(ttl=settings.TEAM_FORMATION_JOB_TTL)
+
+registry.gauge_func("team_formation_running", "Team formation jobs in progress", lambda: len(team_formation._running))
+registry.gauge_func("team_formation_completed_total", "Team formation jobs finished", lambda: team_formation.completed, "counter")
+registry.gauge_func("team_formation_failed_total", "Team formation jobs failed", lambda: team_formation.failed, "counter")
@@ -0,0 +1,273 @@
+from app.core import upstream
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.appwrite import get_db_service
+from app.services.events import team_events
+from app.services.membership import membership
+from app.services.singleflight import forget_document
+from app.services.user_directory import get_member_cards
+from app.services.versions import forget_etag
+from app.utils.member_snapshots import decode_snapshots, encode_snapshots
+from appwrite.exception import AppwriteException
+from fastapi import HTTPException
+from typing import Dict, List, Tuple
+import asyncio
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Live feed event per operation (GET /api/teams/events)
+EVENT_TYPES = {
+    "join": "join_requested",
+    "approve": "member_approved",
+    "reject": "request_rejected",
+    "leave": "member_left",
+    "refresh": "member_updated",
+}
+
+
+class _Op:
+    __slots__ = ("kind", "args", "future", "calls")
+
+    def __init__(self, kind: str, args: dict, future: asyncio.Future):
+        self.kind = kind
+        self.args = args
+        self.future = future
+        # Appwrite calls of the batch this op was applied in
+        self.calls: List[upstream.UpstreamCall] = []
+
+
+class TeamMutationQueue:
+    """
+    Per-team actor for membership writes (join / approve / reject / leave, and
+    member snapshot refreshes). Operations for one team are applied strictly in
+    arrival order, and each batch window is one fresh read of the team plus ONE
+    update_document, so concurrent requests never overwrite each other. The team is
+    re-read for every batch rather than cached, so batches from other workers are
+    built on too. The same write keeps the team's `member_snapshots` in step.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._queues: Dict[str, List[_Op]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self.batches = 0
+        self.ops = 0
+
+    async def submit(self, team_id: str, kind: str, **args) -> str:
+        """Queue an operation and wait until its batch is written; returns the result message."""
+        op = _Op(kind, args, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(team_id, []).append(op)
+        self._ensure_worker(team_id)
+        try:
+            return await op.future
+        finally:
+            upstream.charge(op.calls)
+
+    async def submit_many(self, team_id: str, ops: List[Tuple[str, dict]]) -> List[object]:
+        """
+        Queue several operations at once, so they land in the same batch (one read,
+        one write). Returns each op's message or exception, in order.
+        """
+        loop = asyncio.get_running_loop()
+        queued = [_Op(kind, args, loop.create_future()) for kind, args in ops]
+        self._queues.setdefault(team_id, []).extend(queued)
+        self._ensure_worker(team_id)
+        try:
+            return await asyncio.gather(*[op.future for op in queued], return_exceptions=True)
+        finally:
+            for op in queued:
+                upstream.charge(op.calls)
+
+    def _ensure_worker(self, team_id: str):
+        if team_id not in self._workers:
+            # Outlives the request that started it; each batch's calls are charged to that batch's ops
+            self._workers[team_id] = asyncio.get_running_loop().create_task(
+                self._drain(team_id), context=contextvars.Context())
+
+    async def _drain(self, team_id: str):
+        try:
+            while self._queues.get(team_id):
+                # Let the burst pile up, then take everything queued so far
+                await asyncio.sleep(self.window)
+                batch = self._queues.pop(team_id)
+                context, stats = upstream.shared_context()
+                for op in batch:
+                    op.calls = stats.calls
+                try:
+                    await asyncio.get_running_loop().create_task(self._apply_batch(team_id, batch), context=context)
+                except Exception as e:
+                    logger.exception("Team %s mutation batch failed", team_id)
+                    self._fail(batch, HTTPException(status_code=500, detail=str(e)))
+                finally:
+                    # Cancelled (shutdown) or failed: nobody in the batch is left waiting
+                    self._fail(batch, HTTPException(status_code=503, detail="Team update interrupted"))
+        finally:
+            self._workers.pop(team_id, None)
+
+    async def _load(self, team_id: str) -> dict:
+        # Always the stored copy: another worker may have written since our last batch
+        return await get_db_service().get_document(
+            database_id=settings.APPWRITE_DATABASE_ID,
+            collection_id=settings.COLLECTION_TEAMS,
+            document_id=team_id
+        )
+
+    async def _apply_batch(self, team_id: str, batch: List[_Op]):
+        self.batches += 1
+        self.ops += len(batch)
+
+        try:
+            team = await self._load(team_id)
+        except Exception as e:
+            if isinstance(e, AppwriteException) and e.code == 404:
+                error = HTTPException(status_code=404, detail="Team not found")
+            else:
+                error = HTTPException(status_code=500, detail=str(e))
+            self._fail(batch, error)
+            return
+
+        members = list(team.get('members', []))
+        requests = list(team.get('join_requests') or [])
+        cards = decode_snapshots(team.get('member_snapshots'))
+        applied: List[Tuple[_Op, str]] = []
+        disbanded = False
+
+        for op in batch:
+            if disbanded:
+                self._fail([op], HTTPException(status_code=404, detail="Team not found"))
+                continue
+            try:
+                message, disbanded = self._apply(op, team.get('leader_id'), members, requests, cards)
+            except HTTPException as e:
+                self._fail([op], e)
+                continue
+            except Exception as e:
+                self._fail([op], HTTPException(status_code=500, detail=str(e)))
+                continue
+            applied.append((op, message))
+
+        if not applied:
+            return
+
+        if disbanded:
+            # Nothing but the leaves outlives the team: report the rest against the final state
+            gone = [op for op, _ in applied if op.kind != "leave"]
+            self._fail(gone, HTTPException(status_code=404, detail="Team not found"))
+            applied = [(op, message) for op, message in applied if op.kind == "leave"]
+
+        db = get_db_service()
+        try:
+            if disbanded:
+                await db.delete_document(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_TEAMS,
+                    document_id=team_id
+                )
+                membership.remove(team_id)
+            else:
+                # New faces get a card: one batched lookup for the whole burst
+                missing = [uid for uid in members + requests if uid not in cards]
+                if missing:
+                    cards.update(await get_member_cards(missing))
+                updated = await db.update_document(
+                    database_id=settings.APPWRITE_DATABASE_ID,
+                    collection_id=settings.COLLECTION_TEAMS,
+                    document_id=team_id,
+                    data={
+                        "members": members,
+                        "join_requests": requests,
+                        "member_snapshots": encode_snapshots(cards, members + requests)
+                    }
+                )
+                membership.put(updated)
+            forget_document(settings.COLLECTION_TEAMS, team_id)
+            forget_etag(settings.COLLECTION_TEAMS, team_id)
+        except Exception as e:
+            self._fail([op for op, _ in applied], HTTPException(status_code=500, detail=str(e)))
+            return
+
+        for op, message in applied:
+            if not op.future.done():
+                op.future.set_result(message)
+        if disbanded:
+            team_events.publish({"type": "team_deleted", "team_id": team_id, "hackathon_id": team.get('hackathon_id')})
+            return
+        for op, _ in applied:
+            team_events.publish(self._event(op, team, cards))
+
+    @staticmethod
+    def _apply(op: _Op, leader_id: str, members: List[str], requests: List[str],
+               cards: Dict[str, dict]) -> Tuple[str, bool]:
+        """Apply one op to the in-memory lists / cards. Returns (message, team_disbanded)."""
+        if op.kind == "join":
+            user_id = op.args['user_id']
+            if user_id in members:
+                raise HTTPException(status_code=400, detail="Already in team")
+            if user_id in requests:
+                raise HTTPException(status_code=400, detail="Request already pending")
+            requests.append(user_id)
+            return "Join request sent", False
+
+        if op.kind in ("approve", "reject"):
+            if leader_id != op.args['leader_id']:
+                raise HTTPException(status_code=403, detail=f"Only leader can {op.kind} requests")
+            target = op.args['target_user_id']
+            if target not in requests:
+                raise HTTPException(status_code=404, detail="Request not found")
+            requests.remove(target)
+            if op.kind == "approve":
+                members.append(target)
+                return "Member approved", False
+            return "Request rejected", False
+
+        if op.kind == "leave":
+            user_id = op.args['user_id']
+            if user_id not in members:
+                raise HTTPException(status_code=400, detail="Not in team")
+            # Leader leaving? Disband team
+            if user_id == leader_id:
+                return "Leader left. Team disbanded.", True
+            members.remove(user_id)
+            return "Left team", False
+
+        if op.kind == "refresh":
+            # Profile changed elsewhere: replace the card if they are still around
+            user_id = op.args['user_id']
+            if user_id not in members and user_id not in requests:
+                raise HTTPException(status_code=404, detail="Not in team")
+            cards[user_id] = op.args['card']
+            return "Member snapshot refreshed", False
+
+        raise ValueError(f"Unknown team operation: {op.kind}")
+
+    @staticmethod
+    def _event(op: _Op, team: dict, cards: Dict[str, dict]) -> dict:
+        """Small diff describing one applied op, for clients following the team or its hackathon."""
+        user_id = op.args.get('user_id') or op.args.get('target_user_id')
+        event = {"type": EVENT_TYPES[op.kind], "team_id": team['$id'], "hackathon_id": team.get('hackathon_id'), "user_id": user_id}
+        if op.kind in ("join", "approve", "refresh") and user_id in cards:
+            event["user"] = {"userId": user_id, **cards[user_id]}
+        return event
+
+    @staticmethod
+    def _fail(ops: List[_Op], error: Exception):
+        for op in ops:
+            if not op.future.done():
+                op.future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "active_teams": len(self._workers),
+            "batches": self.batches,
+            "ops": self.ops,
+        }
+
+
+team_mutations = TeamMutationQueue(
+    window=settings.TEAM_WRITE_WINDOW_MS / 1000,
+)
+
+registry.gauge_func("team_mutation_batches_total", "Team membership write batches flushed", lambda: team_mutations.batches, "counter")
+registry.gauge_func("team_mutation_ops_total", "Team membership operations applied", lambda: team_mutations.ops, "counter")
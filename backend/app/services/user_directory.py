@@ -0,0 +1,149 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.upstream import UpstreamBudgetExceeded
+from app.services.appwrite import get_db_service, get_users_service
+from app.services.cache import TTLCache
+from app.services.loader import BatchLoader
+from app.utils.member_snapshots import member_card
+from appwrite.exception import AppwriteException
+from appwrite.query import Query
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import weakref
+
+# Display data (name) per user id, shared across requests
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+registry.gauge_func("user_cache_hits_total", "User display cache hits", lambda: user_cache.hits, "counter")
+registry.gauge_func("user_cache_misses_total", "User display cache misses", lambda: user_cache.misses, "counter")
+registry.gauge_func("user_cache_size", "User display cache entries", lambda: len(user_cache))
+
+# Member cards (name, avatar, key skills) for team snapshots
+card_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+# One loader per event loop (uvicorn runs one loop per worker)
+_loaders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BatchLoader]" = weakref.WeakKeyDictionary()
+
+# Flipped off if the Users API rejects `$id` list queries, so we stop retrying them
+_list_by_id_supported = True
+
+
+async def _fetch_users_individually(user_ids: List[str]) -> Dict[str, dict]:
+    users_service = get_users_service()
+    slots = asyncio.Semaphore(settings.USER_LOADER_CONCURRENCY)
+
+    async def fetch_user_safe(uid):
+        async with slots:
+            try:
+                return await users_service.get(uid)
+            except Exception:
+                return None
+
+    users_data = await asyncio.gather(*[fetch_user_safe(uid) for uid in user_ids])
+    return {u['$id']: u for u in users_data if u}
+
+
+async def _fetch_users(user_ids: List[str]) -> Dict[str, dict]:
+    """Batch fn: one `Query.equal('$id', [...])` list call per chunk of ids."""
+    global _list_by_id_supported
+
+    if _list_by_id_supported:
+        try:
+            result = await get_users_service().list(queries=[
+                Query.equal('$id', user_ids),
+                Query.limit(len(user_ids))
+            ])
+            return {u['$id']: u for u in result['users']}
+        except AppwriteException as e:
+            if e.code != 400:
+                raise
+            _list_by_id_supported = False
+
+    return await _fetch_users_individually(user_ids)
+
+
+def get_user_loader() -> BatchLoader:
+    loop = asyncio.get_running_loop()
+    loader = _loaders.get(loop)
+    if loader is None:
+        loader = BatchLoader(
+            _fetch_users,
+            max_batch_size=settings.USER_LOADER_BATCH_SIZE,
+            max_concurrency=settings.USER_LOADER_CONCURRENCY,
+        )
+        _loaders[loop] = loader
+    return loader
+
+
+async def get_user_display(user_id: str) -> Optional[dict]:
+    """Return cached display data for a user, batching the Appwrite lookup on a miss."""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    # The batch is shared with other requests and runs outside their budgets, so whatever
+    # goes wrong in it is a missing name here, never another request's error
+    try:
+        u = await get_user_loader().load(user_id)
+    except Exception:
+        return None
+    if not u:
+        return None
+
+    display = {"name": u['name']}
+    user_cache.set(user_id, display)
+    return display
+
+
+async def get_user_names(user_ids: Iterable[str]) -> Dict[str, str]:
+    """Resolve user ids to names; unknown/failed ids are left out."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+
+    displays = await asyncio.gather(*[get_user_display(uid) for uid in user_ids])
+    return {uid: d['name'] for uid, d in zip(user_ids, displays) if d}
+
+
+async def _fetch_profiles(user_ids: List[str]) -> Dict[str, dict]:
+    """Avatar / skills from the profile documents, one list call."""
+    try:
+        result = await get_db_service().list_documents(
+            database_id=settings.APPWRITE_DATABASE_ID,
+            collection_id=settings.COLLECTION_USERS,
+            queries=[
+                Query.equal('$id', user_ids),
+                Query.select(['$id', 'avatar_url', 'skills']),
+                Query.limit(len(user_ids))
+            ]
+        )
+    except UpstreamBudgetExceeded:
+        raise
+    except Exception:
+        return {}
+    return {p['$id']: p for p in result['documents']}
+
+
+async def get_member_cards(user_ids: Iterable[str]) -> Dict[str, dict]:
+    """Display cards for team snapshots; unknown users are left out."""
+    cards, missing = {}, []
+    for uid in dict.fromkeys(user_ids):
+        cached = card_cache.get(uid)
+        if cached is not None:
+            cards[uid] = cached
+        else:
+            missing.append(uid)
+    if not missing:
+        return cards
+
+    names, profiles = await asyncio.gather(get_user_names(missing), _fetch_profiles(missing))
+    for uid in missing:
+        if uid in names:
+            cards[uid] = member_card(names[uid], profiles.get(uid))
+            card_cache.set(uid, cards[uid])
+    return cards
+
+
+def invalidate_user(user_id: str):
+    user_cache.invalidate(user_id)
+    card_cache.invalidate(user_id)
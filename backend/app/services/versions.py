@@ -0,0 +1,24 @@
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.cache import TTLCache
+from typing import Optional
+
+# Last ETag served per (collection, document id). Lets a matching If-None-Match be
+# answered with 304 before any upstream fetch; every local write drops the entry,
+# and the TTL bounds staleness for writes made elsewhere (console, other workers).
+etag_cache = TTLCache(maxsize=settings.ETAG_CACHE_SIZE, ttl=settings.ETAG_CACHE_TTL)
+
+registry.gauge_func("etag_cache_hits_total", "Conditional GETs resolved from the local ETag cache", lambda: etag_cache.hits, "counter")
+registry.gauge_func("etag_cache_misses_total", "Conditional GETs that had to fetch upstream", lambda: etag_cache.misses, "counter")
+
+
+def cached_etag(collection_id: str, document_id: str) -> Optional[str]:
+    return etag_cache.get((collection_id, document_id))
+
+
+def remember_etag(collection_id: str, document_id: str, etag: str):
+    etag_cache.set((collection_id, document_id), etag)
+
+
+def forget_etag(collection_id: str, document_id: str):
+    etag_cache.invalidate((collection_id, document_id))
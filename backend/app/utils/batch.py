@@ -0,0 +1,24 @@
+from app.utils.pagination import MAX_PAGE_SIZE
+from fastapi import HTTPException
+from typing import List, Optional
+
+
+def parse_ids(ids: Optional[str], max_ids: int = MAX_PAGE_SIZE) -> List[str]:
+    """`?ids=a,b,a` -> ["a", "b"]: order kept, duplicates dropped, at most `max_ids`."""
+    parsed = list(dict.fromkeys(i.strip() for i in (ids or "").split(",") if i.strip()))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must list at least one id")
+    if len(parsed) > max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {max_ids} ids per request")
+    return parsed
+
+
+def item_ok(item_id: str, **fields) -> dict:
+    return {"id": item_id, "status": 200, **fields}
+
+
+def item_error(item_id: str, error: Exception) -> dict:
+    """One failed item of a batch, shaped like the error the single-item endpoint would return."""
+    if isinstance(error, HTTPException):
+        return {"id": item_id, "status": error.status_code, "error": error.detail}
+    return {"id": item_id, "status": 500, "error": str(error)}
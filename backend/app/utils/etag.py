@@ -0,0 +1,46 @@
+from app.utils.responses import FastJSONResponse
+from fastapi import Request, Response
+from hashlib import blake2b
+from typing import Any, Iterable, Optional
+
+# Polling clients (and browsers) must revalidate every time; the 304 keeps that cheap
+CACHE_CONTROL = "no-cache"
+
+
+def _digest(parts: Iterable[str]) -> str:
+    h = blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+    return f'"{h.hexdigest()}"'
+
+
+def document_etag(doc: dict, *extra: Optional[str]) -> str:
+    """Strong ETag from `$id` + `$updatedAt`, plus anything else the response embeds (e.g. resolved names)."""
+    return _digest([doc.get('$id', ''), doc.get('$updatedAt', ''), *(e or '' for e in extra)])
+
+
+def list_etag(docs: Iterable[dict], *extra: Optional[str]) -> str:
+    """Combined digest over every document's `$id:$updatedAt`, in order."""
+    return _digest([*(f"{d.get('$id', '')}:{d.get('$updatedAt', '')}" for d in docs), *(e or '' for e in extra)])
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so `W/"x"` matches `"x"`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def conditional_response(request: Request, etag: str, content: Any) -> Response:
+    """304 when the client already has `etag`, otherwise the JSON body tagged with it."""
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(content, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
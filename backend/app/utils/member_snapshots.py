@@ -0,0 +1,46 @@
+"""
+Denormalized member display data kept on each team document (`member_snapshots`):
+a compact JSON object {user_id: {"name", "avatar", "skills"}} covering members
+and pending requesters, so team reads need no per-user lookups.
+"""
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import orjson
+
+KEY_SKILLS = 3
+
+
+def member_card(name: str, profile: Optional[dict]) -> dict:
+    profile = profile or {}
+    return {
+        "name": name,
+        "avatar": profile.get('avatar_url') or "",
+        "skills": (profile.get('skills') or [])[:KEY_SKILLS],
+    }
+
+
+def decode_snapshots(value: Optional[str]) -> Dict[str, dict]:
+    """Parse a team's `member_snapshots`; missing or unreadable -> {} (readers fall back to lookups)."""
+    if not value:
+        return {}
+    try:
+        cards = orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return {}
+    return cards if isinstance(cards, dict) else {}
+
+
+def encode_snapshots(cards: Dict[str, dict], user_ids: Iterable[str]) -> str:
+    """Serialize the cards of `user_ids` only, so people who left drop out."""
+    return orjson.dumps({uid: cards[uid] for uid in user_ids if uid in cards}).decode()
+
+
+def without_snapshots(teams: List[dict]) -> List[dict]:
+    """Drop the raw `member_snapshots` string from teams going out in a response (in place)."""
+    for team in teams:
+        team.pop('member_snapshots', None)
+    return teams
+
+
+async def without_snapshots_pages(pages: AsyncIterator[List[dict]]) -> AsyncIterator[List[dict]]:
+    async for page in pages:
+        yield without_snapshots(page)
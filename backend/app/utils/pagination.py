@@ -0,0 +1,39 @@
+from appwrite.query import Query
+from app.utils.responses import dumps
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
+
+DEFAULT_PAGE_SIZE = 25  # Appwrite's own default page
+MAX_PAGE_SIZE = 100
+
+
+def page_queries(
+    limit: int,
+    cursor: Optional[str] = None,
+    queries: Optional[List[str]] = None,
+    select: Optional[List[str]] = None
+) -> List[str]:
+    """Append `limit` / `cursorAfter` (and `select`, if projecting) to a query list."""
+    queries = list(queries or [])
+    queries.append(Query.limit(limit))
+    if cursor:
+        queries.append(Query.cursor_after(cursor))
+    if select:
+        queries.append(Query.select(select))
+    return queries
+
+
+def next_cursor(documents: List[dict], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when this was the last one."""
+    if len(documents) < limit:
+        return None
+    return documents[-1]['$id']
+
+
+def ndjson_response(pages: AsyncIterator[List[dict]]) -> StreamingResponse:
+    """Stream documents as newline-delimited JSON, one page at a time."""
+    async def body():
+        async for page in pages:
+            yield b"".join(dumps(doc) + b"\n" for doc in page)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
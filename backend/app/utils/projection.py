@@ -0,0 +1,48 @@
+from fastapi import HTTPException
+from typing import AsyncIterator, Iterable, List, Optional
+
+# Appwrite bookkeeping the frontend never reads
+INTERNAL_ATTRIBUTES = ("$permissions", "$databaseId", "$collectionId", "$sequence")
+SYSTEM_ATTRIBUTES = ("$id", "$createdAt", "$updatedAt")
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ()) -> Optional[List[str]]:
+    """
+    `?fields=name,tags` -> attribute list for Query.select, or None for whole documents.
+    `$id` (cursor) and `always` (whatever the route itself reads) are always selected.
+    """
+    if not fields:
+        return None
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(allowed) | set(SYSTEM_ATTRIBUTES)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    selected = ["$id"]
+    for f in [*always, *requested]:
+        if f not in selected:
+            selected.append(f)
+    return selected
+
+
+def project(doc: dict, select: Optional[Iterable[str]]) -> dict:
+    """Query.select applied to a document we already hold (system attributes stay)."""
+    if not select:
+        return doc
+    keep = set(select) | set(SYSTEM_ATTRIBUTES)
+    return {k: v for k, v in doc.items() if k in keep}
+
+
+def lean(documents: List[dict]) -> List[dict]:
+    """Drop Appwrite-internal attributes from list payloads (in place)."""
+    for doc in documents:
+        for key in INTERNAL_ATTRIBUTES:
+            doc.pop(key, None)
+    return documents
+
+
+async def lean_pages(pages: AsyncIterator[List[dict]]) -> AsyncIterator[List[dict]]:
+    async for page in pages:
+        yield lean(page)
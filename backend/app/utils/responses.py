@@ -0,0 +1,19 @@
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+
+def dumps(content: Any) -> bytes:
+    # Anything orjson can't encode natively (e.g. Decimal) falls back to str, like json.dumps(default=str)
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-rendered JSON for large list payloads.
+    Returned directly, so FastAPI skips jsonable_encoder / response_model validation;
+    the route's response_model is then only used for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,277 @@
+"""
+Benchmark harness: drives the FastAPI app in-process against FakeAppwrite.
+
+    python -m tests.bench --concurrency 32 --requests 500 --latency 0.02 --jitter 0.005 \\
+        --output bench.json [--baseline main.json --max-regression 0.15]
+
+Each scenario runs `--requests` HTTP requests with `--concurrency` workers and
+reports throughput, p50/p95/p99 latency and Appwrite calls per request (from
+the X-Upstream-Calls header). With --baseline, exits 1 if p95 latency or
+throughput regressed by more than --max-regression, or if any scenario makes
+more upstream calls per request than before.
+"""
+from tests.fake_appwrite import FakeAppwrite, SKILLS, TAGS, TEST_ENV, configure_env, install, upstream_calls
+
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import httpx
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ScenarioStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.upstream_calls = 0
+        self.elapsed = 0.0
+
+    def record(self, response: httpx.Response, latency: float):
+        self.latencies.append(latency)
+        self.statuses[response.status_code] += 1
+        self.upstream_calls += upstream_calls(response)
+
+    def report(self) -> dict:
+        latencies = sorted(self.latencies)
+        n = len(latencies)
+        return {
+            "requests": n,
+            "errors": sum(c for status, c in self.statuses.items() if status >= 500),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "throughput_rps": round(n / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / n * 1000, 3) if n else 0.0,
+                "p50": round(percentile(latencies, 50) * 1000, 3),
+                "p95": round(percentile(latencies, 95) * 1000, 3),
+                "p99": round(percentile(latencies, 99) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3) if n else 0.0,
+            },
+            "upstream_calls_per_request": round(self.upstream_calls / n, 3) if n else 0.0,
+        }
+
+
+class Session:
+    """HTTP client that records every response into the current scenario's stats."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Optional[ScenarioStats]):
+        self.client = client
+        self.stats = stats
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        if self.stats is not None:
+            self.stats.record(response, time.perf_counter() - start)
+        return response
+
+
+Scenario = Callable[[Session, random.Random, FakeAppwrite], Awaitable[None]]
+
+
+# --- Scenarios (one unit of work each) ---
+async def list_teams(session: Session, rng: random.Random, fake: FakeAppwrite):
+    await session.request("GET", "/api/teams/", params={"limit": 25})
+
+
+async def get_team(session: Session, rng: random.Random, fake: FakeAppwrite):
+    team_id = rng.choice(list(fake.collection(TEST_ENV["COLLECTION_TEAMS"])))
+    await session.request("GET", f"/api/teams/{team_id}")
+
+
+async def recommendations(session: Session, rng: random.Random, fake: FakeAppwrite):
+    await session.request("POST", "/api/hackathons/recommendations", json=rng.sample(TAGS, 2))
+
+
+async def login(session: Session, rng: random.Random, fake: FakeAppwrite):
+    await session.request("POST", "/api/auth/login", json={"id": rng.choice(list(fake.users))})
+
+
+async def join_approve_burst(session: Session, rng: random.Random, fake: FakeAppwrite, size: int = 8):
+    """A new team receives `size` concurrent join requests, then the leader approves them all at once."""
+    leader, *joiners = rng.sample(list(fake.users), size + 1)
+    created = await session.request("POST", "/api/teams/", json={
+        "hackathon_id": rng.choice(list(fake.collection(TEST_ENV["COLLECTION_HACKATHONS"]))),
+        "name": "Bench Team",
+        "description": "Created by the benchmark",
+        "leader_id": leader,
+        "looking_for": rng.sample(SKILLS, 2),
+    })
+    if created.status_code != 200:
+        return
+    team_id = created.json()["data"]["$id"]
+
+    await asyncio.gather(*[
+        session.request("POST", "/api/teams/join", json={"team_id": team_id, "user_id": uid})
+        for uid in joiners
+    ])
+    await asyncio.gather(*[
+        session.request("POST", "/api/teams/approve", json={"team_id": team_id, "leader_id": leader, "target_user_id": uid})
+        for uid in joiners
+    ])
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "list_teams": list_teams,
+    "get_team": get_team,
+    "recommendations": recommendations,
+    "login": login,
+    "join_approve_burst": join_approve_burst,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, fake: FakeAppwrite, scenario: Scenario,
+                       iterations: int, concurrency: int, seed: int, warmup: int = 0) -> ScenarioStats:
+    rng = random.Random(seed)
+
+    warm = Session(client, None)
+    for _ in range(warmup):
+        await scenario(warm, rng, fake)
+
+    stats = ScenarioStats()
+    session = Session(client, stats)
+    remaining = iterations
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await scenario(session, rng, fake)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def run_benchmark(
+    scenarios: List[str],
+    requests: int = 200,
+    concurrency: int = 16,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    warmup: int = 5,
+    seed: int = 0,
+    dataset: Optional[dict] = None,
+) -> dict:
+    """Run the given scenarios against a freshly seeded fake and return the JSON report."""
+    from app.main import app
+
+    fake = FakeAppwrite(seed=seed)
+    fake.seed(**(dataset or {}))
+    install(fake)
+    # Seed first, then turn on the network model
+    fake.latency, fake.jitter, fake.error_rate = latency, jitter, error_rate
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in scenarios:
+                stats = await run_scenario(client, fake, SCENARIOS[name], requests, concurrency, seed, warmup)
+                results[name] = stats.report()
+
+    return {
+        "config": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "warmup": warmup,
+            "seed": seed,
+            "dataset": dataset or {},
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "scenarios": results,
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Human-readable regressions of `report` against `baseline` (empty list = OK)."""
+    problems = []
+    for name, current in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if current["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + max_regression):
+            problems.append(f"{name}: p95 {before['latency_ms']['p95']}ms -> {current['latency_ms']['p95']}ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            problems.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["upstream_calls_per_request"] > before["upstream_calls_per_request"]:
+            problems.append(
+                f"{name}: upstream calls/request {before['upstream_calls_per_request']} -> {current['upstream_calls_per_request']}")
+    return problems
+
+
+def print_table(report: dict):
+    print(f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/req':>11}{'errors':>8}")
+    for name, r in report["scenarios"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<20}{r['throughput_rps']:>10}{lat['p50']:>10}{lat['p95']:>10}{lat['p99']:>10}"
+              f"{r['upstream_calls_per_request']:>11}{r['errors']:>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API against an in-process Appwrite fake")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Units of work per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake Appwrite latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- uniform jitter on latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 503 per call")
+    parser.add_argument("--warmup", type=int, default=5, help="Unrecorded units of work before each scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--hackathons", type=int, default=100)
+    parser.add_argument("--teams", type=int, default=1000)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="Allowed relative p95/throughput regression")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(
+        args.scenarios,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        warmup=args.warmup,
+        seed=args.seed,
+        dataset={"users": args.users, "hackathons": args.hackathons, "teams": args.teams},
+    ))
+    print_table(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    configure_env()
+    sys.exit(main())
@@ -0,0 +1,38 @@
+from tests.fake_appwrite import FakeAppwrite, configure_env, install
+
+# Settings are read at import time, so this has to happen before `app` is imported.
+# Strict budgets turn any extra Appwrite round-trip into a failing request.
+configure_env(UPSTREAM_BUDGET_STRICT="true")
+
+from fastapi.testclient import TestClient
+from app.main import app
+import pytest
+
+
+@pytest.fixture(scope="session")
+def fake():
+    fake = FakeAppwrite(seed=0)
+    fake.seed(users=60, hackathons=20, teams=40)
+    install(fake)
+    return fake
+
+
+@pytest.fixture(scope="session")
+def client(fake):
+    # One app lifespan for the whole run: background jobs and caches live on its event loop
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def indexes_ready(client):
+    """Wait for the lifespan's first hackathon / membership index loads."""
+    from app.services.membership import membership
+    from app.services.tag_index import hackathon_index
+    import time
+
+    for _ in range(500):
+        if membership.ready and hackathon_index.ready:
+            return
+        time.sleep(0.01)
+    raise TimeoutError("indexes did not load")
@@ -0,0 +1,343 @@
+"""
+In-process stand-in for the Appwrite Databases / Users REST APIs.
+
+Plugged in as the httpx transport of the shared Appwrite client, so requests go
+through the real AsyncAppwriteClient (query encoding, error mapping, upstream
+accounting) but never leave the process. Per-call latency, jitter and error
+rate are configurable to make benchmarks resemble a real deployment.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+import asyncio
+import json
+import os
+import random
+import re
+import uuid
+
+import httpx
+
+DATABASE_ID = "hackconnect"
+
+TEST_ENV = {
+    "APPWRITE_ENDPOINT": "http://appwrite.fake/v1",
+    "APPWRITE_PROJECT_ID": "test-project",
+    "APPWRITE_API_KEY": "test-key",
+    "APPWRITE_DATABASE_ID": DATABASE_ID,
+    "COLLECTION_HACKATHONS": "hackathons",
+    "COLLECTION_USERS": "users",
+    "COLLECTION_TEAMS": "teams",
+    "COLLECTION_MESSAGES": "messages",
+    "COLLECTION_CHAT_READS": "chat_reads",
+    "SUMMARY_MODEL": "stub",
+    "SUMMARY_CACHE_PATH": ":memory:",
+    "SEARCH_INDEX_SNAPSHOT_PATH": "",
+}
+
+SKILLS = [
+    "Python", "React", "Go", "Rust", "Design", "Figma", "ML", "Data", "DevOps", "Solidity",
+    "Node", "Flutter", "Swift", "Kotlin", "SQL", "Pitching", "Unity", "Security", "Cloud", "NLP",
+]
+TAGS = ["AI", "Web3", "Health", "Climate", "FinTech", "EdTech", "Gaming", "Social", "IoT", "Open Source"]
+CITIES = ["Delhi", "Bengaluru", "Mumbai", "Berlin", "London", "San Francisco", "Online"]
+
+_DOCUMENTS = re.compile(r"^/databases/([^/]+)/collections/([^/]+)/documents(?:/([^/]+))?$")
+_USERS = re.compile(r"^/users(?:/([^/]+))?(?:/(name|password))?$")
+
+
+def configure_env(**overrides):
+    """Point settings at the fake. Must run before `app` is imported."""
+    os.environ.update({**TEST_ENV, **overrides})
+
+
+def install(fake: "FakeAppwrite"):
+    """Route every Appwrite client built from now on through `fake`."""
+    from app.services.appwrite import use_transport
+    use_transport(fake)
+
+
+def upstream_calls(response) -> int:
+    """Appwrite round-trips the app made while serving `response`."""
+    return int(response.headers["x-upstream-calls"])
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _new_id(requested: Optional[str]) -> str:
+    if not requested or requested == "unique()":
+        return uuid.uuid4().hex[:20]
+    return requested
+
+
+class FakeAppwriteError(Exception):
+    def __init__(self, code: int, message: str, type: str):
+        super().__init__(message)
+        self.code, self.message, self.type = code, message, type
+
+
+def _not_found(type: str, what: str) -> FakeAppwriteError:
+    return FakeAppwriteError(404, f"{what} with the requested ID could not be found.", type)
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    method, attribute, values = query["method"], query.get("attribute"), query.get("values", [])
+    value = doc.get(attribute)
+    if method == "equal":
+        if isinstance(value, list):
+            return any(v in value for v in values)
+        return value in values
+    if method == "notEqual":
+        return value not in values
+    if method == "contains":
+        return isinstance(value, list) and any(v in value for v in values)
+    if method == "search":
+        return bool(value) and values[0].lower() in str(value).lower()
+    raise FakeAppwriteError(400, f"Invalid query: Query method not supported: {method}", "general_query_invalid")
+
+
+def _apply_queries(docs: List[dict], queries: List[dict]) -> dict:
+    """Filter, order, paginate and project the way Appwrite list endpoints do."""
+    limit, offset, cursor, select, order = 25, 0, None, None, None
+    filters = []
+    for q in queries:
+        method = q["method"]
+        if method == "limit":
+            limit = q["values"][0]
+        elif method == "offset":
+            offset = q["values"][0]
+        elif method == "cursorAfter":
+            cursor = q["values"][0]
+        elif method == "select":
+            select = q["values"]
+        elif method in ("orderAsc", "orderDesc"):
+            order = (q["attribute"], method == "orderDesc")
+        else:
+            filters.append(q)
+
+    docs = [d for d in docs if all(_matches(d, q) for q in filters)]
+    total = len(docs)
+    if order:
+        docs.sort(key=lambda d: (d.get(order[0]) is None, d.get(order[0])), reverse=order[1])
+    if cursor is not None:
+        ids = [d["$id"] for d in docs]
+        if cursor not in ids:
+            raise FakeAppwriteError(400, f'Document with id "{cursor}" not found for cursor.', "general_cursor_not_found")
+        docs = docs[ids.index(cursor) + 1:]
+    docs = docs[offset:offset + limit]
+    if select:
+        docs = [{k: v for k, v in d.items() if k.startswith("$") or k in select} for d in docs]
+    return {"total": total, "documents": [dict(d) for d in docs]}
+
+
+class FakeAppwrite(httpx.AsyncBaseTransport):
+    """
+    Every call sleeps `latency +/- jitter` seconds and fails with 503 with
+    probability `error_rate`. `calls` counts requests by operation name.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.collections: Dict[str, Dict[str, dict]] = {}
+        self.users: Dict[str, dict] = {}
+        self.calls: Counter = Counter()
+
+    def collection(self, collection_id: str) -> Dict[str, dict]:
+        return self.collections.setdefault(collection_id, {})
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    # --- Transport ---
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        path = request.url.path
+        prefix = httpx.URL(TEST_ENV["APPWRITE_ENDPOINT"]).path
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+
+        try:
+            if self.error_rate and self.random.random() < self.error_rate:
+                raise FakeAppwriteError(503, "Service unavailable (injected).", "general_service_unavailable")
+            status, body = self._dispatch(request, path)
+        except FakeAppwriteError as e:
+            status, body = e.code, {"message": e.message, "code": e.code, "type": e.type, "version": "fake"}
+
+        if body is None:
+            return httpx.Response(status)
+        return httpx.Response(status, json=body)
+
+    def _dispatch(self, request: httpx.Request, path: str):
+        method = request.method
+        params = parse_qsl(request.url.query.decode())
+        queries = [json.loads(v) for k, v in params if k.startswith("queries")]
+        body = json.loads(request.content) if request.content else {}
+
+        m = _DOCUMENTS.match(path)
+        if m:
+            _, collection_id, document_id = m.groups()
+            docs = self.collection(collection_id)
+            if document_id is None:
+                if method == "GET":
+                    self.calls[f"databases.list_documents({collection_id})"] += 1
+                    return 200, _apply_queries(list(docs.values()), queries)
+                if method == "POST" and "documents" in body:
+                    self.calls[f"databases.create_documents({collection_id})"] += 1
+                    created = [self.create_document(collection_id, d.get("$id"), {k: v for k, v in d.items() if k != "$id"})
+                               for d in body["documents"]]
+                    return 201, {"total": len(created), "documents": created}
+                if method == "POST":
+                    self.calls[f"databases.create_document({collection_id})"] += 1
+                    return 201, self.create_document(collection_id, body.get("documentId"), body.get("data") or {})
+                if method == "PUT":
+                    self.calls[f"databases.upsert_documents({collection_id})"] += 1
+                    upserted = []
+                    for d in body["documents"]:
+                        data = {k: v for k, v in d.items() if k != "$id"}
+                        if d["$id"] in docs:
+                            docs[d["$id"]].update(data)
+                            docs[d["$id"]]["$updatedAt"] = _now()
+                            upserted.append(dict(docs[d["$id"]]))
+                        else:
+                            upserted.append(self.create_document(collection_id, d["$id"], data))
+                    return 200, {"total": len(upserted), "documents": upserted}
+            else:
+                verb = {"GET": "get", "PATCH": "update", "DELETE": "delete"}.get(method, method.lower())
+                self.calls[f"databases.{verb}_document({collection_id})"] += 1
+                if document_id not in docs:
+                    raise _not_found("document_not_found", "Document")
+                if method == "GET":
+                    return 200, dict(docs[document_id])
+                if method == "PATCH":
+                    docs[document_id].update(body.get("data") or {})
+                    docs[document_id]["$updatedAt"] = _now()
+                    return 200, dict(docs[document_id])
+                if method == "DELETE":
+                    del docs[document_id]
+                    return 204, None
+
+        m = _USERS.match(path)
+        if m:
+            user_id, field = m.groups()
+            if user_id is None:
+                if method == "GET":
+                    self.calls["users.list"] += 1
+                    users = list(self.users.values())
+                    search = dict(params).get("search")
+                    if search:
+                        users = [u for u in users if search.lower() in f"{u['name']} {u['email']}".lower()]
+                    result = _apply_queries(users, queries)
+                    return 200, {"total": result["total"], "users": result["documents"]}
+                if method == "POST":
+                    self.calls["users.create"] += 1
+                    return 201, self.create_user(body.get("userId"), body.get("email"), body.get("name"), body.get("password"))
+            else:
+                self.calls[f"users.{'get' if method == 'GET' else 'update_' + (field or '')}"] += 1
+                if user_id not in self.users:
+                    raise _not_found("user_not_found", "User")
+                user = self.users[user_id]
+                if method == "GET":
+                    return 200, {k: v for k, v in user.items() if k != "password"}
+                if method == "PATCH" and field:
+                    user[field] = body[field]
+                    user["$updatedAt"] = _now()
+                    return 200, {k: v for k, v in user.items() if k != "password"}
+
+        raise FakeAppwriteError(404, f"Route not found: {method} {path}", "general_route_not_found")
+
+    # --- Direct data access (seeding / assertions) ---
+    def create_document(self, collection_id: str, document_id: Optional[str], data: dict) -> dict:
+        docs = self.collection(collection_id)
+        document_id = _new_id(document_id)
+        if document_id in docs:
+            raise FakeAppwriteError(409, "Document with the requested ID already exists.", "document_already_exists")
+        now = _now()
+        doc = {
+            "$id": document_id,
+            "$collectionId": collection_id,
+            "$databaseId": DATABASE_ID,
+            "$createdAt": now,
+            "$updatedAt": now,
+            "$permissions": [],
+            **data,
+        }
+        docs[document_id] = doc
+        return dict(doc)
+
+    def create_user(self, user_id: Optional[str], email: str, name: str, password: Optional[str] = None) -> dict:
+        user_id = _new_id(user_id)
+        if user_id in self.users or any(u["email"] == email for u in self.users.values()):
+            raise FakeAppwriteError(409, "A user with the same id, email, or phone already exists.", "user_already_exists")
+        now = _now()
+        self.users[user_id] = {
+            "$id": user_id,
+            "$createdAt": now,
+            "$updatedAt": now,
+            "name": name,
+            "email": email,
+            "status": True,
+            "password": password,
+        }
+        return {k: v for k, v in self.users[user_id].items() if k != "password"}
+
+    def seed(self, users: int = 200, hackathons: int = 50, teams: int = 300):
+        """Deterministic (per `seed`) dataset: profiles with skills, tagged hackathons, open teams."""
+        rng = self.random
+        hackathons_col, users_col, teams_col = (
+            TEST_ENV["COLLECTION_HACKATHONS"], TEST_ENV["COLLECTION_USERS"], TEST_ENV["COLLECTION_TEAMS"])
+
+        user_ids = [f"user{i:05d}" for i in range(users)]
+        for i, uid in enumerate(user_ids):
+            self.create_user(uid, f"{uid}@example.com", f"User {i}")
+            self.create_document(users_col, uid, {
+                "username": uid,
+                "account_id": uid,
+                "role": "participant",
+                "bio": f"Hi! I'm User {i}",
+                "skills": rng.sample(SKILLS, rng.randint(1, 4)),
+                "tech_stack": rng.sample(SKILLS, rng.randint(0, 3)),
+                "xp": rng.randint(0, 5000),
+                "reputation_score": round(rng.random() * 5, 2),
+            })
+
+        hackathon_ids = [f"hack{i:04d}" for i in range(hackathons)]
+        for i, hid in enumerate(hackathon_ids):
+            tags = rng.sample(TAGS, rng.randint(1, 3))
+            self.create_document(hackathons_col, hid, {
+                "name": f"{tags[0]} Hack {i}",
+                "tagline": f"Build for {' & '.join(tags)}",
+                "description": f"A {rng.choice(['weekend', '48 hour', 'week-long'])} hackathon about {', '.join(tags)}. "
+                               f"Teams of up to four build and demo. Prizes for the best projects.",
+                "start_date": "2026-01-10T09:00:00.000+00:00",
+                "end_date": "2026-01-12T18:00:00.000+00:00",
+                "location": rng.choice(CITIES),
+                "tags": tags,
+                "status": "published",
+                "min_team_size": 1,
+                "max_team_size": 4,
+                "mode": rng.choice(["online", "offline", "hybrid"]),
+            })
+
+        for i in range(teams):
+            people = rng.sample(user_ids, min(len(user_ids), rng.randint(2, 6)))
+            size = rng.randint(1, min(3, len(people)))
+            self.create_document(teams_col, f"team{i:05d}", {
+                "name": f"Team {i}",
+                "description": "We ship fast.",
+                "hackathon_id": rng.choice(hackathon_ids),
+                "leader_id": people[0],
+                "members": people[:size],
+                "join_requests": people[size:],
+                "looking_for": rng.sample(SKILLS, rng.randint(1, 3)),
+                "tech_stack": rng.sample(SKILLS, rng.randint(1, 3)),
+                "status": "open",
+            })
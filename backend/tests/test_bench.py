@@ -0,0 +1,29 @@
+from tests.bench import compare
+import json
+import subprocess
+import sys
+
+
+def test_bench_writes_report(tmp_path):
+    output = tmp_path / "bench.json"
+    # Own process: the harness runs its own app lifespan and fake
+    subprocess.run(
+        [sys.executable, "-m", "tests.bench", "--requests", "4", "--concurrency", "2", "--warmup", "0",
+         "--users", "30", "--hackathons", "10", "--teams", "20", "--output", str(output)],
+        check=True, capture_output=True,
+    )
+
+    report = json.loads(output.read_text())
+    assert set(report["scenarios"]) == {"list_teams", "get_team", "recommendations", "login", "join_approve_burst"}
+    for result in report["scenarios"].values():
+        assert result["errors"] == 0
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+
+
+def test_compare_flags_regressions():
+    def report(p95, rps, calls):
+        return {"scenarios": {"get_team": {
+            "latency_ms": {"p95": p95}, "throughput_rps": rps, "upstream_calls_per_request": calls}}}
+
+    assert compare(report(10, 100, 2), report(10, 100, 2), 0.1) == []
+    assert len(compare(report(20, 50, 3), report(10, 100, 2), 0.1)) == 3
@@ -0,0 +1,32 @@
+from tests.fake_appwrite import upstream_calls
+
+
+def test_login_returns_merged_profile(client):
+    response = client.post("/api/auth/login", json={"id": "user00001"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == "user00001"
+    assert body["email"] == "user00001@example.com"
+    assert body["name"] == "User 1"
+    assert upstream_calls(response) == 2
+
+
+def test_login_unknown_user_is_unauthorized(client):
+    response = client.post("/api/auth/login", json={"id": "nobody"})
+
+    assert response.status_code == 401
+
+
+def test_register_creates_account_and_profile(client, fake):
+    response = client.post("/api/auth/register", json={
+        "email": "new@example.com",
+        "password": "correct-horse",
+        "name": "New Person",
+        "username": "newbie",
+    })
+
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+    assert fake.users[user_id]["name"] == "New Person"
+    assert fake.collection("users")[user_id]["username"] == "newbie"
@@ -0,0 +1,91 @@
+from tests.fake_appwrite import upstream_calls
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _team_channel(client, leader_id: str, member_id: str) -> str:
+    team_id = client.post("/api/teams/", json={
+        "hackathon_id": "hack0001", "name": "Chat Team", "description": "Chatting", "leader_id": leader_id,
+    }).json()["data"]["$id"]
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": member_id})
+    client.post("/api/teams/approve", json={"team_id": team_id, "leader_id": leader_id, "target_user_id": member_id})
+    return f"team:{team_id}"
+
+
+def _send(client, channel_id: str, sender_id: str, content: str):
+    return client.post(f"/api/chat/channels/{channel_id}/messages", json={"sender_id": sender_id, "content": content})
+
+
+def test_burst_is_stored_with_one_bulk_write_and_read_back_in_order(client, fake):
+    channel = _team_channel(client, "user00052", "user00053")
+    before = fake.calls["databases.create_documents(messages)"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda i: _send(client, channel, "user00052", f"msg {i}"), range(8)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert fake.calls["databases.create_documents(messages)"] - before < 8
+
+    response = client.get(f"/api/chat/channels/{channel}/messages", params={"user_id": "user00053", "limit": 5})
+    page = response.json()
+    ids = [m["id"] for m in page["messages"]]
+    assert ids == sorted(ids, reverse=True)
+    assert page["messages"][0]["senderName"] == "User 52"
+    # Recent history comes from memory; only the access check may go upstream
+    assert upstream_calls(response) <= 1
+
+    older = client.get(f"/api/chat/channels/{channel}/messages",
+                       params={"user_id": "user00053", "limit": 5, "before": page["next_cursor"]}).json()
+    assert len(older["messages"]) == 3 and older["next_cursor"] is None
+    assert sorted(m["content"] for m in page["messages"] + older["messages"]) == sorted(f"msg {i}" for i in range(8))
+
+
+def test_team_channel_is_members_only(client):
+    channel = _team_channel(client, "user00054", "user00055")
+
+    assert _send(client, channel, "user00056", "hi").status_code == 403
+    assert client.get(f"/api/chat/channels/{channel}/messages", params={"user_id": "user00056"}).status_code == 403
+
+
+def test_unread_counts_follow_sends_and_reads(client):
+    channel = _team_channel(client, "user00057", "user00058")
+    for i in range(3):
+        _send(client, channel, "user00057", f"hello {i}")
+
+    def unread(user_id):
+        channels = client.get("/api/chat/channels", params={"user_id": user_id}).json()["channels"]
+        return next(c["unreadCount"] for c in channels if c["id"] == channel)
+
+    assert unread("user00058") == 3
+    assert unread("user00057") == 0
+
+    client.post(f"/api/chat/channels/{channel}/read", json={"user_id": "user00058"})
+    assert unread("user00058") == 0
+
+
+def test_direct_message_shows_up_for_the_recipient(client):
+    channel = "direct:user00058:user00059"
+    assert _send(client, channel, "user00059", "ping").status_code == 200
+
+    channels = client.get("/api/chat/channels", params={"user_id": "user00058"}).json()["channels"]
+    direct = next(c for c in channels if c["id"] == channel)
+    assert direct["name"] == "User 59"
+    assert direct["unreadCount"] == 1
+    assert direct["lastMessage"]["content"] == "ping"
+
+    assert _send(client, "direct:user00059:user00058", "user00059", "x").status_code == 400
+    assert _send(client, channel, "user00056", "x").status_code == 403
+
+
+def test_hackathon_channel_needs_a_team_in_that_hackathon(client):
+    _team_channel(client, "user00050", "user00051")  # both on a team in hack0001
+
+    assert client.get("/api/chat/channels/hackathon:hack0001/messages", params={"user_id": "user00051"}).status_code == 200
+    assert _send(client, "hackathon:hack0001", "user00049", "hi").status_code == 403
+    assert _send(client, "hackathon:nope", "user00050", "hi").status_code == 404
+
+
+def test_live_stream_follows_a_bounded_number_of_channels(client):
+    ids = ",".join(f"direct:user00001:user{i:05d}" for i in range(2, 40))
+    response = client.get("/api/chat/events", params={"user_id": "user00001", "channel_ids": ids})
+
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+from tests.fake_appwrite import upstream_calls
+
+
+def test_team_304_is_served_without_upstream_fetch(client):
+    first = client.get("/api/teams/team00007")
+    etag = first.headers["etag"]
+
+    again = client.get("/api/teams/team00007", headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+    assert upstream_calls(again) == 0
+
+
+def test_team_write_changes_the_etag(client, fake):
+    etag = client.get("/api/teams/team00008").headers["etag"]
+    joiner = next(u for u in fake.users if u not in fake.collection("teams")["team00008"]["members"]
+                  and u not in fake.collection("teams")["team00008"]["join_requests"])
+    client.post("/api/teams/join", json={"team_id": "team00008", "user_id": joiner})
+
+    response = client.get("/api/teams/team00008", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_user_profile_conditional_get(client):
+    etag = client.get("/api/users/user00003").headers["etag"]
+
+    assert client.get("/api/users/user00003", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+
+    client.put("/api/users/user00003", json={"bio": "changed"})
+    assert client.get("/api/users/user00003", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_list_304_saves_the_body_not_the_fetch(client):
+    params = {"limit": 10, "fields": "name,tags"}
+    etag = client.get("/api/hackathons/", params=params).headers["etag"]
+
+    response = client.get("/api/hackathons/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert upstream_calls(response) == 1
+
+    # Different projection, different representation
+    other = client.get("/api/hackathons/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
@@ -0,0 +1,118 @@
+from tests.fake_appwrite import upstream_calls
+import time
+
+
+def test_recommendations_rank_by_tag_overlap(client, fake):
+    response = client.post("/api/hackathons/recommendations", json=["AI", "Climate"])
+
+    assert response.status_code == 200
+    documents = response.json()["documents"]
+    assert documents
+    scores = [d["match_score"] for d in documents]
+    assert scores == sorted(scores, reverse=True)
+    assert all({"AI", "Climate"} & set(d["tags"]) for d in documents)
+
+
+def test_recommendations_are_served_from_the_index(client):
+    client.post("/api/hackathons/recommendations", json=["AI"])
+    response = client.post("/api/hackathons/recommendations", json=["Web3"])
+
+    assert upstream_calls(response) == 0
+
+
+def test_get_hackathon(client):
+    response = client.get("/api/hackathons/hack0001")
+
+    assert response.status_code == 200
+    assert response.json()["data"]["$id"] == "hack0001"
+    assert upstream_calls(response) == 1
+
+
+def test_list_hackathons_pages(client):
+    body = client.get("/api/hackathons/", params={"limit": 5}).json()
+
+    assert len(body["documents"]) == 5
+    assert body["next_cursor"] == body["documents"][-1]["$id"]
+
+
+def test_list_hackathons_projects_fields(client, fake):
+    fake.reset_calls()
+    response = client.get("/api/hackathons/", params={"limit": 5, "fields": "name,tags"})
+
+    assert response.status_code == 200
+    for doc in response.json()["documents"]:
+        assert set(doc) <= {"$id", "$createdAt", "$updatedAt", "name", "tags"}
+        assert "description" not in doc
+
+
+def test_list_hackathons_drops_internal_attributes(client):
+    doc = client.get("/api/hackathons/", params={"limit": 1}).json()["documents"][0]
+
+    assert "description" in doc
+    assert "$permissions" not in doc and "$collectionId" not in doc
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/hackathons/", params={"fields": "name,password"})
+
+    assert response.status_code == 400
+    assert upstream_calls(response) == 0
+
+
+def test_search_ranks_matching_hackathons(client, fake):
+    target = fake.collection("hackathons")["hack0004"]
+
+    response = client.get("/api/hackathons/search", params={"q": target["name"]})
+
+    assert response.status_code == 200
+    documents = response.json()["documents"]
+    assert documents[0]["$id"] == "hack0004"
+    scores = [d["search_score"] for d in documents]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_tolerates_typos_and_prefixes(client):
+    assert client.get("/api/hackathons/search", params={"q": "hackaton"}).json()["count"] > 0
+    assert client.get("/api/hackathons/search", params={"q": "hackat"}).json()["count"] > 0
+
+
+def test_created_hackathon_is_searchable_immediately(client):
+    client.post("/api/hackathons/", json={
+        "name": "Quantum Beginners Jam",
+        "description": "Your first qubit, no physics degree needed.",
+        "start_date": "2026-03-01T09:00:00",
+        "end_date": "2026-03-02T18:00:00",
+        "location": "Pune",
+        "tags": ["Quantum"],
+    })
+
+    response = client.get("/api/hackathons/search", params={"q": "quantum beginner pune"})
+
+    assert response.json()["documents"][0]["name"] == "Quantum Beginners Jam"
+    assert upstream_calls(response) == 0
+
+
+def test_team_formation_job(client):
+    started = client.post("/api/hackathons/hack0002/team-formation")
+
+    assert started.status_code == 202
+    job_id = started.json()["job_id"]
+    for _ in range(200):
+        job = client.get(f"/api/hackathons/hack0002/team-formation/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.01)
+
+    assert job["status"] == "done", job["error"]
+    assert job["progress"] == 1.0
+    assert job["result"]["stats"]["participants"] > 0
+    assert client.get(f"/api/hackathons/hack0001/team-formation/{job_id}").status_code == 404
+
+
+def test_get_many_hackathons(client):
+    response = client.get("/api/hackathons/", params={"ids": "hack0003,missing,hack0001", "fields": "name"})
+
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [("hack0003", 200), ("missing", 404), ("hack0001", 200)]
+    assert set(results[0]["data"]) <= {"$id", "$createdAt", "$updatedAt", "name"}
+    assert upstream_calls(response) == 1
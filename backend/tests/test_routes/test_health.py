@@ -0,0 +1,52 @@
+from app.services.health import upstream_health
+from tests.fake_appwrite import upstream_calls
+
+
+def test_liveness(client):
+    response = client.get("/healthz")
+
+    assert response.status_code == 200
+    assert upstream_calls(response) == 0
+
+
+def test_readiness_answers_from_the_background_check(client, fake):
+    client.portal.call(upstream_health.check)
+    fake.reset_calls()
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert upstream_calls(response) == 0
+    assert not fake.calls
+
+
+def test_readiness_fails_when_upstream_is_down(client, fake):
+    fake.error_rate = 1.0
+    try:
+        client.portal.call(upstream_health.check)
+    finally:
+        fake.error_rate = 0.0
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["upstream"]["error"]
+    assert client.get("/").json()["status"].startswith("❌")
+
+    client.portal.call(upstream_health.check)
+    assert client.get("/readyz").status_code == 200
+
+
+def test_startup_report(client):
+    client.get("/healthz")
+
+    report = client.get("/startupz").json()
+
+    assert 0 < report["imported_ms"] <= report["ready_ms"] <= report["first_request_ms"]
+    assert set(report["imports_ms"]) == {f"app.api.routes.{r}" for r in ("hackathons", "auth", "users", "teams", "chat")}
+
+
+def test_ai_sdk_is_not_imported_at_startup(client):
+    import sys
+
+    assert "google.generativeai" not in sys.modules
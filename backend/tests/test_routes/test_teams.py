@@ -0,0 +1,278 @@
+from tests.fake_appwrite import upstream_calls
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+import asyncio
+import time
+
+
+def _create_team(client, leader_id: str, name: str = "Test Team") -> str:
+    response = client.post("/api/teams/", json={
+        "hackathon_id": "hack0000",
+        "name": name,
+        "description": "Testing",
+        "leader_id": leader_id,
+        "looking_for": ["Design"],
+    })
+    assert response.status_code == 200
+    return response.json()["data"]["$id"]
+
+
+def test_list_teams_enriches_names_in_two_round_trips(client):
+    response = client.get("/api/teams/", params={"limit": 25})
+
+    assert response.status_code == 200
+    teams = response.json()["documents"]
+    assert len(teams) == 25
+    for team in teams:
+        assert [m["userId"] for m in team["members_enriched"]] == team["members"]
+        assert all(m["name"].startswith("User ") for m in team["members_enriched"])
+    # One page of teams + at most one batched users.list
+    assert upstream_calls(response) <= 2
+
+
+def test_list_teams_cursor_walks_every_team_once(client, fake):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/teams/", params=params).json()
+        seen += [t["$id"] for t in body["documents"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == list(fake.collection("teams"))
+
+
+def test_get_team(client, fake):
+    team = fake.collection("teams")["team00003"]
+    response = client.get("/api/teams/team00003")
+
+    assert response.status_code == 200
+    assert response.json()["members"] == team["members"]
+    assert upstream_calls(response) <= 2
+
+
+def test_join_burst_is_written_once_then_approved(client, fake):
+    team_id = _create_team(client, "user00010")
+    joiners = [f"user{i:05d}" for i in range(20, 30)]
+    fake.reset_calls()
+
+    with ThreadPoolExecutor(len(joiners)) as pool:
+        responses = list(pool.map(
+            lambda uid: client.post("/api/teams/join", json={"team_id": team_id, "user_id": uid}), joiners))
+    assert all(r.json()["message"] == "Join request sent" for r in responses)
+    # Concurrent joins are coalesced instead of one read-modify-write each
+    assert fake.calls["databases.update_document(teams)"] < len(joiners)
+    assert sorted(fake.collection("teams")[team_id]["join_requests"]) == joiners
+
+    with ThreadPoolExecutor(len(joiners)) as pool:
+        responses = list(pool.map(
+            lambda uid: client.post("/api/teams/approve", json={
+                "team_id": team_id, "leader_id": "user00010", "target_user_id": uid}), joiners))
+    assert all(r.json()["message"] == "Member approved" for r in responses)
+
+    team = fake.collection("teams")[team_id]
+    assert sorted(team["members"]) == ["user00010"] + joiners
+    assert team["join_requests"] == []
+
+
+def test_staggered_join_burst_charges_each_request_its_own_batch(client, fake):
+    team_id = _create_team(client, "user00009")
+    joiners = [f"user{i:05d}" for i in range(60) if i != 9]
+    fake.reset_calls()
+
+    def join(i):
+        # Arrivals spread over several batch windows
+        time.sleep(i * 0.002)
+        return client.post("/api/teams/join", json={"team_id": team_id, "user_id": joiners[i]})
+
+    with ThreadPoolExecutor(len(joiners)) as pool:
+        responses = list(pool.map(join, range(len(joiners))))
+
+    assert [r.status_code for r in responses] == [200] * len(joiners)
+    # Each join pays for the batch it was written in, not for every batch the worker ran
+    assert all(1 <= upstream_calls(r) <= 4 for r in responses)
+    assert fake.calls["databases.update_document(teams)"] > 1
+    assert sorted(fake.collection("teams")[team_id]["join_requests"]) == joiners
+
+
+def test_batches_build_on_writes_from_other_workers(client, fake):
+    team_id = _create_team(client, "user00016")
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00017"})
+    # Another worker's batch lands between ours
+    stored = fake.collection("teams")[team_id]
+    stored["join_requests"] = stored["join_requests"] + ["user00018"]
+
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00019"})
+
+    assert fake.collection("teams")[team_id]["join_requests"] == ["user00017", "user00018", "user00019"]
+
+
+def test_only_leader_can_approve(client):
+    team_id = _create_team(client, "user00011")
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00012"})
+
+    response = client.post("/api/teams/approve", json={
+        "team_id": team_id, "leader_id": "user00012", "target_user_id": "user00012"})
+
+    assert response.status_code == 403
+
+
+def test_leader_leaving_disbands_team(client, fake):
+    team_id = _create_team(client, "user00013")
+
+    response = client.post("/api/teams/leave", json={"team_id": team_id, "user_id": "user00013"})
+
+    assert response.json()["message"] == "Leader left. Team disbanded."
+    assert team_id not in fake.collection("teams")
+
+
+def test_batch_results_reflect_the_final_team(client, fake):
+    from app.services.team_mutations import team_mutations
+
+    team_id = _create_team(client, "user00014")
+
+    async def same_batch():
+        return await asyncio.gather(
+            team_mutations.submit(team_id, "join", user_id="user00015"),
+            team_mutations.submit(team_id, "leave", user_id="user00014"),
+            return_exceptions=True)
+
+    joined, left = client.portal.call(same_batch)
+    # The join was applied first, but the team it joined is gone
+    assert isinstance(joined, HTTPException) and joined.status_code == 404
+    assert left == "Leader left. Team disbanded."
+    assert team_id not in fake.collection("teams")
+
+
+def test_unexpected_batch_errors_resolve_every_waiter(client):
+    from app.services.team_mutations import team_mutations
+
+    team_id = _create_team(client, "user00016")
+
+    async def bad_op():
+        return await asyncio.wait_for(asyncio.gather(
+            team_mutations.submit(team_id, "bogus"),
+            team_mutations.submit(team_id, "join", user_id="user00017"),
+            return_exceptions=True), timeout=5)
+
+    bogus, joined = client.portal.call(bad_op)
+    assert isinstance(bogus, HTTPException) and bogus.status_code == 500
+    assert joined == "Join request sent"
+
+
+def test_list_teams_projection_keeps_what_enrichment_needs(client):
+    response = client.get("/api/teams/", params={"limit": 5, "fields": "name"})
+
+    assert response.status_code == 200
+    for team in response.json()["documents"]:
+        assert "description" not in team and "looking_for" not in team
+        assert [m["userId"] for m in team["members_enriched"]] == team["members"]
+
+
+def test_my_teams_follow_create_approve_and_leave(client, indexes_ready):
+    team_id = _create_team(client, "user00020", name="Index Team")
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00021"})
+    client.post("/api/teams/approve", json={"team_id": team_id, "leader_id": "user00020", "target_user_id": "user00021"})
+
+    response = client.get("/api/teams/", params={"user_id": "user00021", "fields": "name"})
+    assert team_id in [t["$id"] for t in response.json()["documents"]]
+    assert "description" not in response.json()["documents"][0]
+    # No members scan upstream; at most the names lookup
+    assert upstream_calls(response) <= 1
+
+    client.post("/api/teams/leave", json={"team_id": team_id, "user_id": "user00021"})
+    response = client.get("/api/teams/", params={"user_id": "user00021"})
+    assert team_id not in [t["$id"] for t in response.json()["documents"]]
+
+
+def test_team_reads_use_member_snapshots(client, fake):
+    team_id = _create_team(client, "user00030", name="Snapshot Team")
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00031"})
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00032"})
+    client.post("/api/teams/approve", json={"team_id": team_id, "leader_id": "user00030", "target_user_id": "user00031"})
+
+    response = client.get(f"/api/teams/{team_id}")
+
+    body = response.json()
+    assert upstream_calls(response) == 1
+    assert "member_snapshots" not in body
+    assert [m["name"] for m in body["members_enriched"]] == ["User 30", "User 31"]
+    assert body["members_enriched"][1]["skills"] == fake.collection("users")["user00031"]["skills"][:3]
+    assert [r["userId"] for r in body["join_requests_enriched"]] == ["user00032"]
+
+
+def test_profile_edits_reach_member_snapshots(client):
+    team_id = _create_team(client, "user00033", name="Rename Team")
+
+    client.put("/api/users/user00033", json={"name": "Renamed 33", "avatar_url": "https://img/33.png"})
+
+    for _ in range(100):
+        leader = client.get(f"/api/teams/{team_id}").json()["members_enriched"][0]
+        if leader["name"] == "Renamed 33":
+            break
+        time.sleep(0.01)
+    assert leader == {"userId": "user00033", "name": "Renamed 33", "avatar": "https://img/33.png",
+                      "skills": leader["skills"]}
+
+
+def test_batch_decisions_use_one_read_and_one_write(client, fake):
+    team_id = _create_team(client, "user00040", name="Batch Team")
+    for uid in ("user00041", "user00042", "user00043"):
+        client.post("/api/teams/join", json={"team_id": team_id, "user_id": uid})
+
+    before = fake.calls.copy()
+    response = client.post(f"/api/teams/{team_id}/requests:batch", json={
+        "leader_id": "user00040",
+        "decisions": [
+            {"user_id": "user00041", "action": "approve"},
+            {"user_id": "user00042", "action": "reject"},
+            {"user_id": "user00049", "action": "approve"},
+            {"user_id": "user00043", "action": "approve"},
+        ],
+    })
+
+    assert response.status_code == 200
+    assert [(r["id"], r["status"]) for r in response.json()["results"]] == [
+        ("user00041", 200), ("user00042", 200), ("user00049", 404), ("user00043", 200)]
+    team = fake.collection("teams")[team_id]
+    assert team["members"] == ["user00040", "user00041", "user00043"]
+    assert team["join_requests"] == []
+    assert fake.calls["databases.update_document(teams)"] - before["databases.update_document(teams)"] == 1
+    assert upstream_calls(response) <= 2
+
+
+def test_batch_decisions_need_the_leader(client):
+    team_id = _create_team(client, "user00044", name="Batch Team 2")
+    client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00045"})
+
+    response = client.post(f"/api/teams/{team_id}/requests:batch", json={
+        "leader_id": "user00045", "decisions": [{"user_id": "user00045", "action": "approve"}]})
+
+    assert response.json()["results"][0]["status"] == 403
+
+
+def test_mutations_publish_live_diffs(client):
+    from app.services.events import team_events, hackathon_topic
+    import json
+
+    feed = team_events.subscribe([hackathon_topic("hack0000")])
+    try:
+        team_id = _create_team(client, "user00050", name="Live Team")
+        client.post("/api/teams/join", json={"team_id": team_id, "user_id": "user00051"})
+        client.post("/api/teams/approve", json={"team_id": team_id, "leader_id": "user00050", "target_user_id": "user00051"})
+        client.put(f"/api/teams/{team_id}", params={"user_id": "user00050"}, json={"status": "closed"})
+        client.request("DELETE", "/api/teams/delete", json={"team_id": team_id, "user_id": "user00050"})
+    finally:
+        team_events.unsubscribe(feed)
+
+    events = [json.loads(frame[len(b"data: "):]) for frame in feed.drain()]
+    events = [e for e in events if e["team_id"] == team_id]
+    assert [e["type"] for e in events] == [
+        "team_created", "join_requested", "member_approved", "team_updated", "team_deleted"]
+    assert events[1]["user"]["name"] == "User 51"
+    assert events[3]["changes"] == {"status": "closed"}
+
+
+def test_live_feed_needs_something_to_follow(client):
+    assert client.get("/api/teams/events").status_code == 400
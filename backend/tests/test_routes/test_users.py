@@ -0,0 +1,63 @@
+from tests.fake_appwrite import upstream_calls
+
+
+def test_get_user_profile(client):
+    response = client.get("/api/users/user00002")
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "user00002"
+
+
+def test_renamed_user_shows_up_in_team_listing(client, fake):
+    team = fake.collection("teams")["team00005"]
+    leader = team["leader_id"]
+    client.get("/api/teams/team00005")  # warm the name cache
+
+    response = client.put(f"/api/users/{leader}", json={"name": "Renamed Leader"})
+    assert response.json()["name"] == "Renamed Leader"
+
+    members = client.get("/api/teams/team00005").json()["members_enriched"]
+    assert next(m for m in members if m["userId"] == leader)["name"] == "Renamed Leader"
+
+
+def test_user_hackathons_are_served_locally(client, fake, indexes_ready):
+    team = fake.collection("teams")["team00003"]
+    user_id = team["members"][0]
+
+    response = client.get(f"/api/users/{user_id}/hackathons")
+
+    assert response.status_code == 200
+    hackathons = response.json()["hackathons"]
+    assert team["hackathon_id"] in {h["$id"] for h in hackathons}
+    assert all(user_id in h["my_team"]["members"] for h in hackathons)
+    assert all(set(h) >= {"name", "tagline", "my_team"} for h in hackathons)
+    assert upstream_calls(response) == 0
+
+
+def test_get_many_users(client):
+    response = client.get("/api/users/", params={"ids": "user00001,user00002,nobody,user00001"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["id"], r["status"]) for r in results] == [("user00001", 200), ("user00002", 200), ("nobody", 404)]
+    assert results[0]["data"]["name"] == "User 1"
+    assert upstream_calls(response) <= 2
+
+
+def test_team_payloads_never_carry_raw_member_snapshots(client, indexes_ready):
+    created = client.post("/api/teams/", json={
+        "hackathon_id": "hack0005", "name": "Snapshot Free", "description": "Testing",
+        "leader_id": "user00034", "looking_for": [],
+    })
+    assert created.status_code == 200
+    assert "member_snapshots" not in created.json()["data"]
+
+    teams = client.get("/api/hackathons/hack0005/teams").json()["teams"]
+    streamed = client.get("/api/hackathons/hack0005/teams", params={"stream": "true"}).text.splitlines()
+    hackathons = client.get("/api/users/user00034/hackathons").json()["hackathons"]
+    suggested = client.get("/api/users/user00035/team-suggestions", params={"hackathon_id": "hack0005"}).json()["teams"]
+
+    assert teams and all("member_snapshots" not in t for t in teams)
+    assert streamed and all("member_snapshots" not in line for line in streamed)
+    assert hackathons and all("member_snapshots" not in h["my_team"] for h in hackathons)
+    assert suggested and all("member_snapshots" not in t and "$permissions" not in t for t in suggested)
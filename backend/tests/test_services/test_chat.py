@@ -0,0 +1,91 @@
+from app.services.chat import ChannelLog, ChatWriter, message_id
+import asyncio
+
+
+def msg(i: int) -> dict:
+    return {"id": f"{i:04d}", "content": str(i)}
+
+
+def test_message_ids_sort_by_send_time():
+    ids = [message_id() for _ in range(1000)]
+    assert ids == sorted(ids) and len(set(ids)) == 1000
+
+
+def test_log_keeps_newest_messages_and_counts_all():
+    log = ChannelLog(capacity=3, messages=[], total=0)
+    for i in range(5):
+        log.add(msg(i))
+    log.add(msg(4))  # delivered twice (e.g. echoed back by the broker)
+
+    assert [m["id"] for m in log.messages] == ["0002", "0003", "0004"]
+    assert log.total == 5 and not log.complete
+
+
+def test_pages_come_from_memory_only_when_it_holds_them():
+    log = ChannelLog(capacity=3, messages=[msg(2), msg(3), msg(4)], total=5)
+
+    assert [m["id"] for m in log.page(None, 2)] == ["0004", "0003"]
+    assert log.page("0004", 3) is None  # needs older messages than memory holds
+    assert log.page("0001", 2) is None  # cursor older than memory
+
+    complete = ChannelLog(capacity=3, messages=[msg(0), msg(1)], total=2)
+    assert [m["id"] for m in complete.page("0001", 25)] == ["0000"]
+
+
+def test_unread_is_exact_inside_memory_and_capped_beyond_it():
+    log = ChannelLog(capacity=3, messages=[msg(2), msg(3), msg(4)], total=5000)
+
+    assert log.newer_than("0003") == (1, True)
+    assert log.newer_than("0002") == (2, True)
+    # Reader is behind everything kept: "at least 3"
+    assert log.newer_than("0001") == (3, False)
+    assert log.newer_than(None) == (3, False)
+    assert ChannelLog(capacity=3, messages=[msg(0)], total=1).newer_than(None) == (1, True)
+
+
+def test_stopping_the_writer_finishes_the_flush_in_flight():
+    class SlowWriter(ChatWriter):
+        async def _write_messages(self, batch):
+            await asyncio.sleep(0.05)
+            for doc, future in batch:
+                future.set_result(doc)
+
+    async def run():
+        writer = SlowWriter(window=0.0, batch_size=10, concurrency=1)
+        await writer.start()
+        sent = asyncio.ensure_future(writer.insert({"$id": "m1"}))
+        await asyncio.sleep(0.01)  # flush has started writing
+        await writer.stop()
+        return await asyncio.wait_for(sent, 1)
+
+    assert asyncio.run(run()) == {"$id": "m1"}
+
+
+def test_failed_markers_back_off_and_log_once_per_outage(monkeypatch, caplog):
+    import app.services.chat as chat
+
+    attempts = []
+
+    class FlakyDb:
+        async def upsert_documents(self, database_id, collection_id, documents):
+            attempts.append(len(documents))
+            if len(attempts) <= 3:
+                raise RuntimeError("appwrite down")
+
+    monkeypatch.setattr(chat, "get_db_service", lambda: FlakyDb())
+
+    async def run():
+        writer = ChatWriter(window=0.0, batch_size=10, concurrency=1, retry_base=0.02, retry_max=0.04)
+        await writer.start()
+        writer.save_marker({"$id": "r1"})
+        await asyncio.sleep(0.03)
+        # Not hammering Appwrite: one try, then waiting out the first backoff
+        assert len(attempts) <= 2
+        await asyncio.sleep(0.2)
+        await writer.stop()
+        return writer
+
+    caplog.set_level("INFO", logger=chat.__name__)
+    writer = asyncio.run(run())
+    assert len(attempts) == 4 and writer.pending == 0
+    assert [r.levelname for r in caplog.records] == ["ERROR", "INFO"]
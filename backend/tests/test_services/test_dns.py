@@ -0,0 +1,86 @@
+from app.services.dns import CachedResolver, ScopedResolverBackend
+import asyncio
+import httpcore
+import socket
+
+
+def info(family, address):
+    return (family, socket.SOCK_STREAM, 6, "", (address, 0))
+
+
+class StubResolver(CachedResolver):
+    def __init__(self, answers, **kwargs):
+        super().__init__("appwrite.example", ttl=60, **kwargs)
+        self.answers = list(answers)
+
+    async def _lookup(self):
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class RecordingBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, unreachable=()):
+        self.unreachable = set(unreachable)
+        self.hosts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.hosts.append(host)
+        if host in self.unreachable:
+            raise httpcore.ConnectError(f"{host} unreachable")
+        return httpcore.AsyncMockStream([])
+
+
+def test_caches_and_prefers_ipv4():
+    resolver = StubResolver([[info(socket.AF_INET6, "2001:db8::1"), info(socket.AF_INET, "203.0.113.5"),
+                              info(socket.AF_INET, "203.0.113.5")]])
+
+    async def run():
+        return await resolver.resolve(), await resolver.resolve()
+
+    first, second = asyncio.run(run())
+    assert first == second == ["203.0.113.5", "2001:db8::1"]
+    assert resolver.lookups == 1
+
+
+def test_keeps_stale_addresses_when_lookup_fails():
+    resolver = StubResolver([[info(socket.AF_INET, "203.0.113.5")], OSError("SERVFAIL")])
+
+    async def run():
+        await resolver.resolve()
+        resolver.invalidate()
+        return await resolver.resolve()
+
+    assert asyncio.run(run()) == ["203.0.113.5"]
+    assert resolver.failures == 1
+
+
+def test_backend_falls_back_and_leaves_other_hosts_alone():
+    resolver = StubResolver([[info(socket.AF_INET, "203.0.113.5"), info(socket.AF_INET6, "2001:db8::1")]])
+    inner = RecordingBackend(unreachable={"203.0.113.5"})
+    backend = ScopedResolverBackend(resolver, inner)
+
+    async def run():
+        await backend.connect_tcp("appwrite.example", 443)
+        await backend.connect_tcp("other.example", 443)
+
+    asyncio.run(run())
+    assert inner.hosts == ["203.0.113.5", "2001:db8::1", "other.example"]
+
+
+def test_resolving_transport_builds_a_single_pool(monkeypatch):
+    from app.services.appwrite import _ResolvingTransport
+    import httpx
+
+    built = []
+
+    class CountingPool(httpcore.AsyncConnectionPool):
+        def __init__(self, *args, **kwargs):
+            built.append(kwargs.get("network_backend"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(httpcore, "AsyncConnectionPool", CountingPool)
+    transport = _ResolvingTransport(StubResolver([]), httpx.Limits(max_connections=5), http2=False)
+    assert len(built) == 1 and isinstance(built[0], ScopedResolverBackend)
+    assert transport.connections == 0
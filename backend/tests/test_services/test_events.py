@@ -0,0 +1,64 @@
+from app.services.events import EventBus, RESYNC_FRAME, HEARTBEAT_FRAME, team_topic, hackathon_topic
+import asyncio
+
+
+def started_bus(buffer=64) -> EventBus:
+    bus = EventBus(buffer=buffer)
+    asyncio.run(bus.start())
+    return bus
+
+
+def test_fans_out_once_per_subscriber():
+    bus = started_bus()
+    team_only = bus.subscribe([team_topic("t1")])
+    both = bus.subscribe([team_topic("t1"), hackathon_topic("h1")])
+    other = bus.subscribe([team_topic("t2")])
+
+    bus.publish({"type": "member_left", "team_id": "t1", "hackathon_id": "h1", "user_id": "u1"})
+
+    assert len(team_only.drain()) == 1
+    assert len(both.drain()) == 1
+    assert other.drain() == []
+    assert bus.delivered == 2
+
+
+def test_slow_subscriber_gets_a_resync_instead_of_a_backlog():
+    bus = started_bus(buffer=3)
+    sub = bus.subscribe([team_topic("t1")])
+
+    for i in range(5):
+        bus.publish({"type": "team_updated", "team_id": "t1", "changes": {"n": i}})
+
+    frames = sub.drain()
+    assert frames[0] == RESYNC_FRAME
+    assert frames[-1].endswith(b'{"n":4}}\n\n')
+    assert len(frames) <= 3
+
+
+def test_dropped_counts_a_multi_topic_subscriber_once():
+    bus = started_bus(buffer=3)
+    sub = bus.subscribe([team_topic("t1"), hackathon_topic("h1")])
+
+    for i in range(5):
+        bus.publish({"type": "team_updated", "team_id": "t1", "hackathon_id": "h1", "changes": {"n": i}})
+
+    assert bus.dropped == sub.dropped > 0
+    bus.unsubscribe(sub)
+    assert bus.dropped == sub.dropped
+
+
+def test_stream_sends_heartbeats_and_unsubscribes():
+    bus = started_bus()
+
+    async def run():
+        body = bus.stream([team_topic("t1")], heartbeat=0.01)
+        chunks = [await body.__anext__(), await body.__anext__()]
+        bus.publish({"type": "team_deleted", "team_id": "t1"})
+        chunks.append(await body.__anext__())
+        await body.aclose()
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert chunks[1] == HEARTBEAT_FRAME
+    assert b'"team_deleted"' in chunks[2]
+    assert bus.subscribers == 0
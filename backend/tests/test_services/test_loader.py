@@ -0,0 +1,46 @@
+from app.core import upstream
+from app.services.loader import BatchLoader
+from app.services.singleflight import SingleFlight
+import asyncio
+
+
+def test_shared_calls_are_charged_to_every_waiter_once():
+    async def fetch(keys):
+        upstream.check_budget("users.list")
+        upstream.record("users.list", None, 0.0, 0)
+        return {k: k.upper() for k in keys}
+
+    loader, flight = BatchLoader(fetch), SingleFlight()
+
+    async def request(keys):
+        # Like the middleware: each request has its own accounting, here with a spent budget
+        stats = upstream.RequestUpstream()
+        stats.budget = 0
+        upstream._current.set(stats)
+        results = await loader.load_many(keys)
+        results.append(await flight.do("c", lambda: fetch(["c"])))
+        return results, stats
+
+    async def run():
+        return await asyncio.gather(request(["a", "b"]), request(["b"]))
+
+    (first, first_stats), (second, second_stats) = asyncio.run(run())
+    assert first == ["A", "B", {"c": "C"}] and second == ["B", {"c": "C"}]
+    # One batch and one coalesced read each, never the other request's share twice
+    assert len(first_stats.calls) == len(second_stats.calls) == 2
+
+
+def test_cancelling_one_caller_leaves_the_shared_key_loading():
+    async def fetch(keys):
+        await asyncio.sleep(0.01)
+        return {k: k.upper() for k in keys}
+
+    async def run():
+        loader = BatchLoader(fetch)
+        first = asyncio.ensure_future(loader.load("a"))
+        second = asyncio.ensure_future(loader.load("a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "A"
@@ -0,0 +1,21 @@
+from app.services.matching import batch_match_scores, calculate_match_score, top_k_matches
+import random
+
+
+def test_batch_scores_match_scalar_scores():
+    rng = random.Random(1)
+    vocab = ["Python", "react", "React", "Go", "design", "ML", "SQL"]
+    users = [rng.sample(vocab, rng.randint(0, 4)) for _ in range(30)]
+    teams = [rng.sample(vocab, rng.randint(0, 4)) for _ in range(20)]
+
+    scores = batch_match_scores(users, teams)
+
+    for i, skills in enumerate(users):
+        for j, requirements in enumerate(teams):
+            assert scores[i, j] == calculate_match_score(skills, requirements)
+
+
+def test_top_k_drops_zero_scores():
+    scores = batch_match_scores([["Go"], ["Python"]], [["Go"], ["Rust"], ["go", "Python"]])
+
+    assert top_k_matches(scores, k=3) == [[(0, 100), (2, 50)], [(2, 50)]]
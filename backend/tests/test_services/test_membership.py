@@ -0,0 +1,42 @@
+from app.services.membership import MembershipIndex
+
+
+def team(team_id, hackathon_id, members, created="2026-01-01"):
+    return {"$id": team_id, "hackathon_id": hackathon_id, "members": members, "$createdAt": created,
+            "$permissions": []}
+
+
+def test_tracks_membership_changes():
+    index = MembershipIndex()
+    index.put(team("t1", "h1", ["a", "b"], "2026-01-02"))
+    index.put(team("t2", "h2", ["a"], "2026-01-01"))
+
+    assert [t["$id"] for t in index.teams_of("a")] == ["t2", "t1"]
+    assert index.hackathon_ids_of("a") == {"h1", "h2"}
+    assert "$permissions" not in index.teams_of("a")[0]
+
+    index.put(team("t1", "h1", ["b"]))  # a left
+    index.remove("t2")
+
+    assert index.teams_of("a") == []
+    assert index.users == 1
+
+
+def test_returned_teams_are_copies():
+    index = MembershipIndex()
+    index.put(team("t1", "h1", ["a"]))
+
+    index.teams_of("a")[0]["members_enriched"] = []
+
+    assert "members_enriched" not in index.teams_of("a")[0]
+
+
+def test_diff_counts_teams_whose_members_changed():
+    local, upstream = MembershipIndex(), MembershipIndex()
+    local.put(team("t1", "h1", ["a"]))
+    local.put(team("t2", "h1", ["b"]))
+    upstream.put(team("t1", "h1", ["a", "c"]))
+    upstream.put(team("t2", "h1", ["b"]))
+    upstream.put(team("t3", "h2", ["d"]))
+
+    assert local._diff(upstream) == 2
@@ -0,0 +1,165 @@
+from app.services.appwrite import AsyncAppwriteClient
+from app.services.resilience import CircuitBreaker, Resilience, retry_after
+from appwrite.exception import AppwriteException
+import asyncio
+import httpx
+import pytest
+
+
+def make_resilience(**overrides):
+    options = dict(retries=2, backoff_base=0.001, backoff_max=0.05, budget_ratio=0.1,
+                   hedge_percentile=0, hedge_min=0.0, circuit_failures=3, circuit_reset=60)
+    options.update(overrides)
+    return Resilience(**options)
+
+
+def client_for(responses, resilience, delays=None):
+    """Appwrite client whose transport answers with `responses` in order (status or (status, headers))."""
+    sent = []
+
+    async def handler(request):
+        index = len(sent)
+        sent.append(request.method)
+        if delays and index < len(delays):
+            await asyncio.sleep(delays[index])
+        answer = responses[min(index, len(responses) - 1)]
+        status, headers = answer if isinstance(answer, tuple) else (answer, {})
+        return httpx.Response(status, json={"message": "x", "code": status, "type": "t"}, headers=headers)
+
+    client = AsyncAppwriteClient("http://appwrite.test/v1", "p", "k",
+                                 transport=httpx.MockTransport(handler), resilience=resilience)
+    return client, sent
+
+
+def call(client, method="get"):
+    return asyncio.run(client.call(method, "/databases/db/collections/c/documents", operation="op"))
+
+
+def test_retries_transient_failures_and_rate_limits():
+    client, sent = client_for([503, (429, {"Retry-After": "0"}), 200], make_resilience())
+    assert call(client)["code"] == 200
+    assert len(sent) == 3
+
+
+def test_does_not_retry_client_errors_or_unsafe_writes():
+    client, sent = client_for([400], make_resilience())
+    with pytest.raises(AppwriteException):
+        call(client)
+    assert len(sent) == 1
+
+    # A POST that reached Appwrite and got a 503 may have been applied
+    client, sent = client_for([503, 200], make_resilience())
+    with pytest.raises(AppwriteException):
+        call(client, "post")
+    assert len(sent) == 1
+
+
+def test_gives_up_when_asked_to_wait_longer_than_backoff_cap():
+    client, sent = client_for([(429, {"Retry-After": "30"}), 200], make_resilience())
+    with pytest.raises(AppwriteException) as e:
+        call(client)
+    assert e.value.code == 429 and len(sent) == 1
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "1.5"})) == 1.5
+
+
+def test_circuit_opens_then_probes():
+    resilience = make_resilience(retries=0, circuit_reset=0.05)
+    client, sent = client_for([503, 503, 503, 200], resilience)
+    for _ in range(3):
+        with pytest.raises(AppwriteException):
+            call(client)
+    assert resilience.breaker("op").state == CircuitBreaker.OPEN
+
+    # Fails fast without touching Appwrite
+    with pytest.raises(AppwriteException) as e:
+        call(client)
+    assert e.value.type == "circuit_open" and len(sent) == 3
+
+    asyncio.run(asyncio.sleep(0.06))
+    call(client)
+    assert resilience.breaker("op").state == CircuitBreaker.CLOSED
+
+
+def test_hedges_slow_reads():
+    resilience = make_resilience(hedge_percentile=95, hedge_min=0.01)
+    for _ in range(64):
+        resilience.latency.observe("op", 0.001)
+    client, sent = client_for([200], resilience, delays=[1.0, 0.0])
+
+    async def timed():
+        start = asyncio.get_running_loop().time()
+        await client.call("get", "/databases/db/collections/c/documents", operation="op")
+        return asyncio.get_running_loop().time() - start
+
+    assert asyncio.run(timed()) < 0.5
+    assert len(sent) == 2
+
+
+def test_writes_are_never_hedged():
+    resilience = make_resilience(hedge_percentile=95, hedge_min=0.01)
+    for _ in range(64):
+        resilience.latency.observe("op", 0.001)
+    client, sent = client_for([200], resilience, delays=[0.1])
+
+    call(client, "put")
+    assert sent == ["PUT"]
+
+
+def test_hedge_prefers_a_success_finishing_alongside_a_failure():
+    resilience = make_resilience(hedge_percentile=95, hedge_min=0.01)
+    for _ in range(64):
+        resilience.latency.observe("op", 0.001)
+
+    async def run():
+        release, statuses = asyncio.Event(), [503, 200]
+
+        async def send():
+            status = statuses.pop(0)
+            if not statuses:
+                release.set()  # both copies are in flight: let them finish together
+            await release.wait()
+            return httpx.Response(status)
+
+        return await resilience._hedged("op", send)
+
+    assert asyncio.run(run()).status_code == 200
+
+
+def test_warm_only_counts_real_responses():
+    resilience = make_resilience(retries=0, circuit_failures=1)
+    client, sent = client_for([503], resilience)
+
+    # The first call answers (an error status still used a live connection) and opens the circuit
+    assert asyncio.run(client.warm(1)) == 1
+    assert asyncio.run(client.warm(2)) == 0
+    assert len(sent) == 1
+
+
+def test_cancelling_the_caller_cancels_every_hedge_copy():
+    resilience = make_resilience(hedge_percentile=95, hedge_min=0.01)
+    for _ in range(64):
+        resilience.latency.observe("op", 0.001)
+
+    async def run():
+        started, cancelled = [], []
+
+        async def send():
+            started.append(1)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        # Cancelled while still waiting on the first copy, then again once both are racing
+        for wait in (0.001, 0.05):
+            started.clear(), cancelled.clear()
+            caller = asyncio.ensure_future(resilience._hedged("op", send))
+            await asyncio.sleep(wait)
+            caller.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await caller
+            await asyncio.sleep(0)
+            assert started and len(cancelled) == len(started)
+
+    asyncio.run(run())
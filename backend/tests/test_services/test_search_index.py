@@ -0,0 +1,59 @@
+from app.services.search_index import SearchIndex, tokenize
+
+
+def _doc(doc_id, name, description="", tags=(), location="Online", mode="online"):
+    return {"$id": doc_id, "name": name, "description": description, "tags": list(tags),
+            "location": location, "mode": mode, "tagline": ""}
+
+
+def _index(*docs):
+    index = SearchIndex()
+    for doc in docs:
+        index.add(doc)
+    return index
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("Hackathons for Beginners in FinTech using C++") == ["hackathon", "beginner", "fintech", "c++"]
+
+
+def test_bm25_prefers_rarer_and_heavier_fields():
+    index = _index(
+        _doc("a", "Python Sprint", "Build anything."),
+        _doc("b", "Open Sprint", "Mostly python, some fintech."),
+        _doc("c", "Design Day", "No code."),
+    )
+
+    ranked = [doc["$id"] for _, doc in index.search("python", 10)]
+
+    assert ranked == ["a", "b"]
+
+
+def test_readding_a_document_replaces_it():
+    index = _index(_doc("a", "Rust Night"))
+    index.add(_doc("a", "Go Night"))
+
+    assert index.search("rust", 10) == []
+    assert [doc["name"] for _, doc in index.search("go", 10)] == ["Go Night"]
+    assert len(index) == 1
+
+
+def test_typo_and_prefix_matches_rank_below_exact():
+    index = _index(_doc("exact", "Blockchain Summit"), _doc("other", "Blockchains Unite"))
+
+    assert index.search("blokchain", 10)
+    assert index.search("block", 10)
+    assert index.search("blockchain", 1)[0][0] > index.search("blokchain", 1)[0][0]
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = _index(_doc("a", "Climate Hack", tags=["Climate"]), _doc("b", "Health Hack", location="Berlin"))
+    index.remove("a")
+    path = str(tmp_path / "index.npz")
+
+    index.save(path)
+    restored = SearchIndex.load(path)
+
+    assert len(restored) == 1
+    assert restored.search("berlin health", 5) == index.search("berlin health", 5)
+    assert restored.search("climate", 5) == []
@@ -0,0 +1,37 @@
+from app.services.summaries import SummaryService, SummaryStore
+import asyncio
+
+
+class UnconfiguredSummarizer:
+    configured = False
+
+    async def summarize(self, text):
+        raise RuntimeError("GEMINI_API_KEY is missing in .env")
+
+
+def test_concurrent_writes_share_one_connection(tmp_path):
+    store = SummaryStore(str(tmp_path / "summaries.db"))
+    store.open()
+
+    async def run():
+        await asyncio.gather(*[store.put(f"h{i}", f"summary {i}") for i in range(50)])
+
+    asyncio.run(run())
+    store.close()
+
+    reopened = SummaryStore(str(tmp_path / "summaries.db"))
+    reopened.open()
+    assert len(reopened) == 50
+    reopened.close()
+
+
+def test_backfill_is_skipped_without_a_model_key(tmp_path):
+    service = SummaryService(SummaryStore(str(tmp_path / "summaries.db")), UnconfiguredSummarizer(), workers=2)
+
+    async def run():
+        await service.start()
+        tasks = len(service._tasks)
+        await service.stop()
+        return tasks
+
+    assert asyncio.run(run()) == 2
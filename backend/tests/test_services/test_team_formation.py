@@ -0,0 +1,63 @@
+from app.services.team_formation import optimize_teams
+import random
+import time
+
+
+def person(uid, skills):
+    return {"$id": uid, "username": uid, "skills": skills}
+
+
+def test_fills_each_teams_gap_with_the_right_person():
+    participants = [person("a", ["Python"]), person("b", ["React"]), person("c", ["Design"])]
+    teams = [
+        {"$id": "t1", "looking_for": ["React"], "members": ["m1"]},
+        {"$id": "t2", "looking_for": ["Python", "Design"], "members": ["m2"]},
+    ]
+
+    result = optimize_teams(participants, teams, {"m1": [], "m2": []}, min_team_size=1, max_team_size=3)
+
+    added = {a["team_id"]: {m["userId"] for m in a["add_members"]} for a in result["assignments"]}
+    assert added == {"t1": {"b"}, "t2": {"a", "c"}}
+    assert result["stats"]["requirements_covered_after"] == 3
+
+
+def test_skills_already_on_the_team_are_not_a_gap():
+    participants = [person("a", ["Python"]), person("b", ["Go"])]
+    teams = [{"$id": "t1", "looking_for": ["Python", "Go"], "members": ["m1"]}]
+
+    result = optimize_teams(participants, teams, {"m1": ["python"]}, min_team_size=1, max_team_size=2)
+
+    assert result["assignments"][0]["add_members"][0]["userId"] == "b"
+    assert result["assignments"][0]["still_missing"] == []
+
+
+def test_respects_team_sizes_and_groups_leftovers():
+    participants = [person(f"u{i}", [f"s{i}"]) for i in range(7)]
+    teams = [{"$id": "t1", "looking_for": ["s0"], "members": ["m1", "m2"]}]
+
+    result = optimize_teams(participants, teams, {}, min_team_size=2, max_team_size=3)
+
+    assert [m["userId"] for m in result["assignments"][0]["add_members"]] == ["u0"]
+    assert [len(t["members"]) for t in result["new_teams"]] == [3, 3]
+    assert len(result["unassigned"]) == 0
+
+
+def test_everyone_is_placed_at_most_once_at_scale():
+    rng = random.Random(3)
+    skills = [f"skill{i}" for i in range(60)]
+    participants = [person(f"u{i}", rng.sample(skills, rng.randint(1, 5))) for i in range(10_000)]
+    teams = [
+        {"$id": f"t{i}", "looking_for": rng.sample(skills, 4), "members": [f"m{i}"]}
+        for i in range(1_000)
+    ]
+
+    start = time.perf_counter()
+    result = optimize_teams(participants, teams, {}, min_team_size=2, max_team_size=4)
+    assert time.perf_counter() - start < 30
+
+    placed = [m["userId"] for a in result["assignments"] for m in a["add_members"]]
+    placed += [m["userId"] for t in result["new_teams"] for m in t["members"]]
+    placed += [m["userId"] for m in result["unassigned"]]
+    assert sorted(placed) == sorted(p["$id"] for p in participants)
+    assert all(a["size"] <= 4 for a in result["assignments"])
+    assert result["stats"]["requirements_covered_after"] > result["stats"]["requirements_covered_before"]
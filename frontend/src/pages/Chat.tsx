@@ -220,7 +220,7 @@ export default function Chat() {
                       )}
                       {channel.unreadCount > 0 && (
                         <span className="absolute -top-1 -right-1 h-5 w-5 rounded-full bg-primary text-[10px] font-bold flex items-center justify-center text-primary-foreground animate-pulse">
-                          {channel.unreadCount}
+                          {channel.unreadCount}{channel.unreadCapped && "+"}
                         </span>
                       )}
                     </div>
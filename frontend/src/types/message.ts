@@ -35,6 +35,7 @@ export interface Channel {
   participants: string[];
   lastMessage?: Message;
   unreadCount: number;
+  unreadCapped?: boolean; // unreadCount is a lower bound ("200+")
   createdAt: Date;
 }
 